@@ -0,0 +1,152 @@
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from typing import List
+from network import barrier
+from network.barrier import RoundBarrier
+from network.connection import Connection
+from network.hub import GameHub
+from network.protocol import FrameDecoder, MessageType
+from network.room import RoomRegistry
+
+
+# 直接對 RoundBarrier 壓測：很多 thread 同時 arrive，途中有人斷線、有人晚加入
+def stress_barrier(members: int, threads: int, rounds: int, leave_rate: float) -> None:
+    round_barrier = RoundBarrier()
+    for member in range(members):
+        round_barrier.join(member)
+    shards: List[List[int]] = [list(range(i, members, threads)) for i in range(threads)]
+    next_member = [members]
+    next_lock = threading.Lock()
+    errors: List[BaseException] = []
+
+    def worker(shard: List[int], seed: int) -> None:
+        rng = random.Random(seed)
+        try:
+            for round_number in range(rounds):
+                for member in list(shard):
+                    if rng.random() < leave_rate:
+                        shard.remove(member)
+                        round_barrier.leave(member)
+                        # 補一個晚加入的玩家，下一回合才算
+                        with next_lock:
+                            newcomer = next_member[0]
+                            next_member[0] += 1
+                        round_barrier.join(newcomer)
+                        round_barrier.arrive(newcomer)
+                        shard.append(newcomer)
+                        continue
+                    round_barrier.arrive(member)
+                deadline = time.monotonic() + 10
+                while round_barrier.round <= round_number:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"round {round_number} stuck, {round_barrier.waiting()} members missing")
+                    time.sleep(0)
+        except BaseException as e:
+            errors.append(e)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(shard, i)) for i, shard in enumerate(shards)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    assert round_barrier.round == rounds, round_barrier.round
+    print(f"barrier: {members} members x {rounds} rounds on {threads} threads in {elapsed:.2f}s "
+          f"({members * rounds / elapsed:,.0f} arrivals/s), {next_member[0] - members} leave+rejoin")
+
+
+# 有人一直不 arrive 時，timeout 讓回合繼續
+def stress_timeout(members: int, timeout: float) -> None:
+    round_barrier = RoundBarrier(timeout)
+    for member in range(members):
+        round_barrier.join(member)
+    for member in range(members - 1):
+        round_barrier.arrive(member)
+    assert not round_barrier.expire(), "expired before the deadline"
+    time.sleep(timeout)
+    assert round_barrier.expire(), "straggler blocked the round"
+    assert round_barrier.round == 1
+    print(f"timeout: round advanced after {timeout}s without 1 straggler out of {members}")
+
+
+class FakeConnection(Connection):
+    def __init__(self, peer: str):
+        super().__init__(peer)
+        self.decoder: FrameDecoder = FrameDecoder()
+        self.received: Counter = Counter()
+        self.lock: threading.Lock = threading.Lock()
+
+    def send(self, data: bytes) -> None:
+        with self.lock:
+            for msg_type, _ in self.decoder.feed(data):
+                self.received[msg_type] += 1
+
+    def close(self) -> None:
+        pass
+
+
+# 透過 GameHub 從很多 thread 同時送 round_end 和斷線，跟 thread server 的情況一樣
+def stress_hub(clients: int, threads: int, rounds: int, room_size: int) -> None:
+    hub = GameHub(RoomRegistry(room_size))
+    connections = [FakeConnection(f"fake{i}") for i in range(clients)]
+    for connection in connections:
+        hub.handle_message(connection, MessageType.LOGIN, connection.peer.encode())
+    leavers = set(connections[::50])
+    errors: List[BaseException] = []
+
+    def worker(shard: List[FakeConnection]) -> None:
+        try:
+            for round_number in range(rounds):
+                for connection in shard:
+                    if connection in leavers and round_number == rounds // 2:
+                        hub.disconnect(connection)
+                    elif not (connection in leavers and round_number > rounds // 2):
+                        hub.handle_message(connection, MessageType.ROUND_END, b"")
+                # 等同房間的人都送完這回合
+                deadline = time.monotonic() + 10
+                for connection in shard:
+                    if connection in leavers and round_number >= rounds // 2:
+                        continue
+                    while connection.received[MessageType.ROUND_COMPLETE] <= round_number:
+                        if time.monotonic() > deadline:
+                            raise TimeoutError(f"{connection.peer} stuck in round {round_number}")
+                        time.sleep(0.001)
+        except BaseException as e:
+            errors.append(e)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(connections[i::threads],)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    print(f"hub: {clients} clients in rooms of {room_size}, {rounds} rounds on {threads} threads in {elapsed:.2f}s, "
+          f"{len(leavers)} disconnected mid-game")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrency stress test for the round barrier")
+    parser.add_argument("--members", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--leave-rate", type=float, default=0.002)
+    parser.add_argument("--room-size", type=int, default=8)
+    args = parser.parse_args()
+
+    stress_barrier(args.members, args.threads, args.rounds, args.leave_rate)
+    stress_timeout(args.members, 0.2)
+    stress_hub(args.members, args.threads, args.rounds, args.room_size)
+    print(barrier.stats.summary())
+
+
+if __name__ == "__main__":
+    main()
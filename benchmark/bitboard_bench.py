@@ -0,0 +1,67 @@
+import argparse
+import random
+import timeit
+from typing import Callable, List, Tuple
+from game.bitboard import BitboardLogic
+from game.logic import GameLogic
+
+
+def list_board(grid_num: int) -> GameLogic:
+    return GameLogic(grid_num)
+
+
+# 最壞情況：除了兩條對角線都選了，每條線都差一格，沒有連線
+def dense_cells(grid_num: int) -> List[Tuple[int, int]]:
+    return [(x, y) for x in range(grid_num) for y in range(grid_num) if x != y and x != grid_num - 1 - y]
+
+
+def fill(game: GameLogic, cells: List[Tuple[int, int]]) -> GameLogic:
+    for x, y in cells:
+        game.selected[x][y] = True
+    return game
+
+
+# 跟 GameUI.handle_get_random_num 一樣：每抽一個數字標記一格，再呼叫兩次 check_game_finish，直到連線
+def play(make: Callable[[], GameLogic], order: List[Tuple[int, int]]) -> Callable[[], None]:
+    def run() -> None:
+        game = make()
+        for x, y in order:
+            game.selected[x][y] = True
+            if game.check_game_finish() == "win":
+                game.check_game_finish()
+                return
+            game.check_game_finish()
+    return run
+
+
+def best(fn: Callable[[], object], number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="GameLogic list-of-lists vs bitboard win checks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    print(f"{'size':>5} {'check (list)':>14} {'check (bits)':>14} {'speedup':>8} "
+          f"{'game (list)':>13} {'game (bits)':>13} {'speedup':>8}")
+    for grid_num in args.sizes:
+        cells = dense_cells(grid_num)
+        list_game = fill(list_board(grid_num), cells)
+        bit_game = fill(BitboardLogic(grid_num), cells)
+        assert list_game.check_game_win() == bit_game.check_game_win() == bit_game.scan_win() == False
+        number = max(1, 20000 // grid_num ** 2)
+        check_list = best(list_game.check_game_win, number * 10)
+        check_bits = best(bit_game.check_game_win, number * 10)
+
+        order = [(x, y) for x in range(grid_num) for y in range(grid_num)]
+        random.Random(grid_num).shuffle(order)
+        game_list = best(play(lambda: list_board(grid_num), order), number)
+        game_bits = best(play(lambda: BitboardLogic(grid_num), order), number)
+        print(f"{grid_num:>2}x{grid_num:<2} {check_list * 1e6:>12.2f}us {check_bits * 1e6:>12.2f}us "
+              f"{check_list / check_bits:>7.0f}x {game_list * 1e3:>11.3f}ms {game_bits * 1e3:>11.3f}ms "
+              f"{game_list / game_bits:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
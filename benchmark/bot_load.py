@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Optional, Tuple
+from network.bot import BotStats, run_bots
+
+
+# 讀 /proc 的 VmRSS 與 VmHWM(峰值)，單位 KB；不是 Linux 就回傳 None
+def read_memory(pid: int) -> Tuple[Optional[int], Optional[int]]:
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                key, _, rest = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values[key] = int(rest.split()[0])
+    except OSError:
+        return None, None
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+# 背景 thread 定時取樣 server 的記憶體
+class MemorySampler:
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid: int = pid
+        self.interval: float = interval
+        self.start_kb: Optional[int] = read_memory(pid)[0]
+        self.peak_kb: Optional[int] = self.start_kb
+        self.stopped: threading.Event = threading.Event()
+        self.thread: threading.Thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            rss, _ = read_memory(self.pid)
+            if rss is not None:
+                self.peak_kb = max(self.peak_kb or 0, rss)
+
+    def stop(self) -> Optional[int]:
+        self.stopped.set()
+        self.thread.join()
+        end_kb, high_water_kb = read_memory(self.pid)
+        if high_water_kb is not None:
+            self.peak_kb = max(self.peak_kb or 0, high_water_kb)
+        return end_kb
+
+
+def start_server(engine: str, port: int, room_size: int, round_timeout: Optional[float]) -> subprocess.Popen:
+    command = [sys.executable, "server.py", "--engine", engine, "--port", str(port), "--room-size",
+               str(room_size)]
+    if round_timeout is not None:
+        command += ["--round-timeout", str(round_timeout)]
+    # server 的訊息 log 不要混進結果
+    return subprocess.Popen(command, stdout=subprocess.DEVNULL)
+
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    async def probe() -> None:
+        _, writer = await asyncio.open_connection("localhost", port)
+        writer.close()
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            asyncio.run(probe())
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def load(index: int, count: int, args: argparse.Namespace, ready: Any, results: Any) -> None:
+    stats = asyncio.run(run_bots(args.host, args.port, count, args.rounds, args.concurrency, f"p{index}-bot",
+                                 args.grid_num, args.think, args.seed + index, ready.wait))
+    results.put(stats)
+
+
+def format_latency(stats: BotStats) -> str:
+    return " ".join(f"{name} {stats.percentile(fraction) * 1e3:.1f}ms"
+                    for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)))
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Headless bot players against a local server")
+    parser.add_argument("--bots", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=min(4, cores), help="processes running bots")
+    parser.add_argument("--concurrency", type=int, default=200, help="connects in flight per process")
+    parser.add_argument("--grid-num", type=int, default=4)
+    parser.add_argument("--think", type=float, default=0.0, help="up to this many seconds before each round_end")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=13100)
+    parser.add_argument("--spawn", choices=["thread", "async", "none"], default="async",
+                        help="start server.py with this engine, or use a running server")
+    parser.add_argument("--server-pid", type=int, default=None, help="sample the memory of a running server")
+    parser.add_argument("--room-size", type=int, default=4)
+    parser.add_argument("--round-timeout", type=float, default=None)
+    args = parser.parse_args()
+
+    server = None
+    pid = args.server_pid
+    if args.spawn != "none":
+        server = start_server(args.spawn, args.port, args.room_size, args.round_timeout)
+        pid = server.pid
+        wait_for_port(args.port)
+    sampler = MemorySampler(pid) if pid else None
+    if sampler:
+        sampler.thread.start()
+
+    context = multiprocessing.get_context("fork")
+    # 所有 process 的 bot 都連上之後才一起開始玩，房間不會混到還在連線的 bot
+    ready = context.Barrier(args.processes)
+    results = context.Queue()
+    counts = [args.bots // args.processes + (index < args.bots % args.processes) for index in range(args.processes)]
+    workers = [context.Process(target=load, args=(index, count, args, ready, results))
+               for index, count in enumerate(counts)]
+    try:
+        for worker in workers:
+            worker.start()
+        stats = BotStats()
+        for _ in workers:
+            stats.merge(results.get())
+        for worker in workers:
+            worker.join()
+    finally:
+        end_kb = sampler.stop() if sampler else None
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    messages = stats.sent + stats.received
+    print(f"{stats.connected}/{args.bots} bots connected in {stats.connect_seconds:.2f}s "
+          f"({stats.connected / stats.connect_seconds:,.0f} conn/s) from {args.processes} processes")
+    print(f"{len(stats.round_latencies)} rounds in {stats.play_seconds:.2f}s: {messages:,} messages "
+          f"({messages / stats.play_seconds:,.0f} msg/s, {stats.sent:,} sent, {stats.received:,} received, "
+          f"{(stats.sent_bytes + stats.received_bytes) / 1024:,.0f}KB), {stats.wins} wins, {stats.losses} losses, "
+          f"{stats.errors} errors")
+    print(f"round barrier latency: {format_latency(stats)}")
+    if sampler and sampler.start_kb is not None and end_kb is not None:
+        print(f"server memory: {sampler.start_kb / 1024:.1f}MB idle, {end_kb / 1024:.1f}MB after, "
+              f"{sampler.peak_kb / 1024:.1f}MB peak ({(sampler.peak_kb - sampler.start_kb) / max(1, stats.connected):.1f}"
+              f"KB per bot)")
+    if stats.errors:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
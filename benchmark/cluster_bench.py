@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from typing import List, Tuple
+from benchmark.load_client import measure, summarize
+from network import log
+from network.cluster import ClusterLauncher
+
+
+def run_cluster(port: int, workers: int, room_size: int) -> None:
+    # server 的 log 不要混進結果；每輪結束時直接收掉 cluster，還在傳的 worker 連線會被 reset，這種警告也不印
+    log.setup("error")
+    ClusterLauncher(port=port, workers=workers, room_size=room_size).start()
+
+
+def start_cluster(port: int, workers: int, room_size: int) -> multiprocessing.Process:
+    process = multiprocessing.get_context("fork").Process(target=run_cluster, args=(port, workers, room_size))
+    process.start()
+    return process
+
+
+def load(args: Tuple[int, int, int, int]) -> Tuple[float, List[float]]:
+    port, index, count, rounds = args
+    return asyncio.run(measure("localhost", port, count, rounds, 200, prefix=f"p{index}-"))
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Connection capacity of the multi-process server per worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, max(1, cores // 2), cores}))
+    parser.add_argument("--clients", type=int, default=4000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--load-procs", type=int, default=cores, help="processes generating client load")
+    parser.add_argument("--room-size", type=int, default=4)
+    parser.add_argument("--port", type=int, default=13000)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'conn/s':>10} {'round latency'}")
+    for workers in args.workers:
+        port = args.port + workers
+        cluster = start_cluster(port, workers, args.room_size)
+        time.sleep(1.0)
+        per_proc = args.clients // args.load_procs
+        try:
+            with multiprocessing.get_context("fork").Pool(args.load_procs) as pool:
+                results = pool.map(load, [(port, i, per_proc, args.rounds) for i in range(args.load_procs)])
+        finally:
+            cluster.terminate()
+            cluster.join()
+        connect_time = max(elapsed for elapsed, _ in results)
+        # 同一回合各 process 看到的完成時間取最慢的
+        latencies = [max(round_times) for round_times in zip(*(latencies for _, latencies in results))]
+        rate = per_proc * args.load_procs / connect_time
+        print(f"{workers:>7} {rate:>10.0f} {summarize(latencies) if latencies else '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import random
+import time
+from array import array
+from typing import List, Tuple
+from network import broadcast
+from network.hub import GameHub
+from network.log import quiet
+from network.protocol import MessageType, encode_board
+from network.replay import ReplayConnection
+from network.room import RoomRegistry
+
+
+# 每個成員一個隨機棋盤(不重複的數字)，跟 bot 一樣從 1~max_number 挑
+def random_values(rng: random.Random, grid_num: int, max_number: int) -> array:
+    return array("I", rng.sample(range(1, max_number + 1), grid_num * grid_num))
+
+
+# 一個房間 room_size 人玩 rounds 回合：每回合大家都 ROUND_END，最後一個人讓回合完成並觸發下一次抽號
+# boards 為 False 時沒人登記棋盤、server 不抽號，兩者相減就是抽號、廣播與棋盤副本的成本
+def run(room_size: int, rounds: int, grid_num: int, boards: bool, seed: int) -> Tuple[float, int, int]:
+    rng = random.Random(seed)
+    hub = GameHub(RoomRegistry(room_size))
+    players: List[ReplayConnection] = [ReplayConnection(f"player{index}") for index in range(room_size)]
+    with quiet():
+        for player in players:
+            hub.handle_message(player, MessageType.LOGIN, player.peer.encode())
+        if boards:
+            for player in players:
+                hub.handle_message(player, MessageType.BOARD,
+                                   encode_board(random_values(rng, grid_num, max(99, 4 * grid_num * grid_num))))
+        sent = sum(player.sent_bytes for player in players)
+        fanouts = broadcast.stats.fanouts
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for player in players:
+                hub.handle_message(player, MessageType.ROUND_END, b"")
+        seconds = time.perf_counter() - start
+    return (seconds / rounds, (sum(player.sent_bytes for player in players) - sent) // (rounds * room_size),
+            (broadcast.stats.fanouts - fanouts) // rounds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cost of server-side draws per room round")
+    parser.add_argument("--room-sizes", type=int, nargs="*", default=[4, 16, 64])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--grid-num", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'members':>8} {'no draws':>12} {'with draws':>12} {'per member':>11} {'bytes/member':>13} {'fan-outs':>9}")
+    for room_size in args.room_sizes:
+        base, base_bytes, base_fanouts = run(room_size, args.rounds, args.grid_num, False, args.seed)
+        drawn, drawn_bytes, drawn_fanouts = run(room_size, args.rounds, args.grid_num, True, args.seed)
+        extra = (drawn - base) / room_size
+        print(f"{room_size:>8} {base * 1e3:>10.3f}ms {drawn * 1e3:>10.3f}ms {extra * 1e6:>9.2f}us "
+              f"{base_bytes:>5} -> {drawn_bytes:<5} {base_fanouts:>3} -> {drawn_fanouts:<3}")
+    # ROUND_END 的人數每人一次 fan-out，抽號只多一次：DRAW 編碼一次，每人多收 13 bytes
+    print("draws add one fan-out per round: a single DRAW frame encoded once and written to every member")
+
+
+if __name__ == "__main__":
+    main()
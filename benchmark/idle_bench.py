@@ -0,0 +1,91 @@
+import argparse
+import os
+import threading
+import time
+from typing import Callable, List
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from game.large_board import create_game
+from ui.game_ui import GameUI
+from ui.network_events import PLAYER_COUNT
+
+FPS: int = 30  # 改版前主迴圈的 clock.tick(30)
+
+
+# 模擬 server 每隔 interval 秒推一次玩家數，最後送 QUIT
+def feed(seconds: float, interval: float) -> None:
+    deadline = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < deadline:
+        time.sleep(interval)
+        count += 1
+        pygame.event.post(pygame.event.Event(PLAYER_COUNT, count=count % 4 + 1, sent=time.perf_counter()))
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+
+# 改版前的主迴圈：clock.tick(FPS) 之後把 queue 裡的事件拿出來，沒有事件也照樣重畫
+def polling_wait(clock: pygame.time.Clock) -> Callable[[], pygame.event.Event]:
+    def wait() -> pygame.event.Event:
+        clock.tick(FPS)
+        return pygame.event.poll()  # queue 是空的時候回傳 NOEVENT
+
+    return wait
+
+
+# poll 為 True 時照改版前的方式每秒固定醒來 FPS 次，repaint 再加上每個 frame 整個重畫
+def run(name: str, seconds: float, interval: float, poll: bool, repaint: bool) -> None:
+    ui = GameUI(None, create_game(4))
+    wait = pygame.event.wait
+    if poll:
+        pygame.event.wait = polling_wait(pygame.time.Clock())
+    frames = 0
+    latencies: List[float] = []
+    render, handle = ui.render, ui.handle_network_event
+
+    def counted_render() -> None:
+        nonlocal frames
+        frames += 1
+        ui.full_redraw = repaint
+        render()
+
+    def timed_handle(event: pygame.event.Event) -> None:
+        latencies.append(time.perf_counter() - event.sent)
+        handle(event)
+
+    ui.render, ui.handle_network_event = counted_render, timed_handle
+    feeder = threading.Thread(target=feed, args=(seconds, interval))
+    wall, cpu = time.perf_counter(), time.process_time()
+    feeder.start()
+    try:
+        ui.start()
+    except SystemExit:
+        pass
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    pygame.event.wait = wait
+    feeder.join()
+    pygame.quit()
+    latencies.sort()
+    print(f"{name:>22} {frames / wall:>8.1f} {cpu / wall:>6.1%} "
+          f"{sum(latencies) / len(latencies) * 1e3:>10.2f}ms {latencies[-1] * 1e3:>10.2f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Idle CPU and network event latency of the GameUI main loop")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between two server updates")
+    args = parser.parse_args()
+
+    # dummy driver 沒辦法真的睡，SDL 在 event.wait 裡每 1ms 輪詢一次；CPU 要在有螢幕的機器上看才準
+    pygame.display.init()
+    print(f"SDL video driver: {pygame.display.get_driver()}")
+    print(f"{'loop':>22} {'frames/s':>8} {'CPU':>6} {'avg latency':>12} {'max latency':>12}")
+    run("30 fps, full repaint", args.seconds, args.interval, True, True)
+    run("30 fps, dirty rects", args.seconds, args.interval, True, False)
+    run("event.wait", args.seconds, args.interval, False, False)
+
+
+if __name__ == "__main__":
+    main()
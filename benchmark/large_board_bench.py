@@ -0,0 +1,88 @@
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+from game.large_board import LargeBoardLogic, default_max_number
+from game.logic import GameLogic
+
+
+# 合法的棋盤：對角線放質數，其他格放剩下的數字，格子順序是 (x, y) = (col, row)
+def board_values(grid_num: int, max_number: int, rng: random.Random) -> List[Tuple[int, int, str]]:
+    sieve = GameLogic(grid_num, 1, max_number).is_prime
+    primes = [number for number in range(1, max_number + 1) if sieve(number)]
+    diagonal_cells = 2 * grid_num - grid_num % 2
+    diagonal = rng.sample(primes, diagonal_cells)
+    used = set(diagonal)
+    rest = rng.sample([number for number in range(1, max_number + 1) if number not in used],
+                      grid_num * grid_num - diagonal_cells)
+    cells = []
+    for row in range(grid_num):
+        for col in range(grid_num):
+            value = diagonal.pop() if row == col or row == grid_num - 1 - col else rest.pop()
+            cells.append((col, row, str(value)))
+    return cells
+
+
+def build(make: Callable[[], GameLogic], cells: List[Tuple[int, int, str]]) -> GameLogic:
+    game = make()
+    for x, y, value in cells:
+        game.update_player_input(x, y, value)
+    return game
+
+
+# 建好整個棋盤後還留著的記憶體
+def memory(make: Callable[[], GameLogic], cells: List[Tuple[int, int, str]]) -> int:
+    tracemalloc.start()
+    game = build(make, cells)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del game
+    return size
+
+
+# 跟 GameUI 一樣：確認棋盤、開始抽號，每回合標記抽到的數字並判斷勝負，直到連線
+def play(game: GameLogic, seed: int) -> Tuple[float, float, int]:
+    start = time.perf_counter()
+    assert not game.validate_board()
+    game.start_draws()
+    confirm = time.perf_counter() - start
+    game.reseed(seed)
+    start = time.perf_counter()
+    while True:
+        game.mark_drawn(game.get_random_num_in_used_nums())
+        game.rounds += 1
+        if game.check_game_finish():
+            break
+    return confirm, time.perf_counter() - start, game.rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="GameLogic vs LargeBoardLogic on large boards")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 32, 64, 100])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'size':>5} {'impl':>6} {'memory':>10} {'fill':>9} {'confirm':>9} {'draws':>9} {'per draw':>10} {'rounds':>7}")
+    for grid_num in args.sizes:
+        max_number = default_max_number(grid_num)
+        cells = board_values(grid_num, max_number, random.Random(args.seed))
+        rounds_limit = grid_num * grid_num
+        impls = [("list", lambda: GameLogic(grid_num, 1, max_number, rounds_limit)),
+                 ("array", lambda: LargeBoardLogic(grid_num, 1, max_number, rounds_limit))]
+        results = []
+        for name, make in impls:
+            size = memory(make, cells)
+            start = time.perf_counter()
+            game = build(make, cells)
+            fill = time.perf_counter() - start
+            confirm, draws, rounds = play(game, args.seed)
+            results.append(rounds)
+            print(f"{grid_num:>5} {name:>6} {size / 1024:>8.0f}KB {fill * 1e3:>7.1f}ms {confirm * 1e3:>7.1f}ms "
+                  f"{draws * 1e3:>7.1f}ms {draws / rounds * 1e6:>8.2f}us {rounds:>7}")
+        # 同樣的種子抽號順序一樣，兩種實作要在同一回合連線
+        assert results[0] == results[1], results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Tuple
+from network.protocol import FrameDecoder, MessageType, encode
+
+
+# 壓測用的假玩家：login 後每回合送 round_end，等 server 宣布所有人完成
+class LoadClient:
+    def __init__(self, name: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.name: str = name
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+        self.decoder: FrameDecoder = FrameDecoder()
+
+    async def wait_for(self, msg_type: MessageType) -> None:
+        while True:
+            data = await self.reader.read(65536)
+            if not data:
+                raise ConnectionError("server closed the connection")
+            if any(frame_type == msg_type for frame_type, _ in self.decoder.feed(data)):
+                return
+
+    async def play_round(self) -> None:
+        self.writer.write(encode(MessageType.ROUND_END))
+        await self.writer.drain()
+        await self.wait_for(MessageType.ROUND_COMPLETE)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+async def connect_all(host: str, port: int, count: int, concurrency: int,
+                      prefix: str = "bot") -> Tuple[List[LoadClient], float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def connect(index: int) -> LoadClient:
+        async with semaphore:
+            reader, writer = await asyncio.open_connection(host, port)
+            name = f"{prefix}{index}"
+            writer.write(encode(MessageType.LOGIN, name.encode()))
+            await writer.drain()
+            return LoadClient(name, reader, writer)
+
+    start = time.perf_counter()
+    clients = await asyncio.gather(*(connect(i) for i in range(count)))
+    return list(clients), time.perf_counter() - start
+
+
+# 回傳 (建立所有連線花的秒數, 每回合完成延遲)
+async def measure(host: str, port: int, count: int, rounds: int, concurrency: int,
+                  prefix: str = "bot") -> Tuple[float, List[float]]:
+    clients, elapsed = await connect_all(host, port, count, concurrency, prefix)
+    # 讓 login / player_count 廣播先送完，避免算進第一回合
+    await asyncio.sleep(0.5)
+
+    latencies: List[float] = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await asyncio.gather(*(client.play_round() for client in clients))
+        latencies.append(time.perf_counter() - start)
+    for client in clients:
+        client.close()
+    return elapsed, latencies
+
+
+def summarize(latencies: List[float]) -> str:
+    ms = sorted(latency * 1000 for latency in latencies)
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    return f"mean {statistics.mean(ms):.2f}ms, p50 {statistics.median(ms):.2f}ms, p99 {p99:.2f}ms"
+
+
+async def run(host: str, port: int, count: int, rounds: int, concurrency: int) -> None:
+    elapsed, latencies = await measure(host, port, count, rounds, concurrency)
+    print(f"connected {count} clients in {elapsed:.3f}s ({count / elapsed:.0f} conn/s)")
+    if latencies:
+        print(f"round completion latency over {rounds} rounds: {summarize(latencies)}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load generator for the bingo game server")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=12345)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=200, help="parallel connection attempts")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    asyncio.run(run(args.host, args.port, args.clients, args.rounds, args.concurrency))
@@ -0,0 +1,87 @@
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Callable, List
+from db.backends import create_backend
+from db.database import UserSystem
+
+
+# 很多 thread 同時登入，回傳每次登入的延遲(秒)
+def storm(threads: int, users: int, login: Callable[[int], bool]) -> List[float]:
+    latencies: List[List[float]] = [[] for _ in range(threads)]
+    failures: List[int] = []
+    start_gate = threading.Barrier(threads)
+
+    def worker(shard: int) -> None:
+        start_gate.wait()
+        for user in range(shard, users, threads):
+            start = time.perf_counter()
+            if not login(user):
+                failures.append(user)
+            latencies[shard].append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    assert not failures, f"{len(failures)} logins failed"
+    return [latency for shard in latencies for latency in shard]
+
+
+def report(label: str, latencies: List[float], elapsed: float) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"  {label:<22} {len(latencies) / elapsed:>9,.0f} logins/s  p50 {quantiles[49] * 1000:7.3f}ms  "
+          f"p99 {quantiles[98] * 1000:7.3f}ms")
+
+
+def run_phase(label: str, threads: int, users: int, login: Callable[[int], bool]) -> None:
+    start = time.perf_counter()
+    latencies = storm(threads, users, login)
+    report(label, latencies, time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Login storm: cold logins, reconnects with and without the cache")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--storage", default="sqlite:///<tmp>",
+                        help="storage url, e.g. mongodb://localhost:27017 for a running mongod")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.storage.replace("<tmp>", os.path.join(directory, "login.db"))
+        setup = UserSystem(create_backend(url))
+        for user in range(args.users):
+            setup.register(f"storm{user}", f"pw{user}")
+        setup.close()
+        print(f"{url}: {args.users} users, {args.threads} threads")
+
+        # 不快取：每次登入都查資料庫
+        uncached = UserSystem(create_backend(url), session_capacity=0)
+        run_phase("no cache", args.threads, args.users,
+                  lambda user: uncached.login(f"storm{user}", f"pw{user}"))
+        uncached.close()
+
+        user_system = UserSystem(create_backend(url))
+        tokens: List[str] = [""] * args.users
+
+        def first_login(user: int) -> bool:
+            token = user_system.login_token(f"storm{user}", f"pw{user}")
+            tokens[user] = token or ""
+            return token is not None
+
+        run_phase("cold (fills cache)", args.threads, args.users, first_login)
+        run_phase("reconnect password", args.threads, args.users,
+                  lambda user: user_system.login(f"storm{user}", f"pw{user}"))
+        run_phase("reconnect token", args.threads, args.users,
+                  lambda user: user_system.login_with_token(tokens[user]) == f"storm{user}")
+        print(f"  session cache: {user_system.sessions.hits} hits, {user_system.sessions.misses} misses")
+        user_system.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import os
+import time
+from typing import Callable, List
+from network import log, metrics
+from network.hub import GameHub
+from network.protocol import MessageType, encode
+from network.replay import ReplayConnection
+from network.room import RoomRegistry
+
+
+def per_call(fn: Callable[[], None], count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - start) / count
+
+
+# 每個指標或 log 呼叫單獨的成本
+def primitives(count: int, sink) -> None:
+    counter = metrics.Counter("bench_total", "", "type")
+    histogram = metrics.Histogram("bench_seconds", "")
+    frame = encode(MessageType.ROUND_END, b"\0\0\0\1")
+    log.setup("info", log.SAMPLE_EVERY, sink)
+    rows = [
+        ("Counter.inc", lambda: counter.inc(1, "ROUND_END")),
+        ("Histogram.observe", lambda: histogram.observe(0.000123)),
+        ("count_sent", lambda: metrics.count_sent(frame)),
+        (f"log.sample 1/{log.SAMPLE_EVERY}", lambda: log.sample("bench", type="ROUND_END", peer="127.0.0.1:1")),
+        ("log.event", lambda: log.event("bench", type="ROUND_END", peer="127.0.0.1:1")),
+        ("print", lambda: print(f"Received message: ROUND_END {frame!r} from 127.0.0.1:1", file=sink)),
+    ]
+    print(f"{'call':>22} {'ns/call':>9}")
+    for name, fn in rows:
+        print(f"{name:>22} {per_call(fn, count) * 1e9:>9.0f}")
+    log.stop()
+
+
+# 整個 hub 的 ROUND_END 處理：原本每則訊息 print 一次 vs 現在的取樣 log；包含把 log queue 寫完的時間
+def hub_round(room_size: int, rounds: int, mode: str, sink) -> float:
+    hub = GameHub(RoomRegistry(room_size))
+    players: List[ReplayConnection] = [ReplayConnection(f"player{index}") for index in range(room_size)]
+    handle = hub.handle_message
+    if mode == "print":
+        def handle(client, msg_type, payload):
+            print(f"Received message: {msg_type.name} {payload!r} from {client.peer}", file=sink)
+            hub.handle_message(client, msg_type, payload)
+    log.setup("warning" if mode == "off" else "info", 1 if mode == "every" else log.SAMPLE_EVERY, sink)
+    for player in players:
+        hub.handle_message(player, MessageType.LOGIN, player.peer.encode())
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for player in players:
+            handle(player, MessageType.ROUND_END, b"")
+    log.stop()
+    return (time.perf_counter() - start) / (rounds * room_size)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Overhead of server metrics and sampled logging")
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--room-size", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as sink:
+        primitives(args.calls, sink)
+        print()
+        print(f"{'hub ROUND_END':>22} {'us/msg':>9}")
+        modes = [("print", "print every message"), ("every", "log every message"),
+                 ("sampled", f"log 1/{log.SAMPLE_EVERY}"), ("off", "log level warning")]
+        for mode, label in modes:
+            print(f"{label:>22} {hub_round(args.room_size, args.rounds, mode, sink) * 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import os
+import time
+from typing import List, Optional
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from game.large_board import create_game
+from ui.game_ui import GameUI
+
+
+def summarize(samples: List[float]) -> str:
+    samples = sorted(samples)
+    return (f"avg {sum(samples) / len(samples) * 1e3:.3f}ms p99 {samples[int(len(samples) * 0.99)] * 1e3:.3f}ms "
+            f"max {samples[-1] * 1e3:.3f}ms")
+
+
+# 從呼叫到通知畫上畫面(一個 frame)要多久；關掉後底下重畫的時間另外算
+def overlay_latency(count: int) -> List[List[float]]:
+    ui = GameUI(None, create_game(4))
+    ui.render()
+    shown, cleared = [], []
+    for index in range(count):
+        start = time.perf_counter()
+        ui.overlay.push("Hints", f"Please confirm your input. #{index}")
+        ui.render()
+        shown.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        ui.overlay.close()
+        ui.render()
+        cleared.append(time.perf_counter() - start)
+    pygame.quit()
+    return [shown, cleared]
+
+
+# 舊的做法每次都建一個新的 Tk interpreter；對話框本身要等玩家按 OK，這裡只量建立與關閉的成本
+def tk_latency(count: int) -> Optional[List[float]]:
+    try:
+        import tkinter as tk
+        samples = []
+        for _ in range(count):
+            start = time.perf_counter()
+            root = tk.Tk()
+            root.withdraw()
+            root.update()
+            root.destroy()
+            samples.append(time.perf_counter() - start)
+        return samples
+    except Exception as e:  # 沒裝 tkinter 或沒有螢幕(TclError)
+        print(f"Tk message box: skipped ({type(e).__name__}: {e})")
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time to show a notification: pygame overlay vs a new Tk root per call")
+    parser.add_argument("--count", type=int, default=200)
+    args = parser.parse_args()
+
+    shown, cleared = overlay_latency(args.count)
+    print(f"overlay shown:   {summarize(shown)}, main loop keeps running while it is visible")
+    print(f"overlay cleared: {summarize(cleared)}")
+    tk = tk_latency(min(args.count, 50))
+    if tk:
+        ratio = (sum(tk) / len(tk)) / (sum(shown) / len(shown))
+        print(f"Tk root setup:   {summarize(tk)} ({ratio:.0f}x the overlay), "
+              f"then the main loop is blocked until the dialog is closed")
+
+
+if __name__ == "__main__":
+    main()
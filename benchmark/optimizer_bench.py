@@ -0,0 +1,79 @@
+import argparse
+import os
+import random
+import time
+from typing import Dict, List
+from game.large_board import create_game
+from game.logic import GameLogic
+from game.optimizer import (CACHE_PATH, SYMMETRIES, LayoutScorer, game_config, is_valid_board, load_cache, optimize,
+                            random_board, save_best, suggest_board, transform)
+
+
+def parse_weights(items: List[str]) -> Dict[int, float]:
+    weights: Dict[int, float] = {}
+    for item in items:
+        number, weight = item.split("=")
+        weights[int(number)] = float(weight)
+    return weights
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Board optimizer: scaling across processes, saves the best layouts")
+    parser.add_argument("--grid-num", type=int, default=4)
+    parser.add_argument("--min-number", type=int, default=1)
+    parser.add_argument("--max-number", type=int, default=None, help="same default as main.py")
+    parser.add_argument("--rounds", type=int, default=None, help="same default as main.py")
+    parser.add_argument("--restarts", type=int, default=8, help="annealing runs, split across the workers")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="default: 1, 2, 4 ... up to all cores")
+    parser.add_argument("--draw-mode", choices=["board", "range"], default="board")
+    parser.add_argument("--weights", nargs="*", default=[], help="draw weights, e.g. 7=3 11=3 (default uniform)")
+    parser.add_argument("--cache", default=CACHE_PATH)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted({min(cores, 1 << i) for i in range(cores.bit_length() + 1)})
+    # 跟 main.py 用同樣的方式建遊戲，存進快取的 key 才是 Suggest 按鈕會查的那一個
+    game = create_game(args.grid_num, args.min_number, args.max_number, args.rounds)
+    config = game_config(game, parse_weights(args.weights), args.draw_mode)
+    baseline = LayoutScorer(config, args.samples * 4, 0)
+    rng = random.Random(0)
+    random_scores = [baseline.score(random_board(config, rng)) for _ in range(50)]
+    print(f"{config.key()}: random valid layouts win {sum(random_scores) / len(random_scores):.2%} "
+          f"(best of 50: {max(random_scores):.2%}), {cores} cores")
+
+    single = None
+    best = []
+    for count in workers:
+        start = time.perf_counter()
+        results = optimize(config, count, args.restarts, args.iterations, args.samples, seed=1)
+        elapsed = time.perf_counter() - start
+        single = single or elapsed
+        best = results
+        assert all(is_valid_board(board, config) for _, board in results)
+        print(f"  {count:>3} workers: {args.restarts} restarts x {args.iterations} steps in {elapsed:6.2f}s "
+              f"(speedup {single / elapsed:4.1f}x), best layout wins {results[0][0]:.2%}")
+
+    if not args.no_save:
+        save_best(config, best, args.cache)
+        print(f"saved {len(best)} layouts to {args.cache}")
+        if not config.weights and config.draw_mode == "board":
+            check_suggest(game, args.cache)
+
+
+# Suggest 按鈕用遊戲本身的設定查快取，要拿到剛存的棋盤(轉過或翻面)，不是隨機棋盤
+def check_suggest(game: GameLogic, path: str) -> None:
+    config = game_config(game)
+    cached = {tuple(transform(list(entry["board"]), config.grid_num, symmetry))
+              for entry in load_cache(path)[config.key()] for symmetry in SYMMETRIES}
+    for seed in range(20):
+        rows = suggest_board(config, path, random.Random(seed))
+        board = tuple(int(rows[cell // config.grid_num][cell % config.grid_num]) for cell in range(len(rows) ** 2))
+        assert board in cached, f"Suggest did not use the cached layouts for {config.key()}"
+    print(f"Suggest for {config.key()} uses the cached layouts")
+
+
+if __name__ == "__main__":
+    main()
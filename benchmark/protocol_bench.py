@@ -0,0 +1,90 @@
+import argparse
+import random
+import time
+from typing import Callable, List
+from network.protocol import FrameDecoder, MessageType, encode, encode_count
+
+
+# 模擬 server 送給 client 的訊息流
+def legacy_messages(count: int) -> List[bytes]:
+    messages = [b"player_count 12", b"round_end 7 \n", b"All complete, start next round \n", b"bot42 login"]
+    return [messages[i % len(messages)] for i in range(count)]
+
+
+def framed_messages(count: int) -> List[bytes]:
+    messages = [
+        encode_count(MessageType.PLAYER_COUNT, 12),
+        encode_count(MessageType.ROUND_END, 7),
+        encode(MessageType.ROUND_COMPLETE),
+        encode(MessageType.LOGIN, b"bot42"),
+    ]
+    return [messages[i % len(messages)] for i in range(count)]
+
+
+# 把連續的 bytes 切成 TCP 可能給的大小，模擬合併/拆開的封包
+def chunk_stream(stream: bytes, max_chunk: int, seed: int = 0) -> List[bytes]:
+    rng = random.Random(seed)
+    chunks: List[bytes] = []
+    offset = 0
+    while offset < len(stream):
+        size = rng.randint(1, max_chunk)
+        chunks.append(stream[offset:offset + size])
+        offset += size
+    return chunks
+
+
+# 舊版 GameUI.receive_messages 的判斷方式，合併的訊息會被誤判或解析失敗
+def parse_legacy(chunks: List[bytes]) -> int:
+    recognized = 0
+    for chunk in chunks:
+        message = chunk.decode(errors="replace")
+        try:
+            if message.startswith("player_count"):
+                _, count = message.split()
+                int(count)
+                recognized += 1
+            elif message.startswith("round_end"):
+                int(message.split()[1])
+                recognized += 1
+            elif message.startswith("All complete") or message.endswith("login"):
+                recognized += 1
+        except ValueError:
+            continue
+    return recognized
+
+
+def parse_framed(chunks: List[bytes]) -> int:
+    decoder = FrameDecoder()
+    recognized = 0
+    for chunk in chunks:
+        recognized += len(decoder.feed(chunk))
+    return recognized
+
+
+def measure(name: str, parse: Callable[[List[bytes]], int], chunks: List[bytes], total: int) -> None:
+    start = time.perf_counter()
+    recognized = parse(chunks)
+    elapsed = time.perf_counter() - start
+    size = sum(len(chunk) for chunk in chunks)
+    print(f"{name:<28} {total / elapsed:>12,.0f} msg/s {size / elapsed / 1e6:>8.1f} MB/s "
+          f"recognized {recognized}/{total}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Framed protocol vs legacy text messages")
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--max-chunk", type=int, default=4096, help="largest simulated recv() size")
+    args = parser.parse_args()
+
+    legacy = legacy_messages(args.messages)
+    framed = framed_messages(args.messages)
+
+    # 舊格式只有在一次 recv 剛好一則訊息時才正確，這是它的最佳情況
+    measure("legacy, one msg per recv", parse_legacy, legacy, args.messages)
+    measure("legacy, coalesced stream", parse_legacy, chunk_stream(b"".join(legacy), args.max_chunk), args.messages)
+    measure("framed, one msg per recv", parse_framed, framed, args.messages)
+    measure("framed, coalesced stream", parse_framed, chunk_stream(b"".join(framed), args.max_chunk), args.messages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import os
+import random
+import time
+from typing import List, Tuple
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from game.large_board import create_game
+from game.optimizer import BoardConfig, random_board
+from ui.game_ui import BLUE, GameUI
+
+
+# 模擬一局：分 16 次填滿棋盤(4x4 就是一格一格打)、Confirm、抽號到分出勝負，
+# 兩個動作之間隔幾個 frame，那些 frame 什麼都沒變
+def play_frames(ui: GameUI, frames_per_action: int, seed: int, full: bool) -> Tuple[int, float]:
+    game = ui.game
+    rng = random.Random(seed)
+    config = BoardConfig(game.grid_num, game.min_number, game.max_number, game.rounds_limit)
+    cells = list(enumerate(random_board(config, rng)))
+    per_input = max(1, len(cells) // 16)
+    actions: List[str] = ["input"] * -(-len(cells) // per_input) + ["confirm"] + ["draw"] * game.rounds_limit
+
+    frames = 0
+    start = time.process_time()
+    for action in actions:
+        if action == "input":
+            for cell, value in cells[-per_input:]:
+                x, y = divmod(cell, game.grid_num)
+                ui.set_input(y, x, str(value))
+            del cells[-per_input:]
+        elif action == "confirm":
+            game.start_draws()
+            ui.buttons["confirm"].set_color(BLUE)
+        elif not game.check_game_finish():
+            num = game.get_random_num_in_used_nums()
+            game.mark_drawn(num)
+            ui.grid.invalidate_cell(game.cell_index(num))
+            game.rounds += 1
+        for _ in range(frames_per_action):
+            # 改版前的畫法：每個 frame 清空畫面、每個字重新 render、flip 整個視窗
+            if full:
+                ui.full_redraw = True
+                for cache in [ui.grid.texts, ui.rounds_display.label.texts] + [button.texts for button in ui.buttons.values()]:
+                    cache.surfaces.clear()
+            ui.render()
+            frames += 1
+    return frames, time.process_time() - start
+
+
+def screen_bytes(ui: GameUI) -> bytes:
+    return pygame.image.tostring(ui.screen, "RGB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CPU time per frame: full repaint vs dirty rectangles")
+    parser.add_argument("--grid-num", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--frames-per-action", type=int, default=15, help="frames between two clicks (30 fps)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'board':>7} {'frames':>7} {'full ms/frame':>14} {'dirty ms/frame':>15} {'speedup':>8} {'text cache hit':>15}")
+    for grid_num in args.grid_num:
+        board_pixels = max(600, grid_num * 12)
+        results = []
+        for full in (True, False):
+            ui = GameUI(None, create_game(grid_num, seed=args.seed), board_pixels=board_pixels)
+            frames, seconds = play_frames(ui, args.frames_per_action, args.seed, full)
+            results.append((frames, seconds, ui))
+        (frames, full_seconds, full_ui), (_, dirty_seconds, dirty_ui) = results
+        # 只畫變動部分的結果要跟整個重畫一模一樣
+        drawn = screen_bytes(dirty_ui)
+        dirty_ui.full_redraw = True
+        dirty_ui.render()
+        if drawn != screen_bytes(dirty_ui) or drawn != screen_bytes(full_ui):
+            raise SystemExit(f"{grid_num}x{grid_num}: dirty rendering differs from a full repaint")
+        texts = dirty_ui.grid.texts
+        hit_rate = texts.hits / max(1, texts.hits + texts.misses)
+        print(f"{grid_num:>3}x{grid_num:<3} {frames:>7} {full_seconds / frames * 1e3:>14.3f} "
+              f"{dirty_seconds / frames * 1e3:>15.3f} {full_seconds / dirty_seconds:>7.1f}x {hit_rate:>14.0%}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
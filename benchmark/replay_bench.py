@@ -0,0 +1,123 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from array import array
+from typing import List
+from db.event_log import EventLog, read_events
+from game.large_board import create_game
+from game.logic import GameLogic
+from game.replay import GameRecorder
+from network.hub import GameHub
+from network.log import quiet
+from network.protocol import MessageType, encode_board
+from network.replay import ReplayConnection
+from network.room import RoomRegistry
+from replay import group_streams, replay_stream
+
+
+def fill_board(game: GameLogic, recorder: GameRecorder, rng: random.Random) -> None:
+    grid_num = game.grid_num
+    primes = [number for number in range(1, game.max_number + 1) if game.is_prime(number)]
+    diagonal = rng.sample(primes, 2 * grid_num - grid_num % 2)
+    used = set(diagonal)
+    rest = rng.sample([number for number in range(1, game.max_number + 1) if number not in used],
+                      grid_num * grid_num - len(diagonal))
+    for y in range(grid_num):
+        for x in range(grid_num):
+            value = str(diagonal.pop() if x == y or x == grid_num - 1 - y else rest.pop())
+            game.update_player_input(x, y, value)
+            recorder.input(x, y, value)
+
+
+# 跟 GameUI 一樣的流程：填棋盤、Confirm、抽到分出勝負，再 reset 開下一局
+def record_games(log: EventLog, games: int, grid_num: int, seed: int) -> None:
+    rng = random.Random(seed)
+    game = create_game(grid_num, seed=seed)
+    recorder = GameRecorder(log)
+    for _ in range(games):
+        recorder.start(game)
+        fill_board(game, recorder, rng)
+        game.start_draws()
+        recorder.confirm()
+        while True:
+            num = game.get_random_num_in_used_nums()
+            recorder.draw(game.cell_index(num), num)
+            game.mark_drawn(num)
+            game.rounds += 1
+            outcome = game.check_game_finish()
+            if outcome:
+                recorder.result(outcome, game.rounds)
+                break
+        game.reset()
+
+
+# 每個房間 room_size 個玩家各送一張棋盤，大家每回合 ROUND_END，直到有人的棋盤副本連線；
+# 連線的人回報 WIN，其他人 LOSE
+def record_rooms(log: EventLog, rooms: int, room_size: int, grid_num: int, seed: int) -> None:
+    rng = random.Random(seed)
+    hub = GameHub(RoomRegistry(room_size), log)
+    numbers = list(range(1, grid_num * grid_num + 1))
+    for room_index in range(rooms):
+        players: List[ReplayConnection] = [ReplayConnection(f"('10.0.0.1', {room_index * room_size + index})")
+                                           for index in range(room_size)]
+        for player in players:
+            hub.handle_message(player, MessageType.LOGIN, player.peer.encode())
+        for player in players:
+            hub.handle_message(player, MessageType.BOARD, encode_board(array("I", rng.sample(numbers, len(numbers)))))
+        room = hub.rooms.get(players[0])
+        boards = [room.draws.boards[hub.session_of[player]] for player in players]
+        while not any(board.won for board in boards):
+            for player in players:
+                hub.handle_message(player, MessageType.ROUND_END, b"")
+        for player, board in zip(players, boards):
+            hub.handle_message(player, MessageType.WIN if board.won else MessageType.LOSE, b"")
+            hub.disconnect(player)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="event log write speed and replay speed")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--grid-num", type=int, default=4)
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--room-size", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "events.log")
+        log = EventLog(path)
+        start = time.perf_counter()
+        record_games(log, args.games, args.grid_num, args.seed)
+        games_seconds = time.perf_counter() - start
+        # hub 的 log 不要混進結果
+        with quiet():
+            start = time.perf_counter()
+            record_rooms(log, args.rooms, args.room_size, args.grid_num, args.seed)
+            rooms_seconds = time.perf_counter() - start
+        log.close()
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        events = read_events(path)
+        streams = group_streams(events)
+        read_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        replays = [replay_stream(stream_events) for stream_events in streams.values()]
+        replay_seconds = time.perf_counter() - start
+
+    mismatches = sum(len(replay.mismatches) for replay in replays)
+    print(f"recorded {args.games} games in {games_seconds * 1e3:.0f}ms and {args.rooms} rooms in "
+          f"{rooms_seconds * 1e3:.0f}ms: {len(events)} events, {size / 1024:.0f}KB "
+          f"({size / len(events):.1f} bytes/event)")
+    print(f"read back in {read_seconds * 1e3:.0f}ms ({len(events) / read_seconds:,.0f} events/s)")
+    print(f"replayed {len(replays)} streams in {replay_seconds * 1e3:.0f}ms "
+          f"({len(events) / replay_seconds:,.0f} events/s, {len(replays) / replay_seconds:,.0f} streams/s), "
+          f"{mismatches} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
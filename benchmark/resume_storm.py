@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import random
+import time
+from typing import List, Tuple
+from benchmark.bot_load import start_server, wait_for_port
+from game.large_board import create_game
+from network.bot import BotClient, BotStats
+
+
+class StormResult:
+    def __init__(self, mode: str):
+        self.mode: str = mode
+        self.bots: int = 0
+        self.seconds: float = 0.0  # 所有 bot 都重新連上花的時間
+        self.latencies: List[float] = []
+        self.sent_bytes: int = 0
+        self.received_bytes: int = 0
+        self.messages: int = 0
+        self.seats_kept: int = 0  # 回到原本的房間
+        self.games_kept: int = 0  # 手上這一局還能繼續玩
+        self.rounds_after: int = 0  # 重連後再玩的回合都順利完成
+        self.errors: int = 0
+
+
+# count 個 bot 先玩 rounds 回合，然後所有連線同時斷掉(模擬網路閃斷)再一起重連
+# resume 用 token 接回座位，rejoin 照舊重新 login；重連後再玩 rounds 回合確認房間還能正常運作
+async def storm(mode: str, host: str, port: int, count: int, rounds: int, concurrency: int, seed: int) -> StormResult:
+    stats = BotStats()
+    rng = random.Random(seed)
+    bots = [BotClient(f"{mode}{index}", create_game(4, seed=rng.randrange(1 << 32)), stats,
+                      random.Random(rng.randrange(1 << 32))) for index in range(count)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def connect(bot: BotClient) -> None:
+        async with semaphore:
+            await bot.connect(host, port)
+
+    await asyncio.gather(*(connect(bot) for bot in bots))
+    await asyncio.gather(*(bot.play(rounds) for bot in bots))
+    before: List[Tuple[int, int]] = [(bot.room_id, bot.game.rounds) for bot in bots]
+    for bot in bots:
+        bot.close()
+    sent, received, messages = stats.sent_bytes, stats.received_bytes, stats.sent + stats.received
+
+    result = StormResult(mode)
+    result.bots = count
+
+    async def reconnect(bot: BotClient) -> bool:
+        async with semaphore:
+            start = time.perf_counter()
+            kept = await bot.reconnect(host, port, resume=mode == "resume")
+            result.latencies.append(time.perf_counter() - start)
+            return kept
+
+    start = time.perf_counter()
+    kept = await asyncio.gather(*(reconnect(bot) for bot in bots))
+    result.seconds = time.perf_counter() - start
+    result.sent_bytes = stats.sent_bytes - sent
+    result.received_bytes = stats.received_bytes - received
+    result.messages = stats.sent + stats.received - messages
+    for bot, seat, (room_id, game_rounds) in zip(bots, kept, before):
+        result.seats_kept += seat and bot.room_id == room_id
+        result.games_kept += seat and bot.game.rounds == game_rounds
+
+    played = len(stats.round_latencies)
+    await asyncio.gather(*(bot.play(rounds) for bot in bots))
+    result.rounds_after = len(stats.round_latencies) - played
+    result.errors = stats.errors
+    for bot in bots:
+        bot.close()
+    return result
+
+
+def report(result: StormResult) -> None:
+    latencies = sorted(result.latencies)
+    print(f"{result.mode:>7} {result.seconds * 1e3:>9.0f}ms {latencies[len(latencies) // 2] * 1e3:>8.2f}ms "
+          f"{latencies[-1] * 1e3:>8.2f}ms {result.sent_bytes / result.bots:>8.1f}B "
+          f"{result.received_bytes / result.bots:>8.1f}B {result.messages / result.bots:>6.1f} "
+          f"{result.seats_kept:>6}/{result.bots} {result.games_kept:>6}/{result.bots} {result.rounds_after:>7} "
+          f"{result.errors:>6}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconnect storm: resume with a session token vs a full re-login")
+    parser.add_argument("--bots", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3, help="rounds played before and after the drop")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=13200)
+    parser.add_argument("--spawn", choices=["thread", "async", "none"], default="async",
+                        help="start server.py with this engine, or use a running server")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn != "none":
+        server = start_server(args.spawn, args.port, 4, None)
+        wait_for_port(args.port)
+    try:
+        print(f"{'mode':>7} {'storm':>11} {'p50':>10} {'max':>10} {'sent/bot':>9} {'recv/bot':>9} {'msg/bot':>6} "
+              f"{'seats':>11} {'games':>11} {'rounds':>7} {'errors':>6}")
+        results = [asyncio.run(storm(mode, args.host, args.port, args.bots, args.rounds, args.concurrency, args.seed))
+                   for mode in ("rejoin", "resume")]
+        for result in results:
+            report(result)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    if any(result.errors for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+from typing import List, Tuple
+from game.simulator import DRAW_MODES, ROUNDS_LIMIT, BatchSimulator
+
+
+def parse_range(text: str) -> Tuple[int, int]:
+    low, high = text.split("-")
+    return int(low), int(high)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch bingo simulator: win rates by round, board size and range")
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 4, 5])
+    parser.add_argument("--ranges", type=parse_range, nargs="+", default=[(1, 99)], help="e.g. 1-99 1-50")
+    parser.add_argument("--modes", nargs="+", choices=DRAW_MODES, default=list(DRAW_MODES))
+    parser.add_argument("--limits", type=int, nargs="+", default=[6, 8, 10], help="round limits to report")
+    parser.add_argument("--check", type=int, default=2000, help="games replayed through GameLogic per setting")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        ranges: List[Tuple[int, int]] = [(1, 99)] if mode == "board" else args.ranges
+        for grid_num in args.sizes:
+            for min_number, max_number in ranges:
+                try:
+                    simulator = BatchSimulator(grid_num, min_number, max_number, mode, args.seed)
+                except ValueError as e:
+                    print(f"{grid_num}x{grid_num} {min_number}-{max_number} {mode}: skipped, {e}")
+                    continue
+                result = simulator.run(args.games)
+                limits = "  ".join(f"win@{limit} {result.win_rate(limit):6.2%}" for limit in args.limits)
+                print(f"{result.label():<22} {limits}  ({result.games_per_minute() / 1e6:,.1f}M games/min)")
+                rounds = " ".join(f"{p:.3f}" for p in result.by_round(ROUNDS_LIMIT))
+                print(f"{'':<22} P(finish at round 1..{ROUNDS_LIMIT}): {rounds}")
+                if args.check:
+                    mismatches = simulator.cross_check(args.check)
+                    status = "ok" if not mismatches else f"{mismatches} MISMATCHES"
+                    print(f"{'':<22} GameLogic cross-check on {args.check} games: {status}")
+
+
+if __name__ == "__main__":
+    main()
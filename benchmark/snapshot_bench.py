@@ -0,0 +1,130 @@
+import argparse
+import json
+import random
+import time
+from typing import Any, Callable, Dict, Tuple
+from db.backends import SQLiteBackend
+from db.database import UserSystem
+from game.large_board import create_game
+from game.logic import GameLogic
+from game.snapshot import encode_delta, encode_snapshot, needs_compaction, restore_state
+
+
+# 合法的棋盤，按下 Confirm 之後的狀態
+def confirmed_game(grid_num: int, seed: int) -> GameLogic:
+    game = create_game(grid_num, rounds_limit=grid_num * grid_num, seed=seed)
+    rng = random.Random(seed)
+    primes = [number for number in range(1, game.max_number + 1) if game.is_prime(number)]
+    diagonal = rng.sample(primes, 2 * grid_num - grid_num % 2)
+    used = set(diagonal)
+    rest = rng.sample([number for number in range(1, game.max_number + 1) if number not in used],
+                      grid_num * grid_num - len(diagonal))
+    for y in range(grid_num):
+        for x in range(grid_num):
+            game.update_player_input(x, y, str(diagonal.pop() if x == y or x == grid_num - 1 - y else rest.pop()))
+    game.start_draws()
+    return game
+
+
+# 改版前的存檔：整個 __dict__ 把 key 轉成字串後存成 JSON，讀取時用 eval 轉回 tuple
+def legacy_state(game: GameLogic) -> Dict[str, Any]:
+    return {"grid": [list(row) for row in game.grid], "selected": [list(row) for row in game.selected],
+            "used_nums": [str(value) for value in game.used_nums], "player_inputs": dict(game.player_inputs),
+            "rounds": game.rounds, "grid_num": game.grid_num, "value_cells": dict(getattr(game, "value_cells", {}))}
+
+
+def legacy_save(state: Dict[str, Any]) -> bytes:
+    def convert_keys(obj: Any) -> Any:
+        if isinstance(obj, dict):
+            return {str(k): convert_keys(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [convert_keys(elem) for elem in obj]
+        return obj
+    return json.dumps(convert_keys(state)).encode()
+
+
+def legacy_load(data: bytes) -> Dict[str, Any]:
+    state = json.loads(data)
+    state["player_inputs"] = {eval(k): v for k, v in state["player_inputs"].items()}
+    return state
+
+
+def timed(fn: Callable[[], Any], repeat: int = 5) -> Tuple[float, Any]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# 玩 rounds 回合，每回合存一次：舊做法每回合重寫整份 JSON，新做法只附加 delta，累積夠多才重寫 snapshot
+def play_and_save(grid_num: int, rounds: int, seed: int) -> Tuple[int, int, float, float]:
+    legacy_bytes = snapshot_bytes = 0
+    legacy_seconds = snapshot_seconds = 0.0
+    game = confirmed_game(grid_num, seed)
+    user_system = UserSystem(SQLiteBackend(), write_behind=False)
+    user_system.register("bench", "bench")
+    start = time.perf_counter()
+    snapshot = encode_snapshot(game)
+    user_system.save_game_state("bench", snapshot)
+    snapshot_seconds += time.perf_counter() - start
+    snapshot_bytes += len(snapshot)
+    for _ in range(min(rounds, len(game.used_nums))):
+        num = game.get_random_num_in_used_nums()
+        game.mark_drawn(num)
+        game.rounds += 1
+
+        start = time.perf_counter()
+        data = legacy_save(legacy_state(game))
+        user_system.backend.update_user("bench", {"game_state": json.loads(data)})
+        legacy_seconds += time.perf_counter() - start
+        legacy_bytes += len(data)
+
+        start = time.perf_counter()
+        delta = encode_delta(game.rounds, game.cell_index(num))
+        # 資料庫只收到新的 delta，累積夠多時再加上重寫的 snapshot
+        written = len(delta)
+        if needs_compaction(user_system.append_game_delta("bench", delta)):
+            snapshot = encode_snapshot(game)
+            user_system.save_game_state("bench", snapshot)
+            written += len(snapshot)
+        snapshot_seconds += time.perf_counter() - start
+        snapshot_bytes += written
+    user_system.close()
+    return legacy_bytes, snapshot_bytes, legacy_seconds, snapshot_seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="dict+eval game-state saves vs binary snapshots with deltas")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 16, 64, 100])
+    parser.add_argument("--rounds", type=int, default=100, help="每局存幾回合")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'size':>5} {'json':>9} {'snapshot':>9} {'save json':>10} {'save snap':>10} "
+          f"{'load json':>10} {'load snap':>10}")
+    for grid_num in args.sizes:
+        game = confirmed_game(grid_num, args.seed)
+        for _ in range(grid_num):
+            game.mark_drawn(game.get_random_num_in_used_nums())
+            game.rounds += 1
+        save_json, data = timed(lambda: legacy_save(legacy_state(game)))
+        save_snap, snapshot = timed(lambda: encode_snapshot(game))
+        load_json, _ = timed(lambda: legacy_load(data))
+        restored = create_game(grid_num, game.min_number, game.max_number, game.rounds_limit)
+        load_snap, _ = timed(lambda: restore_state(restored, {"snapshot": snapshot, "deltas": b""}))
+        assert [list(row) for row in restored.selected] == [list(row) for row in game.selected]
+        print(f"{grid_num:>5} {len(data) / 1024:>7.1f}KB {len(snapshot) / 1024:>7.1f}KB "
+              f"{save_json * 1e3:>8.2f}ms {save_snap * 1e3:>8.2f}ms {load_json * 1e3:>8.2f}ms {load_snap * 1e3:>8.2f}ms")
+
+    print(f"\nsaving every round for {args.rounds} rounds (SQLite, write-behind off)")
+    print(f"{'size':>5} {'json bytes':>12} {'delta bytes':>12} {'ratio':>7} {'json time':>10} {'delta time':>11}")
+    for grid_num in args.sizes:
+        legacy_bytes, snapshot_bytes, legacy_seconds, snapshot_seconds = play_and_save(grid_num, args.rounds, args.seed)
+        print(f"{grid_num:>5} {legacy_bytes:>12} {snapshot_bytes:>12} {legacy_bytes / snapshot_bytes:>6.1f}x "
+              f"{legacy_seconds * 1e3:>8.1f}ms {snapshot_seconds * 1e3:>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
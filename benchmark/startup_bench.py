@@ -0,0 +1,85 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 這些要等選了模式、登入或開始玩才載入
+LAZY_MODULES: List[str] = ["pygame", "pymongo", "numpy", "asyncio", "ui.game_ui"]
+
+# 照 main.py 的流程跑到第一個視窗畫出來就結束；沒有螢幕時在建立 Tk 視窗那一步停下
+FIRST_WINDOW: str = """
+import sys, tkinter, ui.start_window
+def run(self):
+    self.window.update()
+    print("window", flush=True)
+    self.window.destroy()
+ui.start_window.StartWindow.run = run
+sys.argv = ["main.py"]
+import main
+try:
+    main.main()
+except tkinter.TclError:
+    print("nodisplay", flush=True)
+"""
+
+
+# -X importtime 的輸出：每個 module 自己與含子 module 的累計時間(微秒)
+def import_times(code: str) -> Dict[str, Tuple[int, int]]:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def first_window(runs: int) -> Tuple[float, str]:
+    samples = []
+    outcome = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", FIRST_WINDOW], cwd=ROOT, capture_output=True, text=True)
+        samples.append(time.perf_counter() - start)
+        outcome = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else result.stderr.strip()[-200:]
+    return sorted(samples)[len(samples) // 2], outcome
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Client startup: import time and time to the first window")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=300.0, help="time-to-first-window budget")
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    times = import_times("import main")
+    total = times["main"][1]
+    print(f"import main: {total / 1e3:.1f}ms for {len(times)} modules, heaviest:")
+    for name, (self_us, _) in sorted(times.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {self_us / 1e3:>7.1f}ms  {name}")
+    loaded = [name for name in LAZY_MODULES if name in times]
+    print(f"lazy modules loaded at startup: {', '.join(loaded) or 'none'}")
+    deferred = import_times("import ui.game_ui, db.database, asyncio")
+    print(f"deferred until needed: ui.game_ui {deferred['ui.game_ui'][1] / 1e3:.1f}ms, "
+          f"asyncio {deferred['asyncio'][1] / 1e3:.1f}ms")
+
+    seconds, outcome = first_window(args.runs)
+    if outcome == "window":
+        label = "time to first window"
+    elif outcome == "nodisplay":
+        label = "time to first window (no display, stopped at Tk())"
+    else:
+        raise SystemExit(f"startup failed: {outcome}")
+    ok = seconds * 1e3 <= args.target_ms
+    print(f"{label}: {seconds * 1e3:.0f}ms (median of {args.runs}, interpreter start included), "
+          f"target {args.target_ms:.0f}ms {'OK' if ok else 'MISSED'}")
+    if loaded or not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
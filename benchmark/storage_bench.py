@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+from db.backends import create_backend
+from db.database import AsyncUserSystem, UserSystem
+
+
+def bench_sync(user_system: UserSystem, users: int) -> None:
+    start = time.perf_counter()
+    for i in range(users):
+        user_system.register(f"user{i}", "secret")
+    register = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(users):
+        user_system.login(f"user{i}", "secret")
+    login = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(users):
+        user_system.update_leaderboard(f"user{i}", i % 13, i % 7)
+    update = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(100):
+        user_system.get_leaderboard()
+    leaderboard = time.perf_counter() - start
+    print(f"  sync   register {users / register:>9,.0f}/s  login {users / login:>9,.0f}/s  "
+          f"update {users / update:>9,.0f}/s  leaderboard {100 / leaderboard:>7,.0f}/s")
+
+
+# 每場遊戲結束都寫一次排行榜：逐筆寫入 vs 延遲批次寫入（含 close 時寫完剩下的）
+def bench_write_behind(url: str, users: int, updates: int) -> None:
+    for write_behind in (False, True):
+        user_system = UserSystem(create_backend(url), write_behind=write_behind)
+        start = time.perf_counter()
+        for i in range(updates):
+            user_system.update_leaderboard(f"player{i % users}", i, i // 2)
+        submitted = time.perf_counter() - start
+        user_system.close()
+        elapsed = time.perf_counter() - start
+        label = "write-behind" if write_behind else "per-call"
+        print(f"  {label:<12} {updates / elapsed:>9,.0f} writes/s durable "
+              f"(caller blocked {submitted * 1000:.0f}ms for {updates} updates)")
+        if write_behind:
+            print(f"  {user_system.write_behind.stats.summary()}")
+
+
+# 排行榜：每次都排序資料庫 vs 快取，另外量查名次
+def bench_leaderboard(user_system: UserSystem, reads: int) -> None:
+    user_system.flush()
+    start = time.perf_counter()
+    for _ in range(reads):
+        user_system.backend.top_users(10)
+    uncached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(reads):
+        user_system.get_leaderboard(10, (i % 5) * 10)
+    cached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(reads):
+        user_system.get_rank(f"user{i % 2000}")
+    rank = time.perf_counter() - start
+    print(f"  leaderboard  query {reads / uncached:>9,.0f}/s  cached {reads / cached:>9,.0f}/s  "
+          f"rank {reads / rank:>9,.0f}/s ({user_system.leaderboard.hits} hits, {user_system.leaderboard.misses} misses)")
+
+
+# 模擬 event loop 同時處理很多登入，另外量 loop 本身被卡住多久
+async def bench_async(user_system: UserSystem, users: int) -> None:
+    async_users = AsyncUserSystem(user_system)
+    stalls: List[float] = []
+
+    async def heartbeat() -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append(time.perf_counter() - start - 0.001)
+
+    ticker = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    await asyncio.gather(*(async_users.login(f"user{i}", "secret") for i in range(users)))
+    login = time.perf_counter() - start
+    ticker.cancel()
+    worst = max(stalls) * 1000 if stalls else 0.0
+    print(f"  async  login {users / login:>9,.0f}/s with {user_system.executor._max_workers} workers, "
+          f"worst event-loop stall {worst:.2f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="UserSystem throughput per storage backend")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=20000, help="leaderboard updates for the write-behind test")
+    parser.add_argument("--backends", nargs="+", default=["memory://", "sqlite://", "sqlite:///<tmp>"],
+                        help="storage urls, add mongodb://localhost:27017 to include a running mongod")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for url in args.backends:
+            url = url.replace("<tmp>", os.path.join(directory, "bench.db"))
+            print(url)
+            user_system = UserSystem(create_backend(url))
+            bench_sync(user_system, args.users)
+            asyncio.run(bench_async(user_system, args.users))
+            bench_leaderboard(user_system, 1000)
+            user_system.close()
+            bench_write_behind(url, args.users, args.updates)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import random
+import timeit
+from collections import Counter
+from typing import Callable, List
+from game.logic import GameLogic
+
+
+def filled_board(grid_num: int, seed: int) -> GameLogic:
+    game = GameLogic(grid_num, max_number=max(99, grid_num * grid_num * 4))
+    primes = [n for n in range(2, game.max_number + 1) if game.is_prime(n)]
+    rng = random.Random(seed)
+    diagonal_primes = rng.sample(primes, 2 * grid_num)
+    chosen = set(diagonal_primes)
+    numbers = rng.sample([n for n in range(1, game.max_number + 1) if n not in chosen], grid_num * grid_num)
+    for x in range(grid_num):
+        for y in range(grid_num):
+            value = diagonal_primes.pop() if x == y or x == grid_num - 1 - y else numbers.pop()
+            game.update_player_input(x, y, str(value))
+    game.used_nums = [value for row in game.grid for value in row]
+    return game
+
+
+# 改版前 handle_confirm 的做法：每格都重建 Counter，質數用試除法
+def legacy_validate(game: GameLogic) -> Callable[[], int]:
+    def run() -> int:
+        invalid = 0
+        for (i, j) in game.player_inputs:
+            value = game.grid[i][j]
+            if not value.isdigit() or Counter(game.used_nums)[value] > 1:
+                invalid += 1
+                continue
+            number = int(value)
+            on_diagonal = i == j or i == game.grid_num - 1 - j
+            if not game.min_number <= number <= game.max_number or (
+                    on_diagonal and (number < 2 or any(number % d == 0 for d in range(2, int(number ** 0.5) + 1)))):
+                invalid += 1
+        return invalid
+    return run
+
+
+# 改版前 handle_get_random_num 掃整個 grid 找抽到的數字
+def legacy_mark(game: GameLogic, values: List[str]) -> Callable[[], None]:
+    def run() -> None:
+        for num in values:
+            for i in range(game.grid_num):
+                for j in range(game.grid_num):
+                    if game.grid[i][j] == num:
+                        game.selected[i][j] = True
+                        break
+    return run
+
+
+def indexed_mark(game: GameLogic, values: List[str]) -> Callable[[], None]:
+    def run() -> None:
+        for num in values:
+            game.mark_drawn(num)
+    return run
+
+
+def best(fn: Callable[[], object], number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Board validation and draw marking: per-cell scans vs indexes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = parser.parse_args()
+
+    print(f"{'size':>5} {'validate (old)':>15} {'validate (new)':>15} {'speedup':>8} "
+          f"{'mark (old)':>11} {'mark (new)':>11} {'speedup':>8}")
+    for grid_num in args.sizes:
+        game = filled_board(grid_num, grid_num)
+        assert legacy_validate(game)() == len(game.validate_board()) == 0
+        number = max(1, 256 // grid_num ** 2)
+        old_validate = best(legacy_validate(game), number)
+        new_validate = best(game.validate_board, number)
+        values = random.Random(0).sample(game.used_nums, min(8, len(game.used_nums)))
+        old_mark = best(legacy_mark(game, values), number * 10) / len(values)
+        new_mark = best(indexed_mark(game, values), number * 10) / len(values)
+        print(f"{grid_num:>2}x{grid_num:<2} {old_validate * 1e3:>13.3f}ms {new_validate * 1e3:>13.3f}ms "
+              f"{old_validate / new_validate:>7.0f}x {old_mark * 1e6:>9.2f}us {new_mark * 1e6:>9.2f}us "
+              f"{old_mark / new_mark:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
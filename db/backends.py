@@ -0,0 +1,358 @@
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_URL: str = "mongodb://localhost:27017"
+USER_FIELDS: List[str] = ["password", "wins", "losses", "game_state", "game_snapshot", "game_deltas"]
+RANK_SORT: List[Tuple[str, int]] = [("wins", -1), ("losses", 1), ("username", 1)]
+
+logger: logging.Logger = logging.getLogger("bingo.storage")
+
+
+# 沒指定時看環境變數 BINGO_STORAGE，例如 sqlite:///bingo.db、memory://
+def default_url() -> str:
+    return os.environ.get("BINGO_STORAGE", DEFAULT_URL)
+
+
+def create_backend(url: Optional[str] = None) -> "StorageBackend":
+    url = url or default_url()
+    if url.startswith("mongodb://") or url.startswith("mongodb+srv://"):
+        return MongoBackend(url)
+    if url.startswith("sqlite://"):
+        # sqlite:///bingo.db 是相對路徑，sqlite:////tmp/bingo.db 是絕對路徑
+        path = url[len("sqlite://"):]
+        if path.startswith("/"):
+            path = path[1:]
+        return SQLiteBackend(path or ":memory:")
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    raise ValueError(f"unsupported storage url: {url}")
+
+
+# 玩家資料的存取介面，UserSystem 只依賴這幾個方法
+class StorageBackend:
+    def find_user(self, username: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    # 帳號已存在時回傳 False
+    def insert_user(self, user: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def update_user(self, username: str, fields: Dict[str, Any], upsert: bool = False) -> None:
+        raise NotImplementedError
+
+    # 批次更新 {username: (欄位, upsert)}，預設一筆一筆寫，各 backend 可改成一次送出
+    def update_users(self, updates: Dict[str, Tuple[Dict[str, Any], bool]]) -> None:
+        for username, (fields, upsert) in updates.items():
+            self.update_user(username, fields, upsert)
+
+    # 批次把 {username: bytes} 接在 game_deltas 後面，只送新的 bytes；預設讀出來接好再整個寫回
+    def append_deltas(self, appends: Dict[str, bytes]) -> None:
+        for username, data in appends.items():
+            user = self.find_user(username)
+            if user is not None:
+                self.update_user(username, {"game_deltas": bytes(user.get("game_deltas") or b"") + data})
+
+    # 依勝場多到少、敗場少到多、名字排序，offset 用來分頁
+    def top_users(self, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    # 排在這個戰績前面的人數，排名 = count_ahead + 1
+    def count_ahead(self, username: str, wins: int, losses: int) -> int:
+        raise NotImplementedError
+
+    # 啟動時建立排行榜要用的索引，重複呼叫沒關係
+    def ensure_indexes(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(StorageBackend):
+    def __init__(self):
+        self.lock: threading.Lock = threading.Lock()
+        self.users: Dict[str, Dict[str, Any]] = {}
+
+    def find_user(self, username: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            user = self.users.get(username)
+            return dict(user) if user else None
+
+    def insert_user(self, user: Dict[str, Any]) -> bool:
+        with self.lock:
+            if user["username"] in self.users:
+                return False
+            self.users[user["username"]] = dict(user)
+            return True
+
+    def update_user(self, username: str, fields: Dict[str, Any], upsert: bool = False) -> None:
+        with self.lock:
+            self._update_locked(username, fields, upsert)
+
+    def update_users(self, updates: Dict[str, Tuple[Dict[str, Any], bool]]) -> None:
+        with self.lock:
+            for username, (fields, upsert) in updates.items():
+                self._update_locked(username, fields, upsert)
+
+    def append_deltas(self, appends: Dict[str, bytes]) -> None:
+        with self.lock:
+            for username, data in appends.items():
+                user = self.users.get(username)
+                if user is not None:
+                    user["game_deltas"] = bytes(user.get("game_deltas") or b"") + data
+
+    def _update_locked(self, username: str, fields: Dict[str, Any], upsert: bool) -> None:
+        user = self.users.get(username)
+        if user is None:
+            if not upsert:
+                return
+            user = self.users[username] = {"username": username}
+        user.update(fields)
+
+    def top_users(self, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        with self.lock:
+            users = [leaderboard_entry(user) for user in self.users.values()]
+        return heapq.nsmallest(offset + limit, users, key=rank_key)[offset:]
+
+    def count_ahead(self, username: str, wins: int, losses: int) -> int:
+        key = (-wins, losses, username)
+        with self.lock:
+            return sum(1 for user in self.users.values() if rank_key(leaderboard_entry(user)) < key)
+
+
+class SQLiteBackend(StorageBackend):
+    def __init__(self, path: str = ":memory:"):
+        if path == ":memory:":
+            # 每條 thread 各自一個連線，記憶體資料庫要用 shared cache 才看得到同一份資料
+            self.path = f"file:bingo-{id(self)}?mode=memory&cache=shared"
+        else:
+            self.path = f"file:{path}"
+        self.local: threading.local = threading.local()
+        self.connections: List[sqlite3.Connection] = []
+        self.connections_lock: threading.Lock = threading.Lock()
+        connection = self.connection()
+        if path != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "username TEXT PRIMARY KEY, password TEXT, wins INTEGER NOT NULL DEFAULT 0, "
+            "losses INTEGER NOT NULL DEFAULT 0, game_state TEXT, game_snapshot BLOB, game_deltas BLOB)")
+        # 舊的資料庫沒有 snapshot 欄位，補上
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(users)")}
+        for column in ("game_snapshot", "game_deltas"):
+            if column not in columns:
+                connection.execute(f"ALTER TABLE users ADD COLUMN {column} BLOB")
+
+    # 連線池：每條 thread 重複使用自己的連線
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, uri=True, isolation_level=None, check_same_thread=False,
+                                         timeout=30)
+            self.local.connection = connection
+            with self.connections_lock:
+                self.connections.append(connection)
+        return connection
+
+    def find_user(self, username: str) -> Optional[Dict[str, Any]]:
+        row = self.connection().execute(
+            "SELECT username, password, wins, losses, game_state, game_snapshot, game_deltas FROM users "
+            "WHERE username = ?",
+            (username,)).fetchone()
+        if row is None:
+            return None
+        user = {"username": row[0], "password": row[1], "wins": row[2], "losses": row[3]}
+        if row[4] is not None:
+            user["game_state"] = json.loads(row[4])
+        if row[5] is not None:
+            user["game_snapshot"] = row[5]
+        if row[6] is not None:
+            user["game_deltas"] = row[6]
+        return user
+
+    def insert_user(self, user: Dict[str, Any]) -> bool:
+        fields = {key: value for key, value in user.items() if key in USER_FIELDS}
+        columns = ["username"] + list(fields)
+        values = [user["username"]] + [self.to_column(key, value) for key, value in fields.items()]
+        try:
+            self.connection().execute(
+                f"INSERT INTO users ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", values)
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def update_user(self, username: str, fields: Dict[str, Any], upsert: bool = False) -> None:
+        self.update_users({username: (fields, upsert)})
+
+    # 欄位相同的更新共用一條 SQL 用 executemany，整批包在同一個 transaction
+    def update_users(self, updates: Dict[str, Tuple[Dict[str, Any], bool]]) -> None:
+        statements: Dict[Tuple[Tuple[str, ...], bool], List[List[Any]]] = {}
+        for username, (fields, upsert) in updates.items():
+            columns = tuple(key for key in fields if key in USER_FIELDS)
+            if not columns:
+                continue
+            values = [self.to_column(key, fields[key]) for key in columns]
+            params = [username] + values + values if upsert else values + [username]
+            statements.setdefault((columns, upsert), []).append(params)
+        if not statements:
+            return
+        connection = self.connection()
+        connection.execute("BEGIN")
+        try:
+            for (columns, upsert), rows in statements.items():
+                connection.executemany(self.update_sql(columns, upsert), rows)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    # || 會把 blob 當成文字接起來，再轉回 blob；每筆只送新的 bytes
+    def append_deltas(self, appends: Dict[str, bytes]) -> None:
+        if not appends:
+            return
+        connection = self.connection()
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                "UPDATE users SET game_deltas = CAST(COALESCE(game_deltas, X'') || ? AS BLOB) WHERE username = ?",
+                [(bytes(data), username) for username, data in appends.items()])
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def top_users(self, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        rows = self.connection().execute(
+            "SELECT username, wins, losses FROM users ORDER BY wins DESC, losses ASC, username ASC LIMIT ? OFFSET ?",
+            (limit, offset)).fetchall()
+        return [{"username": row[0], "wins": row[1], "losses": row[2]} for row in rows]
+
+    def count_ahead(self, username: str, wins: int, losses: int) -> int:
+        return self.connection().execute(
+            "SELECT COUNT(*) FROM users WHERE wins > ? OR (wins = ? AND losses < ?) "
+            "OR (wins = ? AND losses = ? AND username < ?)",
+            (wins, wins, losses, wins, losses, username)).fetchone()[0]
+
+    def ensure_indexes(self) -> None:
+        self.connection().execute(
+            "CREATE INDEX IF NOT EXISTS users_rank ON users (wins DESC, losses ASC, username ASC)")
+
+    def close(self) -> None:
+        with self.connections_lock:
+            for connection in self.connections:
+                connection.close()
+            self.connections.clear()
+
+    @staticmethod
+    def update_sql(columns: Tuple[str, ...], upsert: bool) -> str:
+        assignments = ", ".join(f"{key} = ?" for key in columns)
+        if upsert:
+            placeholders = ", ".join("?" * (len(columns) + 1))
+            return (f"INSERT INTO users (username, {', '.join(columns)}) VALUES ({placeholders}) "
+                    f"ON CONFLICT(username) DO UPDATE SET {assignments}")
+        return f"UPDATE users SET {assignments} WHERE username = ?"
+
+    @staticmethod
+    def to_column(key: str, value: Any) -> Any:
+        return json.dumps(value) if key == "game_state" else value
+
+
+_mongo_clients: Dict[str, Any] = {}
+_mongo_lock: threading.Lock = threading.Lock()
+
+
+# 同一個 url 的 MongoClient 整個 process 共用，它本身就有連線池
+def shared_mongo_client(url: str) -> Any:
+    with _mongo_lock:
+        client = _mongo_clients.get(url)
+        if client is None:
+            from pymongo import MongoClient
+            client = _mongo_clients[url] = MongoClient(url, maxPoolSize=50)
+        return client
+
+
+class MongoBackend(StorageBackend):
+    def __init__(self, url: str = DEFAULT_URL, database: str = "game_db"):
+        self.client = shared_mongo_client(url)
+        self.collection = self.client[database]["users"]
+        self.username_unique: bool = False  # username 唯一索引建好之前，註冊先查再寫
+
+    # game_deltas 存成 binary 的陣列，附加時 $push 一段就好，讀出來再接成一個 bytes
+    def find_user(self, username: str) -> Optional[Dict[str, Any]]:
+        user = self.collection.find_one({"username": username}, {"_id": 0})
+        if user is not None and isinstance(user.get("game_deltas"), list):
+            user["game_deltas"] = b"".join(user["game_deltas"])
+        return user
+
+    # 靠 username 唯一索引，同時註冊同一個名字只會有一個成功；索引還沒建好時退回先查再寫
+    def insert_user(self, user: Dict[str, Any]) -> bool:
+        from pymongo.errors import DuplicateKeyError
+        if not self.username_unique and self.collection.find_one({"username": user["username"]}, {"_id": 1}):
+            return False
+        try:
+            self.collection.insert_one(dict(user))
+        except DuplicateKeyError:
+            return False
+        return True
+
+    def update_user(self, username: str, fields: Dict[str, Any], upsert: bool = False) -> None:
+        self.collection.update_one({"username": username}, {"$set": self.to_document(fields)}, upsert=upsert)
+
+    def update_users(self, updates: Dict[str, Tuple[Dict[str, Any], bool]]) -> None:
+        from pymongo import UpdateOne
+        requests = [UpdateOne({"username": username}, {"$set": self.to_document(fields)}, upsert=upsert)
+                    for username, (fields, upsert) in updates.items()]
+        if requests:
+            self.collection.bulk_write(requests, ordered=False)
+
+    def append_deltas(self, appends: Dict[str, bytes]) -> None:
+        from pymongo import UpdateOne
+        requests = [UpdateOne({"username": username}, {"$push": {"game_deltas": bytes(data)}})
+                    for username, data in appends.items()]
+        if requests:
+            self.collection.bulk_write(requests, ordered=False)
+
+    @staticmethod
+    def to_document(fields: Dict[str, Any]) -> Dict[str, Any]:
+        if "game_deltas" not in fields:
+            return fields
+        deltas = fields["game_deltas"]
+        return dict(fields, game_deltas=[bytes(deltas)] if deltas else [])
+
+    def top_users(self, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({}, {"_id": 0, "username": 1, "wins": 1, "losses": 1}).sort(
+            RANK_SORT).skip(offset).limit(limit)
+        return [leaderboard_entry(user) for user in cursor]
+
+    # 三個條件都能用 users_rank 索引做範圍查詢，不用掃整個 collection
+    def count_ahead(self, username: str, wins: int, losses: int) -> int:
+        return self.collection.count_documents({"$or": [
+            {"wins": {"$gt": wins}},
+            {"wins": wins, "losses": {"$lt": losses}},
+            {"wins": wins, "losses": losses, "username": {"$lt": username}},
+        ]})
+
+    def ensure_indexes(self) -> None:
+        from pymongo.errors import OperationFailure
+        try:
+            self.collection.create_index("username", unique=True, name="username_unique")
+            self.username_unique = True
+        except OperationFailure as e:
+            # 改版前先查再寫的註冊可能已經存了重複的名字，唯一索引建不起來；照舊可以用，重複的帳號要手動清掉
+            logger.warning("username index not built, remove duplicate usernames first: %s", e)
+        self.collection.create_index(RANK_SORT, name="users_rank")
+
+
+# 排行榜的排序鍵，越小排越前面
+def rank_key(entry: Dict[str, Any]) -> Tuple[int, int, str]:
+    return -entry["wins"], entry["losses"], entry["username"]
+
+
+# 還沒玩過的帳號沒有 wins/losses 欄位
+def leaderboard_entry(user: Dict[str, Any]) -> Dict[str, Any]:
+    return {"username": user["username"], "wins": user.get("wins", 0), "losses": user.get("losses", 0)}
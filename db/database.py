@@ -1,44 +1,95 @@
-from pymongo import MongoClient
+import ast
+import atexit
 import hashlib
-from typing import Optional, Dict, Any, List
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable
+from db.backends import StorageBackend, create_backend, leaderboard_entry
+from db.leaderboard import CACHE_TTL, Leaderboard
+from db.sessions import SESSION_CAPACITY, SessionCache
+from db.write_behind import FLUSH_INTERVAL, MAX_BATCH, WriteBehindQueue, logger
 
 class UserSystem:
-    def __init__(self):
-        client: MongoClient = MongoClient('localhost', 27017)
-        self.db = client['game_db']
-        self.collection = self.db['users']
+    def __init__(self, backend: Optional[StorageBackend] = None, workers: int = 4, write_behind: bool = True,
+                 max_batch: int = MAX_BATCH, flush_interval: float = FLUSH_INTERVAL,
+                 leaderboard_ttl: float = CACHE_TTL, session_capacity: int = SESSION_CAPACITY):
+        self.backend: StorageBackend = backend or create_backend()
+        # 背景執行資料庫操作，避免卡住 pygame 迴圈或 server 的 event loop
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage")
+        # 建索引要等資料庫連上，也放到背景，建構時不會卡住
+        self.indexes: Future = self.executor.submit(self.ensure_indexes)
+        # 排行榜與遊戲進度先放進佇列合併，批次寫入；程式結束前一定會寫完
+        self.write_behind: Optional[WriteBehindQueue] = None
+        if write_behind:
+            self.write_behind = WriteBehindQueue(self.backend, max_batch, flush_interval)
+            atexit.register(self.write_behind.close)
+        self.leaderboard: Leaderboard = Leaderboard(self.backend, ttl=leaderboard_ttl, before_reload=self.flush)
+        self.sessions: SessionCache = SessionCache(session_capacity)
+        # 每個玩家從上一次 snapshot 之後累積了幾個 bytes 的 delta
+        self.journals: Dict[str, int] = {}
+        self.journal_lock: threading.Lock = threading.Lock()
+
+    # 建不起來只記 log，照樣可以讀寫
+    def ensure_indexes(self) -> None:
+        try:
+            self.backend.ensure_indexes()
+        except Exception as e:
+            logger.warning("storage indexes not built: %s", e)
 
     def register(self, username: str, password: str) -> bool:
-        if self.collection.find_one({"username": username}):
-            return False
         hashed_password: str = self.hash_password(password)
         user: Dict[str, Any] = {"username": username, "password": hashed_password}
-        self.collection.insert_one(user)
-        return True
+        return self.backend.insert_user(user)
 
     def login(self, username: str, password: str) -> bool:
+        return self.login_token(username, password) is not None
+
+    # 登入成功回傳 token，重新連線時用 login_with_token 就不用再查資料庫
+    def login_token(self, username: str, password: str) -> Optional[str]:
         hashed_password: str = self.hash_password(password)
-        account: Optional[Dict[str, Any]] = self.collection.find_one({"username": username, "password": hashed_password})
-        return bool(account)
-
-    def save_game_state(self, username: str, game_state: Dict[str, Any]) -> None:
-        def convert_keys(obj: Dict[str, Any]) -> Dict[str, Any]:
-            if isinstance(obj, dict):
-                return {str(k): convert_keys(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_keys(elem) for elem in obj]
+        if not self.sessions.verify(username, hashed_password):
+            account: Optional[Dict[str, Any]] = self.backend.find_user(username)
+            if not account or account.get("password") != hashed_password:
+                return None
+        return self.sessions.remember(username, hashed_password)
+
+    def login_with_token(self, token: str) -> Optional[str]:
+        return self.sessions.resolve(token)
+
+    # 完整的 game.snapshot，同時清掉舊的 delta 與改版前的 dict 存檔
+    def save_game_state(self, username: str, snapshot: bytes) -> None:
+        with self.journal_lock:
+            self.journals[username] = 0
+            self.write(username, {'game_snapshot': snapshot, 'game_deltas': b'', 'game_state': None})
+
+    # 每回合只附加一小段 delta，資料庫也只收到新的 bytes；回傳目前累積的 delta 有幾個 bytes，呼叫端據此決定何時重寫 snapshot
+    def append_game_delta(self, username: str, delta: bytes) -> int:
+        with self.journal_lock:
+            self.journals[username] = self.journals.get(username, 0) + len(delta)
+            if self.write_behind is None:
+                self.backend.append_deltas({username: delta})
             else:
-                return obj
-        converted_state: Dict[str, Any] = convert_keys(game_state)
-        self.collection.update_one({'username': username}, {'$set': {'game_state': converted_state}})
+                self.write_behind.append(username, delta)
+            return self.journals[username]
 
+    # 回傳 {"snapshot", "deltas"}；只有改版前的存檔時回傳原本的 dict
     def load_game_state(self, username: str) -> Optional[Dict[str, Any]]:
-        account: Optional[Dict[str, Any]] = self.collection.find_one({'username': username})
-        game_state: Optional[Dict[str, Any]] = account.get('game_state') if account else None
+        # 佇列裡附加的 delta 不會蓋在讀到的資料上，先寫完
+        self.flush()
+        account: Optional[Dict[str, Any]] = self.find_user(username)
+        if not account:
+            return None
+        snapshot: Optional[bytes] = account.get('game_snapshot')
+        if snapshot:
+            deltas: bytes = bytes(account.get('game_deltas') or b'')
+            with self.journal_lock:
+                self.journals[username] = len(deltas)
+            return {"snapshot": bytes(snapshot), "deltas": deltas}
 
+        game_state: Optional[Dict[str, Any]] = account.get('game_state')
         if game_state and 'player_inputs' in game_state:
             player_inputs: Dict[str, Any] = game_state['player_inputs']
-            game_state['player_inputs'] = {eval(k): v for k, v in player_inputs.items()}
+            game_state['player_inputs'] = {ast.literal_eval(k): v for k, v in player_inputs.items()}
 
         return game_state
 
@@ -46,15 +97,155 @@ class UserSystem:
         hash_object: hashlib._Hash = hashlib.sha256(password.encode())
         hashed_password: str = hash_object.hexdigest()
         return hashed_password
-    
+
+    def update_leaderboard(self, username: str, wins: int, losses: int) -> None:
+        self.write(username, {"wins": wins, "losses": losses}, upsert=True)
+        self.leaderboard.update(username, wins, losses)
+
+    def get_leaderboard(self, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        return self.leaderboard.page(limit, offset)
+
+    # 玩家目前排第幾名，沒有這個帳號時回傳 None
+    def get_rank(self, username: str) -> Optional[int]:
+        account: Optional[Dict[str, Any]] = self.find_user(username)
+        if account is None:
+            return None
+        return self.leaderboard.rank(leaderboard_entry(account))
+
+    def write(self, username: str, fields: Dict[str, Any], upsert: bool = False) -> None:
+        if self.write_behind is None:
+            self.backend.update_user(username, fields, upsert)
+        else:
+            self.write_behind.put(username, fields, upsert)
+
+    # 讀取時把還在佇列裡的更新蓋上去，才讀得到自己剛寫的資料
+    def find_user(self, username: str) -> Optional[Dict[str, Any]]:
+        account: Optional[Dict[str, Any]] = self.backend.find_user(username)
+        pending = self.write_behind.peek(username) if self.write_behind else None
+        if pending:
+            account = dict(account or {"username": username}, **pending)
+        return account
+
+    def flush(self) -> None:
+        if self.write_behind is not None:
+            self.write_behind.flush()
+
+    # 丟到背景執行，呼叫端可以不用等結果
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        return self.executor.submit(fn, *args)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        if self.write_behind is not None:
+            self.write_behind.close()
+            atexit.unregister(self.write_behind.close)
+        self.backend.close()
+
+
+# 給 asyncio 程式用的版本：同樣的操作，在 UserSystem 的 thread pool 上執行後 await 結果
+class AsyncUserSystem:
+    def __init__(self, user_system: UserSystem):
+        self.user_system: UserSystem = user_system
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # asyncio 只有 server 用得到，桌面版啟動時不用載入
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(self.user_system.executor, fn, *args)
+
+    async def register(self, username: str, password: str) -> bool:
+        return await self.run(self.user_system.register, username, password)
+
+    async def login(self, username: str, password: str) -> bool:
+        return await self.run(self.user_system.login, username, password)
+
+    async def login_token(self, username: str, password: str) -> Optional[str]:
+        return await self.run(self.user_system.login_token, username, password)
+
+    # 只查記憶體，不用丟到 thread pool
+    async def login_with_token(self, token: str) -> Optional[str]:
+        return self.user_system.login_with_token(token)
+
+    async def save_game_state(self, username: str, snapshot: bytes) -> None:
+        await self.run(self.user_system.save_game_state, username, snapshot)
+
+    async def append_game_delta(self, username: str, delta: bytes) -> int:
+        return await self.run(self.user_system.append_game_delta, username, delta)
+
+    async def load_game_state(self, username: str) -> Optional[Dict[str, Any]]:
+        return await self.run(self.user_system.load_game_state, username)
+
+    async def update_leaderboard(self, username: str, wins: int, losses: int) -> None:
+        await self.run(self.user_system.update_leaderboard, username, wins, losses)
+
+    async def get_leaderboard(self, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        return await self.run(self.user_system.get_leaderboard, limit, offset)
+
+    async def get_rank(self, username: str) -> Optional[int]:
+        return await self.run(self.user_system.get_rank, username)
+
+
+# 桌面版用：資料庫連線放到背景建立，第一個畫面不用等；離線直接玩的話完全用不到
+class DeferredUserSystem:
+    def __init__(self, factory: Callable[[], UserSystem] = UserSystem):
+        self.factory: Callable[[], UserSystem] = factory
+        self.future: Optional[Future] = None
+        self.lock: threading.Lock = threading.Lock()
+
+    # 開始在背景連線，重複呼叫沒關係
+    def start(self) -> Future:
+        with self.lock:
+            if self.future is None:
+                self.future = Future()
+                threading.Thread(target=self.connect, name="storage-connect", daemon=True).start()
+            return self.future
+
+    def connect(self) -> None:
+        try:
+            self.future.set_result(self.factory())
+        except BaseException as e:
+            self.future.set_exception(e)
+
+    def ready(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    # 還沒連好就等它連好；連線失敗的例外在這裡丟出
+    def get(self) -> UserSystem:
+        return self.start().result()
+
+    def register(self, username: str, password: str) -> bool:
+        return self.get().register(username, password)
+
+    def login(self, username: str, password: str) -> bool:
+        return self.get().login(username, password)
+
+    def login_token(self, username: str, password: str) -> Optional[str]:
+        return self.get().login_token(username, password)
+
+    def login_with_token(self, token: str) -> Optional[str]:
+        return self.get().login_with_token(token)
+
+    def save_game_state(self, username: str, snapshot: bytes) -> None:
+        self.get().save_game_state(username, snapshot)
+
+    def append_game_delta(self, username: str, delta: bytes) -> int:
+        return self.get().append_game_delta(username, delta)
+
+    def load_game_state(self, username: str) -> Optional[Dict[str, Any]]:
+        return self.get().load_game_state(username)
+
     def update_leaderboard(self, username: str, wins: int, losses: int) -> None:
-        self.collection.update_one(
-            {"username": username},
-            {"$set": {"wins": wins, "losses": losses}},
-            upsert=True
-        )
-
-    def get_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
-        leaderboard: List[Dict[str, Any]] = self.collection.find().sort(
-            [("wins", -1), ("losses", 1)]).limit(limit)
-        return leaderboard
+        self.get().update_leaderboard(username, wins, losses)
+
+    def get_leaderboard(self, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        return self.get().get_leaderboard(limit, offset)
+
+    def get_rank(self, username: str) -> Optional[int]:
+        return self.get().get_rank(username)
+
+    def flush(self) -> None:
+        if self.ready():
+            self.get().flush()
+
+    def close(self) -> None:
+        if self.ready():
+            self.get().close()
@@ -0,0 +1,140 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from enum import IntEnum
+from typing import Iterator, List, Optional
+
+MAGIC: bytes = b"BNGL"
+VERSION: int = 1
+FILE_HEADER: struct.Struct = struct.Struct("<4sBxxxQ")  # magic, 版本, 已寫入的長度
+RECORD: struct.Struct = struct.Struct("<IBId")  # payload 長度, 事件種類, stream, 時間(time.time)
+CHUNK: int = 1 << 20  # 檔案每次至少長這麼多
+
+
+# 一個 stream 是一局遊戲(GameUI)或一個房間(GameHub)，payload 格式寫在後面
+class EventType(IntEnum):
+    GAME_START = 1     # GAME_START: seed, grid_num, min_number, max_number, rounds_limit
+    RESTORE = 2        # game.snapshot 的 bytes，讀檔後的狀態
+    INPUT = 3          # CELL + 輸入的文字
+    CONFIRM = 4
+    DRAW = 5           # CELL + 抽到的數字
+    RESULT = 6         # RESULT: 1 win / 2 lose, 結束時的回合
+    SERVER_DRAW = 7    # 線上模式 server 抽的號碼(文字)，不一定在自己的棋盤上
+    ROOM_OPEN = 11     # ROOM_OPEN: 房間容量, server 上的 room_id
+    JOIN = 12          # peer + b"\0" + 玩家名稱
+    LEAVE = 13         # peer
+    ROUND_END = 14     # peer，client 有附上狀態時再加 b"\0" + PLAYER_STATE
+    ROUND_TIMEOUT = 15  # ROUND: 超時的回合
+    WIN = 16           # peer + b"\0" + 原本的 payload
+    LOSE = 17          # peer + b"\0" + 原本的 payload
+    ROOM_IDLE = 18
+    RESUME = 19        # 新的 peer + b"\0" + 斷線前的 peer，用 token 接回原本的座位
+    BOARD = 20         # peer + b"\0" + 原本的 payload
+    ROOM_SEED = 21     # SEED: 房間抽號用的 seed，緊接在 ROOM_OPEN 後面
+
+
+GAME_START: struct.Struct = struct.Struct("<QHIII")
+CELL: struct.Struct = struct.Struct("<I")  # 格子編號 row * grid_num + col
+RESULT: struct.Struct = struct.Struct("<BI")
+ROOM_OPEN: struct.Struct = struct.Struct("<II")
+ROUND: struct.Struct = struct.Struct("<I")
+SEED: struct.Struct = struct.Struct("<I")
+
+
+class Event:
+    def __init__(self, event_type: EventType, stream: int, timestamp: float, payload: bytes):
+        self.type: EventType = event_type
+        self.stream: int = stream
+        self.time: float = timestamp
+        self.payload: bytes = payload
+
+
+def iter_records(buffer: mmap.mmap, end: int) -> Iterator[Event]:
+    offset = FILE_HEADER.size
+    while offset + RECORD.size <= end:
+        length, event_type, stream, timestamp = RECORD.unpack_from(buffer, offset)
+        start = offset + RECORD.size
+        if start + length > end:
+            break
+        yield Event(EventType(event_type), stream, timestamp, buffer[start:start + length])
+        offset = start + length
+
+
+def read_header(buffer: mmap.mmap, path: str) -> int:
+    magic, version, end = FILE_HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a bingo event log")
+    return min(end, len(buffer))
+
+
+def read_events(path: str) -> List[Event]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < FILE_HEADER.size:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return list(iter_records(buffer, read_header(buffer, path)))
+
+
+# 只能往後寫的事件紀錄，整個檔案 mmap 進來，寫一筆就是一次記憶體複製
+# 每筆寫完才更新檔頭的長度，程式中途被殺掉也只會少掉最後一筆；寫回磁碟交給 OS
+class EventLog:
+    def __init__(self, path: str, chunk: int = CHUNK):
+        self.path: str = path
+        self.chunk: int = chunk
+        self.lock: threading.Lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        size = os.fstat(self.file.fileno()).st_size
+        if size < FILE_HEADER.size:
+            self.file.truncate(chunk)
+            self.map: Optional[mmap.mmap] = mmap.mmap(self.file.fileno(), chunk)
+            self.end: int = FILE_HEADER.size
+            FILE_HEADER.pack_into(self.map, 0, MAGIC, VERSION, self.end)
+        else:
+            self.map = mmap.mmap(self.file.fileno(), size)
+            self.end = read_header(self.map, path)
+        # 接著寫舊的檔案時 stream 編號不要跟之前的重複
+        self.next_stream: int = 1 + max((event.stream for event in iter_records(self.map, self.end)), default=0)
+
+    def new_stream(self) -> int:
+        with self.lock:
+            stream = self.next_stream
+            self.next_stream += 1
+            return stream
+
+    def append(self, event_type: EventType, stream: int, payload: bytes = b"") -> None:
+        size = RECORD.size + len(payload)
+        with self.lock:
+            if self.map is None:
+                raise RuntimeError("event log is closed")
+            if self.end + size > len(self.map):
+                self.grow(self.end + size)
+            RECORD.pack_into(self.map, self.end, len(payload), event_type, stream, time.time())
+            self.map[self.end + RECORD.size:self.end + size] = payload
+            self.end += size
+            FILE_HEADER.pack_into(self.map, 0, MAGIC, VERSION, self.end)
+
+    # 重新 mmap 一次，Windows 上檔案被 map 時不能改大小
+    def grow(self, required: int) -> None:
+        size = max(len(self.map) * 2, (required + self.chunk - 1) // self.chunk * self.chunk)
+        self.map.close()
+        self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+
+    def flush(self) -> None:
+        with self.lock:
+            if self.map is not None:
+                self.map.flush()
+
+    # 把預留的空間切掉
+    def close(self) -> None:
+        with self.lock:
+            if self.map is None:
+                return
+            self.map.flush()
+            self.map.close()
+            self.map = None
+            self.file.truncate(self.end)
+            self.file.close()
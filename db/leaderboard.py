@@ -0,0 +1,91 @@
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from db.backends import StorageBackend, rank_key
+
+TOP_SIZE: int = 100  # 記憶體裡保留前幾名
+CACHE_TTL: float = 30.0  # 其他 process 也會寫資料庫，快取最多用這麼久就重新讀
+
+
+# 排行榜快取：前 TOP_SIZE 名依排序鍵存在有序 list，update_leaderboard 時就地更新，不用每次都排序整個資料庫
+# 快取一定是「真正排行榜的前 len(keys) 名」，有人掉出快取範圍時寧可少一名，也不猜外面的人是誰
+class Leaderboard:
+    def __init__(self, backend: StorageBackend, size: int = TOP_SIZE, ttl: float = CACHE_TTL,
+                 before_reload: Optional[Callable[[], None]] = None):
+        self.backend: StorageBackend = backend
+        self.size: int = size
+        self.ttl: float = ttl
+        self.before_reload: Optional[Callable[[], None]] = before_reload  # 重新讀之前先把延遲寫入的資料寫完
+        self.lock: threading.Lock = threading.Lock()
+        self.keys: List[Tuple[int, int, str]] = []
+        self.entries: Dict[str, Tuple[int, int, str]] = {}
+        self.exhaustive: bool = False  # 所有玩家都在快取裡
+        self.loaded_at: Optional[float] = None
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def update(self, username: str, wins: int, losses: int) -> None:
+        key = (-wins, losses, username)
+        with self.lock:
+            if self.loaded_at is None:
+                return
+            old = self.entries.pop(username, None)
+            if old is not None:
+                del self.keys[bisect.bisect_left(self.keys, old)]
+            # 快取沒包含所有人時，比最後一名還差的人不知道實際排第幾，不放進來
+            if not self.exhaustive and (not self.keys or key > self.keys[-1]):
+                return
+            bisect.insort(self.keys, key)
+            self.entries[username] = key
+            if len(self.keys) > self.size:
+                del self.entries[self.keys.pop()[2]]
+                self.exhaustive = False
+
+    def page(self, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        with self.lock:
+            if self.stale() or (offset + limit > len(self.keys) and not self.exhaustive
+                                and offset + limit <= self.size):
+                self.reload()
+            else:
+                self.hits += 1
+            if offset + limit <= len(self.keys) or self.exhaustive:
+                return [entry_of(key) for key in self.keys[offset:offset + limit]]
+        # 超過快取範圍的頁面直接問資料庫，靠索引分頁
+        self.misses += 1
+        if self.before_reload is not None:
+            self.before_reload()
+        return self.backend.top_users(limit, offset)
+
+    # 從 1 開始的名次；在快取裡就直接查，不在就用索引數排在前面的人
+    def rank(self, entry: Dict[str, Any]) -> int:
+        key = rank_key(entry)
+        with self.lock:
+            if not self.stale() and self.entries.get(entry["username"]) == key:
+                self.hits += 1
+                return bisect.bisect_left(self.keys, key) + 1
+        self.misses += 1
+        if self.before_reload is not None:
+            self.before_reload()
+        return self.backend.count_ahead(entry["username"], entry["wins"], entry["losses"]) + 1
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.loaded_at = None
+
+    def stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl
+
+    def reload(self) -> None:
+        self.misses += 1
+        if self.before_reload is not None:
+            self.before_reload()
+        rows = self.backend.top_users(self.size)
+        self.keys = sorted(rank_key(row) for row in rows)
+        self.entries = {key[2]: key for key in self.keys}
+        self.exhaustive = len(rows) < self.size
+        self.loaded_at = time.monotonic()
+
+
+def entry_of(key: Tuple[int, int, str]) -> Dict[str, Any]:
+    return {"username": key[2], "wins": -key[0], "losses": key[1]}
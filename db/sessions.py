@@ -0,0 +1,67 @@
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+SESSION_CAPACITY: int = 10000  # 最多記住幾個登入過的玩家
+SESSION_TTL: float = 3600.0  # 登入紀錄與 token 的有效秒數
+
+
+# 驗證過的登入紀錄，LRU 淘汰；重新連線的玩家比對密碼雜湊或 token 就好，不用查資料庫
+class SessionCache:
+    def __init__(self, capacity: int = SESSION_CAPACITY, ttl: float = SESSION_TTL):
+        self.capacity: int = capacity
+        self.ttl: float = ttl
+        self.lock: threading.Lock = threading.Lock()
+        self.credentials: OrderedDict[str, Tuple[str, float]] = OrderedDict()  # username -> (密碼雜湊, 到期時間)
+        self.tokens: OrderedDict[str, Tuple[str, float]] = OrderedDict()  # token -> (username, 到期時間)
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def verify(self, username: str, hashed_password: str) -> bool:
+        with self.lock:
+            cached = self.credentials.get(username)
+            if cached is None or cached[1] < time.monotonic():
+                self.misses += 1
+                return False
+            self.credentials.move_to_end(username)
+        # 只快取成功的登入，密碼不對一律回資料庫確認
+        if hmac.compare_digest(cached[0], hashed_password):
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    # 登入成功後記下來，回傳之後可以用來重新連線的 token
+    def remember(self, username: str, hashed_password: str) -> str:
+        token = secrets.token_urlsafe(16)
+        expires = time.monotonic() + self.ttl
+        with self.lock:
+            self.credentials[username] = (hashed_password, expires)
+            self.credentials.move_to_end(username)
+            self.tokens[token] = (username, expires)
+            while len(self.credentials) > self.capacity:
+                self.credentials.popitem(last=False)
+            while len(self.tokens) > self.capacity:
+                self.tokens.popitem(last=False)
+        return token
+
+    # token 有效時回傳對應的 username
+    def resolve(self, token: str) -> Optional[str]:
+        with self.lock:
+            session = self.tokens.get(token)
+            if session is None or session[1] < time.monotonic():
+                self.tokens.pop(token, None)
+                self.misses += 1
+                return None
+            self.tokens.move_to_end(token)
+            self.hits += 1
+            return session[0]
+
+    def forget(self, username: str) -> None:
+        with self.lock:
+            self.credentials.pop(username, None)
+            for token in [token for token, (owner, _) in self.tokens.items() if owner == username]:
+                del self.tokens[token]
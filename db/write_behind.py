@@ -0,0 +1,185 @@
+import copy
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from db.backends import StorageBackend
+
+MAX_BATCH: int = 256  # 累積這麼多個玩家就立刻寫入
+FLUSH_INTERVAL: float = 0.5  # 最久隔多少秒寫入一次
+
+logger: logging.Logger = logging.getLogger("bingo.storage")
+
+
+class WriteBehindStats:
+    def __init__(self):
+        self.lock: threading.Lock = threading.Lock()
+        self.submitted: int = 0  # 呼叫端送進來的更新次數
+        self.written: int = 0  # 合併後實際寫進資料庫的筆數
+        self.batches: int = 0
+        self.max_batch: int = 0
+        self.failures: int = 0
+        self.flush_seconds: float = 0.0
+        self.max_flush_seconds: float = 0.0
+
+    def record_submit(self) -> None:
+        with self.lock:
+            self.submitted += 1
+
+    def record_flush(self, size: int, seconds: float) -> None:
+        with self.lock:
+            self.written += size
+            self.batches += 1
+            self.flush_seconds += seconds
+            if size > self.max_batch:
+                self.max_batch = size
+            if seconds > self.max_flush_seconds:
+                self.max_flush_seconds = seconds
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+
+    def summary(self) -> str:
+        mean_batch = self.written / self.batches if self.batches else 0.0
+        mean_ms = self.flush_seconds / self.batches * 1000 if self.batches else 0.0
+        return (f"write-behind: {self.submitted} updates -> {self.written} writes in {self.batches} batches "
+                f"(mean {mean_batch:.1f}, max {self.max_batch}), flush mean {mean_ms:.2f}ms "
+                f"max {self.max_flush_seconds * 1000:.2f}ms, {self.failures} failed")
+
+
+# 延遲寫入：同一個玩家的多次更新先在記憶體合併，累積夠多或時間到了再一次批次寫入
+# close() 會把剩下的全部寫完才返回；寫入失敗的資料會留在佇列等下次重試
+class WriteBehindQueue:
+    def __init__(self, backend: StorageBackend, max_batch: int = MAX_BATCH, flush_interval: float = FLUSH_INTERVAL):
+        self.backend: StorageBackend = backend
+        self.max_batch: int = max_batch
+        self.flush_interval: float = flush_interval
+        self.stats: WriteBehindStats = WriteBehindStats()
+        self.condition: threading.Condition = threading.Condition()
+        self.pending: Dict[str, Tuple[Dict[str, Any], bool]] = {}  # username -> (欄位, upsert)
+        self.inflight: Dict[str, Tuple[Dict[str, Any], bool]] = {}  # 正在寫入的批次
+        self.appends: Dict[str, bytearray] = {}  # username -> 要接在 game_deltas 後面、還沒寫的 bytes
+        self.flush_lock: threading.Lock = threading.Lock()  # 同一時間只有一個批次在寫，確保先後順序
+        self.closed: bool = False
+        self.thread: threading.Thread = threading.Thread(target=self.run, name="write-behind", daemon=True)
+        self.thread.start()
+
+    def put(self, username: str, fields: Dict[str, Any], upsert: bool = False) -> None:
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("write-behind queue is closed")
+            queued = self.pending.get(username)
+            if queued is None:
+                self.pending[username] = (dict(fields), upsert)
+            else:
+                queued[0].update(fields)
+                self.pending[username] = (queued[0], queued[1] or upsert)
+            # 整個覆寫 game_deltas 之前附加的都不用寫了
+            if "game_deltas" in fields:
+                self.appends.pop(username, None)
+            self.stats.record_submit()
+            if len(self) >= self.max_batch:
+                self.condition.notify()
+
+    # 只把新的 bytes 接在 game_deltas 後面；同一批已經要覆寫 game_deltas 時直接接在要寫的值後面
+    def append(self, username: str, data: bytes) -> None:
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("write-behind queue is closed")
+            queued = self.pending.get(username)
+            if queued is not None and "game_deltas" in queued[0]:
+                queued[0]["game_deltas"] = bytes(queued[0]["game_deltas"]) + data
+            else:
+                self.appends.setdefault(username, bytearray()).extend(data)
+            self.stats.record_submit()
+            if len(self) >= self.max_batch:
+                self.condition.notify()
+
+    # 還沒寫進資料庫的欄位，讀取時要蓋在資料庫的結果上；回傳複本，呼叫端改了也不影響佇列
+    def peek(self, username: str) -> Optional[Dict[str, Any]]:
+        with self.condition:
+            inflight = self.inflight.get(username)
+            queued = self.pending.get(username)
+            if inflight is None and queued is None:
+                return None
+            fields = dict(inflight[0]) if inflight else {}
+            if queued:
+                fields.update(queued[0])
+            return copy.deepcopy(fields)
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                deadline = time.monotonic() + self.flush_interval
+                while not self.closed and len(self) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                if self.closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("write-behind flush failed, will retry: %s", e)
+                time.sleep(self.flush_interval)
+
+    # 先寫欄位再附加 game_deltas：append 時已經排了覆寫的話 bytes 會直接接在覆寫的值後面，所以這個順序不會亂
+    def flush(self) -> int:
+        with self.flush_lock:
+            with self.condition:
+                batch = self.inflight = self.pending
+                appends = self.appends
+                self.pending = {}
+                self.appends = {}
+            size = len(batch.keys() | appends.keys())
+            if not size:
+                return 0
+            start = time.perf_counter()
+            try:
+                self.backend.update_users(batch)
+                batch = {}  # 欄位寫好了，附加失敗時只放回附加的部分
+                self.backend.append_deltas(appends)
+            except Exception:
+                self.stats.record_failure()
+                self.requeue(batch, appends)
+                raise
+            finally:
+                with self.condition:
+                    self.inflight = {}
+            self.stats.record_flush(size, time.perf_counter() - start)
+            return size
+
+    # 失敗的批次放回佇列，之後才送進來的更新比較新，要蓋在上面；附加的 bytes 排在之後附加的前面
+    def requeue(self, batch: Dict[str, Tuple[Dict[str, Any], bool]], appends: Dict[str, bytearray]) -> None:
+        with self.condition:
+            for username in batch.keys() | appends.keys():
+                fields, upsert = batch.get(username, ({}, False))
+                tail = appends.get(username, b"")
+                newer = self.pending.get(username)
+                if newer is not None:
+                    if "game_deltas" in newer[0]:
+                        tail = b""  # 之後整個覆寫過了
+                    fields.update(newer[0])
+                    upsert = upsert or newer[1]
+                tail = bytes(tail) + bytes(self.appends.pop(username, b""))
+                if fields:
+                    self.pending[username] = (fields, upsert)
+                if "game_deltas" in fields:
+                    fields["game_deltas"] = bytes(fields["game_deltas"]) + tail
+                elif tail:
+                    self.appends[username] = bytearray(tail)
+
+    def close(self) -> None:
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+        self.flush()
+
+    def __len__(self) -> int:
+        return len(self.pending) + len(self.appends)
+
@@ -0,0 +1,109 @@
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+from game.logic import GameLogic
+
+
+# 每種棋盤大小的連線遮罩只算一次：所有橫、直、兩條對角線，以及每一格會經過哪幾條線
+@lru_cache(maxsize=None)
+def line_masks(grid_num: int) -> Tuple[Tuple[int, ...], Tuple[Tuple[int, ...], ...]]:
+    row = (1 << grid_num) - 1
+    lines: List[int] = [row << (x * grid_num) for x in range(grid_num)]
+    column = sum(1 << (x * grid_num) for x in range(grid_num))
+    lines += [column << y for y in range(grid_num)]
+    diagonal = sum(1 << (i * grid_num + i) for i in range(grid_num))
+    anti_diagonal = sum(1 << (i * grid_num + grid_num - 1 - i) for i in range(grid_num))
+    lines += [diagonal, anti_diagonal]
+
+    cell_lines: List[Tuple[int, ...]] = []
+    for x in range(grid_num):
+        for y in range(grid_num):
+            through = [lines[x], lines[grid_num + y]]
+            if x == y:
+                through.append(diagonal)
+            if x == grid_num - 1 - y:
+                through.append(anti_diagonal)
+            cell_lines.append(tuple(through))
+    return tuple(lines), tuple(cell_lines)
+
+
+# 讓 board.selected[x][y] 的讀寫直接對應到 bitmask，舊的程式碼不用改
+class SelectedRow:
+    def __init__(self, board: "BitboardLogic", x: int):
+        self.board: BitboardLogic = board
+        self.x: int = x
+
+    def __getitem__(self, y: int) -> bool:
+        return self.board.is_marked(self.x, y)
+
+    def __setitem__(self, y: int, value: bool) -> None:
+        if value:
+            self.board.mark(self.x, y)
+        else:
+            self.board.unmark(self.x, y)
+
+    def __len__(self) -> int:
+        return self.board.grid_num
+
+    def __iter__(self) -> Iterator[bool]:
+        return (self[y] for y in range(self.board.grid_num))
+
+    def __eq__(self, other: object) -> bool:
+        return list(self) == list(other) if isinstance(other, (list, SelectedRow)) else NotImplemented
+
+
+# 跟 GameLogic 一樣的介面，選取狀態存成一個整數：第 x 列第 y 行是第 x * grid_num + y 個 bit
+# 每次標記只檢查經過那一格的線，check_game_win 直接回傳記下來的結果
+class BitboardLogic(GameLogic):
+    def __init__(self, grid_num: int = 4, min_number: int = 1, max_number: int = 99, rounds_limit: int = 8,
+                 seed: Optional[int] = None):
+        self.bits: int = 0
+        self.won: bool = False
+        self.rows: List[SelectedRow] = []
+        super().__init__(grid_num, min_number, max_number, rounds_limit, seed)
+
+    @property
+    def selected(self) -> List[SelectedRow]:
+        if len(self.rows) != self.grid_num:
+            self.rows = [SelectedRow(self, x) for x in range(self.grid_num)]
+        return self.rows
+
+    # 接受 GameLogic 的 list of lists，例如讀取存檔時
+    @selected.setter
+    def selected(self, rows: List[List[bool]]) -> None:
+        grid_num = len(rows)
+        self.bits = sum(1 << (x * grid_num + y) for x, row in enumerate(rows) for y, value in enumerate(row) if value)
+        self.won = self.scan_win()
+
+    def is_marked(self, x: int, y: int) -> bool:
+        return bool(self.bits >> (x * self.grid_num + y) & 1)
+
+    def mark(self, x: int, y: int) -> None:
+        bit = 1 << (x * self.grid_num + y)
+        if self.bits & bit:
+            return
+        self.bits |= bit
+        if not self.won:
+            bits = self.bits
+            self.won = any(bits & line == line for line in line_masks(self.grid_num)[1][x * self.grid_num + y])
+
+    def unmark(self, x: int, y: int) -> None:
+        self.bits &= ~(1 << (x * self.grid_num + y))
+        self.won = self.scan_win()
+
+    def mark_drawn(self, value: str) -> bool:
+        cells = self.value_cells.get(value, ())
+        for row, col in cells:
+            self.mark(row, col)
+        return bool(cells)
+
+    def select(self, x: int, y: int) -> str:
+        if (x, y) in self.player_inputs:
+            self.mark(x, y)
+        return self.check_game_finish()
+
+    def check_game_win(self) -> bool:
+        return self.won
+
+    def scan_win(self) -> bool:
+        bits = self.bits
+        return any(bits & line == line for line in line_masks(self.grid_num)[0])
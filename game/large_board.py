@@ -0,0 +1,289 @@
+import random
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+from game.bitboard import BitboardLogic, SelectedRow
+from game.logic import GameLogic, prime_sieve
+
+LARGE_BOARD_THRESHOLD: int = 16  # 棋盤比這個大就改用 LargeBoardLogic
+
+
+# 大棋盤預設的數字範圍：至少要能填滿所有格子不重複，對角線也要有足夠的質數
+def default_max_number(grid_num: int, min_number: int = 1) -> int:
+    max_number = max(99, min_number + grid_num * grid_num - 1)
+    while sum(prime_sieve(max_number)[min_number:]) < 2 * grid_num:
+        max_number *= 2
+    return max_number
+
+
+# 依棋盤大小挑實作；沒指定的範圍與回合上限依大小推算，4x4 時跟原本一樣是 1~99、8 回合
+def create_game(grid_num: int = 4, min_number: int = 1, max_number: Optional[int] = None,
+                rounds_limit: Optional[int] = None, seed: Optional[int] = None) -> GameLogic:
+    max_number = max_number or default_max_number(grid_num, min_number)
+    rounds_limit = rounds_limit or 2 * grid_num
+    if grid_num > LARGE_BOARD_THRESHOLD:
+        return LargeBoardLogic(grid_num, min_number, max_number, rounds_limit, seed)
+    return GameLogic(grid_num, min_number, max_number, rounds_limit, seed)
+
+
+# 只有正整數且沒有前導 0 的輸入才存進 array，其他打到一半的內容另外記
+def is_number(value: str) -> bool:
+    return value.isascii() and value.isdigit() and value[0] != "0" and int(value) < 1 << 32
+
+
+class GridRow:
+    def __init__(self, board: "LargeBoardLogic", row: int):
+        self.board: LargeBoardLogic = board
+        self.row: int = row
+
+    def __getitem__(self, col: int) -> str:
+        return self.board.text(self.row * self.board.grid_num + col)
+
+    def __len__(self) -> int:
+        return self.board.grid_num
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[col] for col in range(self.board.grid_num))
+
+
+# 跟 GameLogic.player_inputs 一樣用 (x, y) 查輸入內容，資料其實在 board.values 裡
+class CellInputs(Mapping):
+    def __init__(self, board: "LargeBoardLogic"):
+        self.board: LargeBoardLogic = board
+
+    def index(self, key: Tuple[int, int]) -> int:
+        x, y = key
+        if not (0 <= x < self.board.grid_num and 0 <= y < self.board.grid_num):
+            raise KeyError(key)
+        return y * self.board.grid_num + x
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            index = self.index(key)
+        except (KeyError, TypeError, ValueError):
+            return False
+        return self.board.values[index] != 0 or index in self.board.drafts
+
+    def __getitem__(self, key: Tuple[int, int]) -> str:
+        index = self.index(key)
+        if self.board.values[index] == 0 and index not in self.board.drafts:
+            raise KeyError(key)
+        return self.board.text(index)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        grid_num = self.board.grid_num
+        for index, value in enumerate(self.board.values):
+            if value or index in self.board.drafts:
+                yield index % grid_num, index // grid_num
+
+    def __len__(self) -> int:
+        return self.board.filled + len(self.board.drafts)
+
+
+# 大棋盤(例如 100x100 的比賽)：數字存在一個 uint32 array，選取狀態是每格一個 byte，
+# 每條線另外記已標記的格數，標記一格只要更新 2~4 個計數，勝負判斷跟抽號都是 O(1)
+# 格子編號是 row * grid_num + col，跟 grid[row][col]、selected[row][col] 一樣
+class LargeBoardLogic(BitboardLogic):
+    def __init__(self, grid_num: int = 100, min_number: int = 1, max_number: int = 99999, rounds_limit: int = 200,
+                 seed: Optional[int] = None):
+        self.grid_num: int = grid_num
+        self.min_number: int = min_number
+        self.max_number: int = max_number
+        self.rounds_limit: int = rounds_limit
+        self.rounds: int = 0
+        self.values: array = array("I", [0]) * (grid_num * grid_num)  # 0 表示還沒填
+        self.drafts: Dict[int, str] = {}  # 不是數字或空白的輸入
+        self.filled: int = 0
+        self.cell_of: Dict[int, int] = {}  # 數字 -> 其中一個填了它的格子
+        self.counts: Dict[int, int] = {}  # 只記出現超過一次的數字
+        self.used_nums: array = array("I")
+        self.used_position: Dict[int, int] = {}
+        self.used_position_of: Optional[array] = None
+        self.marks: bytearray = bytearray(grid_num * grid_num)
+        self.won: bool = False
+        self.rows: List[SelectedRow] = []
+        self.grid_rows: List[GridRow] = []
+        # 前 grid_num 個是橫列，接著 grid_num 個直行，最後兩條對角線
+        self.line_counts: array = array("H", [0]) * (2 * grid_num + 2)
+        self.reseed(random.randrange(1 << 32) if seed is None else seed)
+
+    def text(self, index: int) -> str:
+        draft = self.drafts.get(index)
+        if draft is not None:
+            return draft
+        value = self.values[index]
+        return str(value) if value else ""
+
+    @property
+    def grid(self) -> List[GridRow]:
+        if len(self.grid_rows) != self.grid_num:
+            self.grid_rows = [GridRow(self, row) for row in range(self.grid_num)]
+        return self.grid_rows
+
+    # 讀取存檔時接受 list of lists
+    @grid.setter
+    def grid(self, rows: List[List[str]]) -> None:
+        self.clear_inputs()
+        for row, values in enumerate(rows):
+            for col, value in enumerate(values):
+                if value:
+                    self.update_player_input(col, row, value)
+
+    @property
+    def player_inputs(self) -> CellInputs:
+        return CellInputs(self)
+
+    @player_inputs.setter
+    def player_inputs(self, inputs: Dict[Tuple[int, int], str]) -> None:
+        self.clear_inputs()
+        for (x, y), value in inputs.items():
+            self.update_player_input(x, y, value)
+
+    def clear_inputs(self) -> None:
+        self.values = array("I", [0]) * (self.grid_num * self.grid_num)
+        self.drafts.clear()
+        self.filled = 0
+        self.cell_of.clear()
+        self.counts.clear()
+
+    @property
+    def selected(self) -> List[SelectedRow]:
+        return BitboardLogic.selected.fget(self)
+
+    @selected.setter
+    def selected(self, rows: List[List[bool]]) -> None:
+        self.marks = bytearray(self.grid_num * self.grid_num)
+        self.won = False
+        self.line_counts = array("H", [0]) * (2 * self.grid_num + 2)
+        for row, values in enumerate(rows):
+            for col, value in enumerate(values):
+                if value:
+                    self.mark(row, col)
+
+    def lines_of(self, row: int, col: int) -> List[int]:
+        grid_num = self.grid_num
+        lines = [row, grid_num + col]
+        if row == col:
+            lines.append(2 * grid_num)
+        if row == grid_num - 1 - col:
+            lines.append(2 * grid_num + 1)
+        return lines
+
+    def is_marked(self, row: int, col: int) -> bool:
+        return bool(self.marks[row * self.grid_num + col])
+
+    def mark(self, row: int, col: int) -> None:
+        index = row * self.grid_num + col
+        if self.marks[index]:
+            return
+        self.marks[index] = 1
+        for line in self.lines_of(row, col):
+            self.line_counts[line] += 1
+            if self.line_counts[line] == self.grid_num:
+                self.won = True
+
+    def unmark(self, row: int, col: int) -> None:
+        index = row * self.grid_num + col
+        if not self.marks[index]:
+            return
+        self.marks[index] = 0
+        for line in self.lines_of(row, col):
+            self.line_counts[line] -= 1
+        self.won = self.scan_win()
+
+    def scan_win(self) -> bool:
+        return self.grid_num in self.line_counts
+
+    def update_player_input(self, x: int, y: int, value: str) -> None:
+        index = y * self.grid_num + x
+        old = self.values[index]
+        if old:
+            self.unindex_value(old, index)
+            self.values[index] = 0
+            self.filled -= 1
+        self.drafts.pop(index, None)
+        if is_number(value):
+            number = int(value)
+            self.values[index] = number
+            self.filled += 1
+            self.index_value(number, index)
+        else:
+            self.drafts[index] = value
+
+    def index_value(self, number: int, index: int) -> None:
+        if number in self.cell_of:
+            self.counts[number] = self.counts.get(number, 1) + 1
+        else:
+            self.cell_of[number] = index
+
+    def unindex_value(self, number: int, index: int) -> None:
+        count = self.counts.get(number)
+        if count is None:
+            del self.cell_of[number]
+            return
+        if count == 2:
+            del self.counts[number]
+        else:
+            self.counts[number] = count - 1
+        # 重複的數字才需要找另一個格子，合法的棋盤不會走到這裡
+        if self.cell_of[number] == index:
+            self.cell_of[number] = next(i for i, value in enumerate(self.values) if value == number and i != index)
+
+    def rebuild_index(self) -> None:
+        self.cell_of.clear()
+        self.counts.clear()
+        for index, value in enumerate(self.values):
+            if value:
+                self.index_value(value, index)
+
+    def mark_drawn(self, value: str) -> bool:
+        if not is_number(value):
+            return False
+        number = int(value)
+        index = self.cell_of.get(number)
+        if index is None:
+            return False
+        if number in self.counts:
+            for i, cell_value in enumerate(self.values):
+                if cell_value == number:
+                    self.mark(*divmod(i, self.grid_num))
+        else:
+            self.mark(*divmod(index, self.grid_num))
+        return True
+
+    def validate_board(self) -> List[Tuple[int, int]]:
+        grid_num = self.grid_num
+        invalid = [(index % grid_num, index // grid_num) for index in self.drafts]
+        sieve = prime_sieve(self.max_number)
+        counts = self.counts
+        min_number, max_number = self.min_number, self.max_number
+        for index, value in enumerate(self.values):
+            if not value:
+                continue
+            row, col = divmod(index, grid_num)
+            if value in counts or not min_number <= value <= max_number or (
+                    (row == col or row == grid_num - 1 - col) and not sieve[value]):
+                invalid.append((col, row))
+        return invalid
+
+    def is_all_filled(self) -> bool:
+        return self.filled + len(self.drafts) == self.grid_num * self.grid_num
+
+    def start_draws(self) -> None:
+        self.used_nums = array("I", (value for value in self.values if value))
+
+    def get_random_num_in_used_nums(self) -> str:
+        return str(super().get_random_num_in_used_nums())
+
+    # used_nums 是 array("I")，索引的 key 也用整數；不是數字的輸入不會在裡面
+    def used_key(self, value: str) -> int:
+        return int(value) if is_number(value) else -1
+
+    def reset(self) -> None:
+        self.__init__(self.grid_num, self.min_number, self.max_number, self.rounds_limit, self.rng.randrange(1 << 32))
+
+    def cell_index(self, value: str) -> int:
+        return self.cell_of.get(int(value), -1) if is_number(value) else -1
+
+    def set_used_cells(self, cells: List[int]) -> None:
+        self.used_nums = array("I", (self.values[cell] for cell in cells))
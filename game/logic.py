@@ -1,18 +1,46 @@
 import random
 from collections import Counter
-from typing import List, Tuple, Dict
+from functools import lru_cache
+from typing import List, Optional, Tuple, Dict, Union
+
+
+# 0~max_number 的質數表，同一個上限只建一次
+@lru_cache(maxsize=8)
+def prime_sieve(max_number: int) -> bytearray:
+    sieve = bytearray([1]) * (max_number + 1)
+    sieve[:2] = bytearray(min(2, max_number + 1))
+    for i in range(2, int(max_number ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytearray(len(range(i * i, max_number + 1, i)))
+    return sieve
+
 
 class GameLogic:
-    def __init__(self):
-        self.grid_num: int = 4
+    def __init__(self, grid_num: int = 4, min_number: int = 1, max_number: int = 99, rounds_limit: int = 8,
+                 seed: Optional[int] = None):
+        self.grid_num: int = grid_num
         self.grid: List[List[str]] = [["" for _ in range(self.grid_num)] for _ in range(self.grid_num)]
         self.used_nums: List[str] = []
+        self.used_position: Dict[str, int] = {}  # used_nums 的數字 -> 位置，第一次用值拿掉號碼時才建
+        self.used_position_of: Optional[List[str]] = None  # used_position 是哪一個 used_nums 的，整個換掉就重建
         self.player_inputs: Dict[Tuple[int, int], str] = {}
         self.selected: List[List[bool]] = [[False] * self.grid_num for _ in range(self.grid_num)]
         self.rounds: int = 0
-        self.min_number: int = 1
-        self.max_number: int = 99
-    
+        self.min_number: int = min_number
+        self.max_number: int = max_number
+        self.rounds_limit: int = rounds_limit  # 幾回合內沒連線就輸
+        self.value_cells: Dict[str, List[Tuple[int, int]]] = {}  # 數字 -> 填了這個數字的格子 (grid 的 row, col)
+        self.reseed(random.randrange(1 << 32) if seed is None else seed)
+
+    # 每局自己的亂數，同一個 seed 抽號順序一定一樣，可以重播
+    def reseed(self, seed: int) -> None:
+        self.seed: int = seed
+        self.rng: random.Random = random.Random(seed)
+
+    # 同樣的棋盤設定重新開始一局，下一局的 seed 由這一局的亂數決定
+    def reset(self) -> None:
+        self.__init__(self.grid_num, self.min_number, self.max_number, self.rounds_limit, self.rng.randrange(1 << 32))
+
     def select(self, x: int, y: int) -> str:
         if self.selected[x][y] == False and (x, y) in self.player_inputs:  
             self.selected[x][y] = True
@@ -37,21 +65,118 @@ class GameLogic:
         return False
     
     def check_game_lose(self) -> bool:
-        if self.rounds >= 8:
+        if self.rounds >= self.rounds_limit:
             return True
         return False
     
     def update_player_input(self, x: int, y: int, value: str) -> None:
+        self.unindex(self.grid[y][x], (y, x))
         self.grid[y][x] = value
         self.player_inputs[(x, y)] = value
+        if value:
+            self.value_cells.setdefault(value, []).append((y, x))
+
+    def unindex(self, value: str, cell: Tuple[int, int]) -> None:
+        cells = self.value_cells.get(value)
+        if cells and cell in cells:
+            cells.remove(cell)
+            if not cells:
+                del self.value_cells[value]
+
+    # 直接換掉 grid 之後(例如讀取存檔)重建索引
+    def rebuild_index(self) -> None:
+        self.value_cells = {}
+        for row, values in enumerate(self.grid):
+            for col, value in enumerate(values):
+                if value:
+                    self.value_cells.setdefault(value, []).append((row, col))
+
+    # 抽到的數字直接查索引標記，不用掃整個棋盤；回傳有沒有標到
+    def mark_drawn(self, value: str) -> bool:
+        cells = self.value_cells.get(value, ())
+        for row, col in cells:
+            self.selected[row][col] = True
+        return bool(cells)
+
+    # 一次檢查整個棋盤，回傳所有不合法的格子 (x, y)，跟 player_inputs 的 key 一樣
+    def validate_board(self) -> List[Tuple[int, int]]:
+        invalid: List[Tuple[int, int]] = []
+        for (x, y), value in self.player_inputs.items():
+            if not value.isdigit() or len(self.value_cells.get(value, ())) > 1:
+                invalid.append((x, y))
+                continue
+            number = int(value)
+            if self.is_invalid_num_range(number) or (
+                    (x == y or x == self.grid_num - 1 - y) and not self.is_prime(number)):
+                invalid.append((x, y))
+        return invalid
     
     def is_all_filled(self) -> bool:
         return len(self.player_inputs) == self.grid_num ** 2
     
+    # 按下 Confirm 後，棋盤上的數字就是之後要抽的號碼
+    def start_draws(self) -> None:
+        self.used_nums = [value for row in self.grid for value in row]
+
+    # 隨機挑一個跟最後一個交換再 pop，不用 list.remove 從頭找
     def get_random_num_in_used_nums(self) -> str:
-        output = random.choice(self.used_nums)
-        self.used_nums.remove(output)
-        return output
+        return self.pop_used(self.rng.randrange(len(self.used_nums)))
+
+    # 跟最後一個交換再 pop；位置索引已經建好的話一起更新
+    def pop_used(self, index: int) -> Union[str, int]:
+        used = self.used_nums
+        value, last = used[index], used[-1]
+        used[index] = last
+        used.pop()
+        if self.used_position_of is used:
+            position = self.used_position
+            if position.get(last) == len(used):
+                position[last] = index
+            if position.get(value) == index:
+                del position[value]
+        return value
+
+    # used_nums 裡存的型別(大棋盤是整數)
+    def used_key(self, value: str) -> Union[str, int]:
+        return value
+
+    # 用值拿掉一個待抽的號碼，查位置索引是 O(1)；不在裡面就回傳 False
+    def remove_used(self, value: str) -> bool:
+        if self.used_position_of is not self.used_nums:
+            self.used_position = {used_value: index for index, used_value in enumerate(self.used_nums)}
+            self.used_position_of = self.used_nums
+        index = self.used_position.get(self.used_key(value))
+        if index is None:
+            return False
+        self.pop_used(index)
+        return True
+
+    # 線上模式由 server 抽號：從待抽的號碼拿掉(存檔的 delta 才對得上)再標記，回傳有沒有在棋盤上
+    def apply_draw(self, value: str) -> bool:
+        self.remove_used(value)
+        return self.mark_drawn(value)
+
+    # 輸入框最多幾個字
+    def max_input_length(self) -> int:
+        return len(str(self.max_number))
+
+    # 填了這個數字的格子編號 row * grid_num + col，沒有的話回傳 -1
+    def cell_index(self, value: str) -> int:
+        cells = self.value_cells.get(value)
+        if not cells:
+            return -1
+        row, col = cells[0]
+        return row * self.grid_num + col
+
+    # 還沒抽的號碼改用格子編號表示，存檔用
+    def used_cells(self) -> List[int]:
+        cells = [self.cell_index(str(value)) for value in self.used_nums]
+        if -1 in cells:
+            raise ValueError("used_nums contains a number that is not on the board")
+        return cells
+
+    def set_used_cells(self, cells: List[int]) -> None:
+        self.used_nums = [self.grid[cell // self.grid_num][cell % self.grid_num] for cell in cells]
 
     def is_invalid_input(self, x: int, y: int, value: str) -> bool:
         if not value.isdigit():
@@ -69,6 +194,8 @@ class GameLogic:
     def is_prime(self, num: int) -> bool:
         if num < 2:
             return False
+        if num <= self.max_number:
+            return bool(prime_sieve(self.max_number)[num])
         for i in range(2, int(num ** 0.5) + 1):
             if num % i == 0:
                 return False
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from game.logic import GameLogic
+
+CACHE_PATH: str = os.environ.get(
+    "BINGO_BOARD_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "bingo", "boards.json"))
+KEEP_BEST: int = 8  # 每種設定在快取裡保留幾個最好的棋盤
+
+# 把棋盤轉 90 度或翻面，橫、直、對角線還是同樣那幾條，分數跟合法性都不變
+SYMMETRIES: Tuple[str, ...] = ("identity", "rot90", "rot180", "rot270", "flip", "flip_rot90", "flip_rot180",
+                               "flip_rot270")
+
+
+# 棋盤規則與抽號方式；weights 是每個數字被抽到的相對權重，沒給就是均勻抽
+# draw_mode 跟 game.simulator 一樣："board" 從自己填的數字抽(get_random_num_in_used_nums)，"range" 從整個範圍抽
+# 均勻抽號時每種合法棋盤的勝率都一樣，棋盤怎麼排只有在權重不均勻時才有差
+class BoardConfig:
+    def __init__(self, grid_num: int = 4, min_number: int = 1, max_number: int = 99, rounds_limit: int = 8,
+                 weights: Optional[Dict[int, float]] = None, draw_mode: str = "board"):
+        self.grid_num: int = grid_num
+        self.min_number: int = min_number
+        self.max_number: int = max_number
+        self.rounds_limit: int = rounds_limit  # 跟 GameLogic.check_game_lose 一樣是 8
+        self.weights: Dict[int, float] = weights or {}
+        self.draw_mode: str = draw_mode
+
+    def key(self) -> str:
+        key = (f"{self.grid_num}x{self.grid_num}:{self.min_number}-{self.max_number}:r{self.rounds_limit}"
+               f":{self.draw_mode}")
+        if self.weights:
+            digest = hashlib.sha1(json.dumps(sorted(self.weights.items())).encode()).hexdigest()[:12]
+            key += f":w{digest}"
+        return key
+
+    def draw_weights(self) -> List[float]:
+        return [self.weights.get(number, 1.0) for number in range(self.min_number, self.max_number + 1)]
+
+    def diagonal(self) -> List[int]:
+        n = self.grid_num
+        return [cell for cell in range(n * n) if cell // n == cell % n or cell // n == n - 1 - cell % n]
+
+    def off_diagonal(self) -> List[int]:
+        diagonal = set(self.diagonal())
+        return [cell for cell in range(self.grid_num * self.grid_num) if cell not in diagonal]
+
+    def primes(self) -> List[int]:
+        game = GameLogic(max_number=self.max_number)
+        return [number for number in range(self.min_number, self.max_number + 1) if game.is_prime(number)]
+
+
+# 跟這局遊戲一樣的棋盤大小、數字範圍與回合上限，快取的 key 才對得上
+def game_config(game: GameLogic, weights: Optional[Dict[int, float]] = None, draw_mode: str = "board") -> BoardConfig:
+    return BoardConfig(game.grid_num, game.min_number, game.max_number, game.rounds_limit, weights, draw_mode)
+
+
+# 隨機的合法棋盤，格子編號是 x * grid_num + y
+def random_board(config: BoardConfig, rng: random.Random) -> List[int]:
+    diagonal, off_diagonal = config.diagonal(), config.off_diagonal()
+    board = [0] * (config.grid_num * config.grid_num)
+    diagonal_values = rng.sample(config.primes(), len(diagonal))
+    for cell, value in zip(diagonal, diagonal_values):
+        board[cell] = value
+    used = set(diagonal_values)
+    rest = [number for number in range(config.min_number, config.max_number + 1) if number not in used]
+    for cell, value in zip(off_diagonal, rng.sample(rest, len(off_diagonal))):
+        board[cell] = value
+    return board
+
+
+def is_valid_board(board: List[int], config: BoardConfig) -> bool:
+    game = GameLogic(config.grid_num, config.min_number, config.max_number, config.rounds_limit)
+    for cell, value in enumerate(board):
+        x, y = divmod(cell, config.grid_num)
+        game.update_player_input(y, x, str(value))
+    return not game.validate_board()
+
+
+def transform(board: List[int], grid_num: int, symmetry: str) -> List[int]:
+    rows = [board[x * grid_num:(x + 1) * grid_num] for x in range(grid_num)]
+    if symmetry.startswith("flip"):
+        rows = [row[::-1] for row in rows]
+    for _ in range({"rot90": 1, "rot180": 2, "rot270": 3}.get(symmetry.replace("flip_", ""), 0)):
+        rows = [list(row) for row in zip(*rows[::-1])]
+    return [value for row in rows for value in row]
+
+
+# 用同一組抽號序列評估所有候選棋盤(common random numbers)，比較兩個棋盤時雜訊比較小
+class LayoutScorer:
+    def __init__(self, config: BoardConfig, samples: int, seed: Optional[int] = None):
+        import numpy as np
+        from game.simulator import line_cells
+        self.np = np
+        self.config: BoardConfig = config
+        rng = np.random.default_rng(seed)
+        # Gumbel top-k：每個數字一個 key，依 key 由大到小抽就是依權重不放回抽號
+        weights = np.asarray(config.draw_weights())
+        self.keys = np.log(weights) + rng.gumbel(size=(samples, len(weights)))
+        self.value_rounds = rounds_of(np, self.keys)
+        self.lines = line_cells(config.grid_num)
+
+    # 在回合上限內連線的機率
+    def score(self, board: List[int]) -> float:
+        values = self.np.asarray(board) - self.config.min_number
+        if self.config.draw_mode == "board":
+            # 只在棋盤上的數字之間抽，順序一樣由 key 決定
+            cell_rounds = rounds_of(self.np, self.keys[:, values])
+        else:
+            cell_rounds = self.value_rounds[:, values]
+        finish = cell_rounds[:, self.lines].max(axis=2).min(axis=1)
+        return float((finish <= self.config.rounds_limit).mean())
+
+
+# key 越大越早抽到，回傳每一欄在第幾回合被抽到(從 1 開始)
+def rounds_of(np: Any, keys: Any) -> Any:
+    order = np.argsort(-keys, axis=1)
+    rounds = np.empty_like(order)
+    np.put_along_axis(rounds, order, np.arange(1, order.shape[1] + 1), axis=1)
+    return rounds
+
+
+# 模擬退火：每步換掉一格的數字(對角線只能換質數)或交換同類的兩格
+def anneal(config: BoardConfig, iterations: int, samples: int, seed: int) -> Tuple[float, List[int]]:
+    rng = random.Random(seed)
+    scorer = LayoutScorer(config, samples, seed)
+    diagonal, off_diagonal = config.diagonal(), config.off_diagonal()
+    primes = config.primes()
+    numbers = list(range(config.min_number, config.max_number + 1))
+    board = random_board(config, rng)
+    score = scorer.score(board)
+    best_score, best_board = score, list(board)
+    for step in range(iterations):
+        temperature = 0.02 * (1 - step / iterations) + 1e-6
+        candidate = list(board)
+        cells = diagonal if rng.random() < len(diagonal) / len(board) else off_diagonal
+        if len(cells) > 1 and rng.random() < 0.3:
+            a, b = rng.sample(cells, 2)
+            candidate[a], candidate[b] = candidate[b], candidate[a]
+        else:
+            cell = rng.choice(cells)
+            used = set(candidate)
+            choices = [value for value in (primes if cells is diagonal else numbers) if value not in used]
+            if not choices:
+                continue
+            candidate[cell] = rng.choice(choices)
+        candidate_score = scorer.score(candidate)
+        if candidate_score >= score or rng.random() < math.exp((candidate_score - score) / temperature):
+            board, score = candidate, candidate_score
+            if score > best_score:
+                best_score, best_board = score, list(board)
+    return best_score, best_board
+
+
+# 每個 process 各自從不同起點退火，最後用另一組抽號序列重新評分，避免挑到只是剛好運氣好的棋盤
+def optimize(config: BoardConfig, workers: Optional[int] = None, restarts: Optional[int] = None,
+             iterations: int = 2000, samples: int = 4000, seed: Optional[int] = None) -> List[Tuple[float, List[int]]]:
+    workers = workers or os.cpu_count() or 1
+    restarts = restarts or workers
+    base_seed = random.randrange(1 << 30) if seed is None else seed
+    seeds = [base_seed + i for i in range(restarts)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        found = list(executor.map(anneal, [config] * restarts, [iterations] * restarts, [samples] * restarts, seeds))
+    judge = LayoutScorer(config, samples * 4, base_seed + restarts)
+    results = [(judge.score(board), board) for _, board in found]
+    results.sort(key=lambda result: -result[0])
+    return results
+
+
+_cache: Dict[str, Dict[str, List[Dict[str, object]]]] = {}
+_cache_lock: threading.Lock = threading.Lock()
+
+
+def load_cache(path: str = CACHE_PATH) -> Dict[str, List[Dict[str, object]]]:
+    with _cache_lock:
+        if path not in _cache:
+            try:
+                with open(path) as f:
+                    _cache[path] = json.load(f)
+            except (OSError, ValueError):
+                _cache[path] = {}
+        return _cache[path]
+
+
+# 跟快取裡原本的結果合併，只留最好的 KEEP_BEST 個；先寫暫存檔再換掉，寫到一半中斷也不會壞掉
+def save_best(config: BoardConfig, results: List[Tuple[float, List[int]]], path: str = CACHE_PATH) -> None:
+    cache = dict(load_cache(path))
+    entries = {tuple(entry["board"]): float(entry["score"]) for entry in cache.get(config.key(), [])}
+    for score, board in results:
+        entries[tuple(board)] = max(score, entries.get(tuple(board), 0.0))
+    best = sorted(entries.items(), key=lambda entry: -entry[1])[:KEEP_BEST]
+    cache[config.key()] = [{"score": score, "board": list(board)} for board, score in best]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+    with _cache_lock:
+        _cache[path] = cache
+
+
+# 給 UI 用：直接從快取挑一個好棋盤再隨機轉向，不做任何模擬；還沒有快取時回傳隨機的合法棋盤
+# 回傳 grid[x][y] 字串，跟 GameLogic.grid 一樣
+def suggest_board(config: Optional[BoardConfig] = None, path: str = CACHE_PATH,
+                  rng: Optional[random.Random] = None) -> List[List[str]]:
+    config = config or BoardConfig()
+    rng = rng or random.Random()
+    entries = load_cache(path).get(config.key())
+    if entries:
+        board = transform(list(rng.choice(entries)["board"]), config.grid_num, rng.choice(SYMMETRIES))
+    else:
+        board = random_board(config, rng)
+    n = config.grid_num
+    return [[str(board[x * n + y]) for y in range(n)] for x in range(n)]
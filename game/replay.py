@@ -0,0 +1,97 @@
+from typing import Dict, Iterable, List, Optional
+from db.event_log import CELL, GAME_START, RESULT, Event, EventLog, EventType
+from game.large_board import create_game
+from game.logic import GameLogic
+from game.snapshot import restore_snapshot
+
+OUTCOMES: Dict[str, int] = {"win": 1, "lose": 2}
+
+
+# GameUI 用：每局一個新的 stream，記下 seed、輸入、Confirm、抽號與結果
+class GameRecorder:
+    def __init__(self, log: EventLog):
+        self.log: EventLog = log
+        self.stream: int = 0
+        self.grid_num: int = 0
+
+    # 在 game 剛建立、reset 或讀檔之後呼叫，這時的亂數還沒用過
+    def start(self, game: GameLogic) -> None:
+        self.stream = self.log.new_stream()
+        self.grid_num = game.grid_num
+        self.log.append(EventType.GAME_START, self.stream, GAME_START.pack(
+            game.seed, game.grid_num, game.min_number, game.max_number, game.rounds_limit))
+
+    def restore(self, snapshot: bytes) -> None:
+        self.log.append(EventType.RESTORE, self.stream, snapshot)
+
+    def input(self, x: int, y: int, value: str) -> None:
+        self.log.append(EventType.INPUT, self.stream, CELL.pack(y * self.grid_num + x) + value.encode())
+
+    def confirm(self) -> None:
+        self.log.append(EventType.CONFIRM, self.stream)
+
+    def draw(self, cell: int, value: str) -> None:
+        self.log.append(EventType.DRAW, self.stream, CELL.pack(cell) + value.encode())
+
+    def server_draw(self, value: str) -> None:
+        self.log.append(EventType.SERVER_DRAW, self.stream, value.encode())
+
+    def result(self, outcome: str, rounds: int) -> None:
+        self.log.append(EventType.RESULT, self.stream, RESULT.pack(OUTCOMES[outcome], rounds))
+
+
+class GameReplay:
+    def __init__(self, stream: int, game: GameLogic):
+        self.stream: int = stream
+        self.game: GameLogic = game
+        self.events: int = 0
+        self.outcome: Optional[str] = None  # 紀錄裡的結果
+        self.mismatches: List[str] = []  # 重播結果跟紀錄不一樣的地方
+        self.started: float = 0.0
+        self.ended: float = 0.0
+
+
+# 用紀錄裡的 seed 重新建一局，照順序重做每個事件；抽號用同一個 seed 重抽，跟紀錄比對
+def replay_game(events: Iterable[Event]) -> GameReplay:
+    replay: Optional[GameReplay] = None
+    seed = 0
+    for event in events:
+        if event.type == EventType.GAME_START:
+            seed, grid_num, min_number, max_number, rounds_limit = GAME_START.unpack(event.payload)
+            replay = GameReplay(event.stream, create_game(grid_num, min_number, max_number, rounds_limit, seed))
+            replay.started = event.time
+        if replay is None:
+            raise ValueError("game events do not begin with GAME_START")
+        replay.events += 1
+        replay.ended = event.time
+        game = replay.game
+        if event.type == EventType.RESTORE:
+            restore_snapshot(game, event.payload)
+            game.reseed(seed)
+        elif event.type == EventType.INPUT:
+            (cell,) = CELL.unpack_from(event.payload)
+            game.update_player_input(cell % game.grid_num, cell // game.grid_num, event.payload[CELL.size:].decode())
+        elif event.type == EventType.CONFIRM:
+            game.start_draws()
+        elif event.type == EventType.DRAW:
+            recorded = event.payload[CELL.size:].decode()
+            num = game.get_random_num_in_used_nums()
+            if num != recorded:
+                replay.mismatches.append(f"round {game.rounds + 1}: drew {num}, log says {recorded}")
+            # 標記照紀錄走；第一個不一致之後待抽的號碼就跟當時不同了，後面的比對只供參考
+            game.mark_drawn(recorded)
+            game.rounds += 1
+        elif event.type == EventType.SERVER_DRAW:
+            # 線上模式的號碼來自 server，不用自己的亂數比對
+            game.apply_draw(event.payload.decode())
+            game.rounds += 1
+        elif event.type == EventType.RESULT:
+            code, rounds = RESULT.unpack(event.payload)
+            replay.outcome = next(outcome for outcome, value in OUTCOMES.items() if value == code)
+            finish = game.check_game_finish()
+            if finish != replay.outcome or rounds != game.rounds:
+                replay.mismatches.append(f"result: replay {finish} at round {game.rounds}, "
+                                         f"log says {replay.outcome} at round {rounds}")
+    if replay is None:
+        raise ValueError("no game events")
+    return replay
@@ -0,0 +1,177 @@
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from game.logic import GameLogic
+
+ROUNDS_LIMIT: int = 8  # GameLogic.check_game_lose 的回合上限
+DRAW_MODES: Tuple[str, ...] = (
+    "board",  # 跟 GameUI 一樣從自己填的數字裡抽，每回合一定標到一格
+    "range",  # 從 min_number~max_number 抽，抽到沒填的數字就什麼都不標
+)
+MAX_BATCH_CELLS: int = 1 << 24  # 一批最多展開多少個「格子 x 棋盤」，控制記憶體用量
+
+
+# 每條線(橫、直、兩條對角線)包含哪些格子，格子編號是 x * grid_num + y
+@lru_cache(maxsize=None)
+def line_cells(grid_num: int) -> np.ndarray:
+    cells = np.arange(grid_num * grid_num).reshape(grid_num, grid_num)
+    lines = [cells[x] for x in range(grid_num)] + [cells[:, y] for y in range(grid_num)]
+    lines += [cells.diagonal(), np.fliplr(cells).diagonal()]
+    return np.stack(lines)
+
+
+# 對角線上的格子，GameLogic.is_invalid_input 規定要填質數
+@lru_cache(maxsize=None)
+def diagonal_cells(grid_num: int) -> Tuple[np.ndarray, np.ndarray]:
+    x, y = np.divmod(np.arange(grid_num * grid_num), grid_num)
+    on_diagonal = (x == y) | (x == grid_num - 1 - y)
+    return np.flatnonzero(on_diagonal), np.flatnonzero(~on_diagonal)
+
+
+def primes_between(min_number: int, max_number: int) -> np.ndarray:
+    sieve = np.ones(max_number + 1, dtype=bool)
+    sieve[:2] = False
+    for i in range(2, int(max_number ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = False
+    return np.flatnonzero(sieve[min_number:]) + min_number
+
+
+# 每一列是一個排列的反函數：第 k 個元素在第幾回合被抽到(從 1 開始)
+def random_draw_rounds(rng: np.random.Generator, games: int, items: int) -> np.ndarray:
+    order = np.argsort(rng.random((games, items)), axis=1)
+    rounds = np.empty_like(order)
+    np.put_along_axis(rounds, order, np.arange(1, items + 1), axis=1)
+    return rounds
+
+
+class SimulationResult:
+    def __init__(self, grid_num: int, min_number: int, max_number: int, draw_mode: str, max_rounds: int):
+        self.grid_num: int = grid_num
+        self.min_number: int = min_number
+        self.max_number: int = max_number
+        self.draw_mode: str = draw_mode
+        self.games: int = 0
+        self.finish_counts: np.ndarray = np.zeros(max_rounds + 1, dtype=np.int64)  # 第幾回合連線的局數
+        self.seconds: float = 0.0
+
+    def add(self, finish_rounds: np.ndarray, seconds: float) -> None:
+        self.games += len(finish_rounds)
+        self.finish_counts += np.bincount(finish_rounds, minlength=len(self.finish_counts))
+        self.seconds += seconds
+
+    # 回合上限設成 rounds_limit 時的勝率，同一份結果可以直接比較不同的上限
+    def win_rate(self, rounds_limit: int = ROUNDS_LIMIT) -> float:
+        return self.finish_counts[:rounds_limit + 1].sum() / self.games if self.games else 0.0
+
+    # 剛好在第 r 回合連線的機率，r = 1..max_round
+    def by_round(self, max_round: int = ROUNDS_LIMIT) -> List[float]:
+        return [self.finish_counts[r] / self.games for r in range(1, max_round + 1)] if self.games else []
+
+    def games_per_minute(self) -> float:
+        return self.games / self.seconds * 60 if self.seconds else 0.0
+
+    def label(self) -> str:
+        size = f"{self.grid_num}x{self.grid_num}"
+        if self.draw_mode == "board":
+            return f"{size} board draws"
+        return f"{size} {self.min_number}-{self.max_number}"
+
+
+# 一次模擬很多局：每局的抽號順序是一個隨機排列，每格被標記的回合 = 它的數字被抽到的回合
+# 一條線完成的回合是線上各格的最大值，整局連線的回合是所有線的最小值，全部用 array 運算算完
+class BatchSimulator:
+    def __init__(self, grid_num: int = 4, min_number: int = 1, max_number: int = 99, draw_mode: str = "board",
+                 seed: Optional[int] = None):
+        if draw_mode not in DRAW_MODES:
+            raise ValueError(f"unknown draw mode: {draw_mode}")
+        self.grid_num: int = grid_num
+        self.min_number: int = min_number
+        self.max_number: int = max_number
+        self.draw_mode: str = draw_mode
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+        self.lines: np.ndarray = line_cells(grid_num)
+        self.diagonal, self.off_diagonal = diagonal_cells(grid_num)
+        self.primes: np.ndarray = primes_between(min_number, max_number)
+        cells = grid_num * grid_num
+        if draw_mode == "range":
+            if len(self.primes) < len(self.diagonal):
+                raise ValueError(f"{len(self.diagonal)} diagonal cells need distinct primes, "
+                                 f"only {len(self.primes)} in {min_number}-{max_number}")
+            if max_number - min_number + 1 < cells:
+                raise ValueError(f"{cells} cells need distinct numbers, range {min_number}-{max_number} is too small")
+        self.max_rounds: int = cells if draw_mode == "board" else max_number - min_number + 1
+
+    # 隨機產生合法的棋盤：數字不重複、對角線都是質數
+    def random_boards(self, games: int) -> np.ndarray:
+        boards = np.empty((games, self.grid_num * self.grid_num), dtype=np.int32)
+        prime_order = np.argsort(self.rng.random((games, len(self.primes))), axis=1)[:, :len(self.diagonal)]
+        diagonal_values = self.primes[prime_order]
+        boards[:, self.diagonal] = diagonal_values
+        # 已經用在對角線的數字排到最後，剩下的隨機挑
+        keys = self.rng.random((games, self.max_number - self.min_number + 1))
+        np.put_along_axis(keys, diagonal_values - self.min_number, 2.0, axis=1)
+        rest = np.argsort(keys, axis=1)[:, :len(self.off_diagonal)]
+        boards[:, self.off_diagonal] = rest + self.min_number
+        return boards
+
+    # (棋盤, 每格被標記的回合)
+    def deal(self, games: int) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        if self.draw_mode == "board":
+            return None, random_draw_rounds(self.rng, games, self.grid_num * self.grid_num)
+        boards = self.random_boards(games)
+        value_rounds = random_draw_rounds(self.rng, games, self.max_number - self.min_number + 1)
+        return boards, np.take_along_axis(value_rounds, boards - self.min_number, axis=1)
+
+    def finish_rounds(self, cell_rounds: np.ndarray) -> np.ndarray:
+        return cell_rounds[:, self.lines].max(axis=2).min(axis=1)
+
+    def batch_size(self) -> int:
+        per_game = max(self.lines.size, self.max_number - self.min_number + 1)
+        return max(1, MAX_BATCH_CELLS // per_game)
+
+    def run(self, games: int) -> SimulationResult:
+        result = SimulationResult(self.grid_num, self.min_number, self.max_number, self.draw_mode, self.max_rounds)
+        remaining = games
+        while remaining > 0:
+            batch = min(remaining, self.batch_size())
+            start = time.perf_counter()
+            _, cell_rounds = self.deal(batch)
+            result.add(self.finish_rounds(cell_rounds), time.perf_counter() - start)
+            remaining -= batch
+        return result
+
+    # 用 GameLogic 重玩一部分的局，逐局比對結果(win/lose 與結束回合)，回傳不一致的局數
+    def cross_check(self, games: int) -> int:
+        boards, cell_rounds = self.deal(games)
+        finish = self.finish_rounds(cell_rounds)
+        mismatches = 0
+        for index in range(games):
+            expected = ("win", int(finish[index])) if finish[index] <= ROUNDS_LIMIT else ("lose", ROUNDS_LIMIT)
+            board = boards[index] if boards is not None else None
+            if replay(self.grid_num, board, cell_rounds[index], self.min_number, self.max_number) != expected:
+                mismatches += 1
+        return mismatches
+
+
+# 照 GameUI 的流程玩一局：每回合標記抽到的格子，rounds += 1，再用 check_game_finish 判斷
+def replay(grid_num: int, board: Optional[np.ndarray], cell_rounds: np.ndarray, min_number: int = 1,
+           max_number: int = 99) -> Tuple[str, int]:
+    game = GameLogic(grid_num, min_number, max_number, ROUNDS_LIMIT)
+    marked_at: Dict[int, Tuple[int, int]] = {}
+    for cell, draw_round in enumerate(cell_rounds.tolist()):
+        x, y = divmod(cell, grid_num)
+        marked_at[draw_round] = (x, y)
+        if board is not None:
+            game.update_player_input(y, x, str(board[cell]))
+    if board is not None and game.validate_board():
+        return "invalid", 0
+    while True:
+        game.rounds += 1
+        if game.rounds in marked_at:
+            x, y = marked_at[game.rounds]
+            game.selected[x][y] = True
+        outcome = game.check_game_finish()
+        if outcome:
+            return outcome, game.rounds
@@ -0,0 +1,157 @@
+import struct
+import sys
+import zlib
+from array import array
+from typing import Any, Dict, Tuple
+from game.large_board import LargeBoardLogic
+from game.logic import GameLogic
+
+MAGIC: bytes = b"BNGO"
+VERSION: int = 1
+# magic, 版本, 保留, grid_num, min_number, max_number, rounds_limit, rounds, 草稿數, 待抽數
+HEADER: struct.Struct = struct.Struct("<4sBBHIIIIII")
+DRAFT: struct.Struct = struct.Struct("<IH")  # 格子編號, 文字的 byte 數
+DELTA: struct.Struct = struct.Struct("<II")  # 抽完後的回合數, 抽到的格子編號
+CHECKSUM: struct.Struct = struct.Struct("<I")
+COMPACT_AFTER: int = 32  # 累積這麼多回合的 delta 就重寫一次完整的 snapshot
+
+
+# array 一律存成 little-endian
+def pack_array(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_array(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+# 格子上的數字存進 uint32 array(0 是空的)；不是標準整數寫法的輸入(空字串、"07"、打到一半的字)當草稿另外存
+def cell_contents(game: GameLogic) -> Tuple[array, Dict[int, str]]:
+    if isinstance(game, LargeBoardLogic):
+        return game.values, game.drafts
+    grid_num = game.grid_num
+    values = array("I", [0]) * (grid_num * grid_num)
+    drafts: Dict[int, str] = {}
+    for (x, y), text in game.player_inputs.items():
+        index = y * grid_num + x
+        if text.isascii() and text.isdigit() and text[0] != "0" and int(text) < 1 << 32:
+            values[index] = int(text)
+        else:
+            drafts[index] = text
+    return values, drafts
+
+
+# 棋盤上數字的 CRC32，線上模式重新連線時用來確認 client 與 server 記得的是同一張棋盤
+def board_hash(game: GameLogic) -> int:
+    return zlib.crc32(pack_array(cell_contents(game)[0]))
+
+
+# 格式：HEADER、每格的數字、草稿、選取狀態(每格 1 bit)、還沒抽的格子編號、最後是 CRC32
+def encode_snapshot(game: GameLogic) -> bytes:
+    grid_num = game.grid_num
+    cells = grid_num * grid_num
+    values, drafts = cell_contents(game)
+    used_cells = game.used_cells()
+    parts = [HEADER.pack(MAGIC, VERSION, 0, grid_num, game.min_number, game.max_number, game.rounds_limit,
+                         game.rounds, len(drafts), len(used_cells)),
+             pack_array(values)]
+    for index, text in drafts.items():
+        encoded = text.encode()
+        parts.append(DRAFT.pack(index, len(encoded)))
+        parts.append(encoded)
+    marks = bytearray((cells + 7) // 8)
+    for row in range(grid_num):
+        selected = game.selected[row]
+        for col in range(grid_num):
+            if selected[col]:
+                index = row * grid_num + col
+                marks[index >> 3] |= 1 << (index & 7)
+    parts.append(bytes(marks))
+    parts.append(pack_array(array("I", used_cells)))
+    data = b"".join(parts)
+    return data + CHECKSUM.pack(zlib.crc32(data))
+
+
+# 讀回同樣大小的棋盤；數字範圍與回合上限以存檔為準
+def restore_snapshot(game: GameLogic, data: bytes, deltas: bytes = b"") -> None:
+    if len(data) < HEADER.size + CHECKSUM.size:
+        raise ValueError("game snapshot is truncated")
+    body, (checksum,) = data[:-CHECKSUM.size], CHECKSUM.unpack_from(data, len(data) - CHECKSUM.size)
+    if zlib.crc32(body) != checksum:
+        raise ValueError("game snapshot checksum mismatch")
+    (magic, version, _, grid_num, min_number, max_number, rounds_limit, rounds, draft_count,
+     used_count) = HEADER.unpack_from(body)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"unsupported game snapshot version {version}")
+    if grid_num != game.grid_num:
+        raise ValueError(f"saved board is {grid_num}x{grid_num}, current board is {game.grid_num}x{game.grid_num}")
+
+    game.min_number, game.max_number, game.rounds_limit = min_number, max_number, rounds_limit
+    game.reset()
+    cells = grid_num * grid_num
+    offset = HEADER.size
+    values = unpack_array("I", body[offset:offset + 4 * cells])
+    offset += 4 * cells
+    for index, value in enumerate(values):
+        if value:
+            game.update_player_input(index % grid_num, index // grid_num, str(value))
+    for _ in range(draft_count):
+        index, length = DRAFT.unpack_from(body, offset)
+        offset += DRAFT.size
+        game.update_player_input(index % grid_num, index // grid_num, body[offset:offset + length].decode())
+        offset += length
+    marks = body[offset:offset + (cells + 7) // 8]
+    offset += len(marks)
+    for index in range(cells):
+        if marks[index >> 3] >> (index & 7) & 1:
+            game.selected[index // grid_num][index % grid_num] = True
+    game.set_used_cells(unpack_array("I", body[offset:offset + 4 * used_count]).tolist())
+    game.rounds = rounds
+    apply_deltas(game, deltas)
+
+
+def encode_delta(rounds: int, cell: int) -> bytes:
+    return DELTA.pack(rounds, cell)
+
+
+# 照原本的順序重做每一回合：從待抽的號碼拿掉那一格(跟抽號一樣 swap-pop)並標記
+def apply_deltas(game: GameLogic, deltas: bytes) -> None:
+    if len(deltas) % DELTA.size:
+        raise ValueError("game delta log is truncated")
+    grid_num = game.grid_num
+    for rounds, cell in DELTA.iter_unpack(deltas):
+        if rounds != game.rounds + 1 or cell >= grid_num * grid_num:
+            raise ValueError(f"game delta for round {rounds} does not follow round {game.rounds}")
+        value = game.grid[cell // grid_num][cell % grid_num]
+        if not game.remove_used(value):
+            raise ValueError(f"game delta draws {value!r}, which is not waiting to be drawn")
+        game.mark_drawn(value)
+        game.rounds = rounds
+
+
+def needs_compaction(delta_bytes: int) -> bool:
+    return delta_bytes >= COMPACT_AFTER * DELTA.size
+
+
+# UserSystem.load_game_state 的結果：新的 snapshot + delta，或是改版前存的 dict
+def restore_state(game: GameLogic, state: Dict[str, Any]) -> None:
+    if "snapshot" in state:
+        restore_snapshot(game, state["snapshot"], state.get("deltas") or b"")
+        return
+    if len(state["grid"]) != game.grid_num:
+        raise ValueError(f"saved board is {len(state['grid'])}x{len(state['grid'])}, "
+                         f"current board is {game.grid_num}x{game.grid_num}")
+    game.grid = state["grid"]
+    game.selected = state["selected"]
+    game.player_inputs = state["player_inputs"]
+    game.rounds = state["rounds"]
+    game.rebuild_index()
+    # 舊版在檢查棋盤前就建好待抽的號碼，可能混進空格，只留棋盤上真的有的
+    game.used_nums = [value for value in state["used_nums"] if game.cell_index(value) != -1]
@@ -1,10 +1,33 @@
-from db.database import UserSystem
+import argparse
+import os
+from functools import partial
+from db.database import DeferredUserSystem
+from db.event_log import EventLog
+from game.large_board import create_game
 from ui.start_window import *
 
 def main() -> None:
-    user_system = UserSystem()
-    start_window = StartWindow(user_system)
-    start_window.run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--grid-num", type=int, default=4)
+    parser.add_argument("--min-number", type=int, default=1)
+    parser.add_argument("--max-number", type=int, default=None, help="預設依棋盤大小推算，4x4 是 99")
+    parser.add_argument("--rounds", type=int, default=None, help="回合上限，預設是 grid-num 的兩倍")
+    parser.add_argument("--seed", type=int, default=None, help="第一局的 seed，之後每局的 seed 由前一局決定")
+    parser.add_argument("--event-log", default=os.environ.get("BINGO_EVENT_LOG"),
+                        help="把每局的輸入與抽號記到這個檔案，可以用 replay.py 重播")
+    args = parser.parse_args()
+
+    # 資料庫連線等第一個視窗畫出來之後才在背景建立，離線直接玩不用等
+    user_system = DeferredUserSystem()
+    event_log = EventLog(args.event_log) if args.event_log else None
+    game_factory = partial(create_game, args.grid_num, args.min_number, args.max_number, args.rounds, args.seed)
+    start_window = StartWindow(user_system, game_factory, event_log)
+    start_window.window.after_idle(user_system.start)
+    try:
+        start_window.run()
+    finally:
+        if event_log:
+            event_log.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import resource
+import socket
+import time
+from typing import Optional
+from network import broadcast, log, metrics
+from network.broadcast import DISCONNECT, DROP, MAX_QUEUE_BYTES
+from network.connection import Connection
+from network.hub import ROUND_TICK, GameHub
+from network.protocol import FrameDecoder, ProtocolError
+
+
+class StreamConnection(Connection):
+    def __init__(self, writer: asyncio.StreamWriter, max_queue_bytes: int = MAX_QUEUE_BYTES,
+                 slow_client_policy: str = DISCONNECT):
+        peer = writer.get_extra_info("peername")
+        super().__init__(f"{peer[0]}:{peer[1]}" if peer else "unknown")
+        self.writer: asyncio.StreamWriter = writer
+        self.max_queue_bytes: int = max_queue_bytes
+        self.slow_client_policy: str = slow_client_policy
+
+    # transport 會先嘗試直接送出，送不完的留在它的 buffer，這裡只限制 buffer 大小
+    def send(self, data: bytes) -> None:
+        if self.writer.is_closing():
+            return
+        queued = self.writer.transport.get_write_buffer_size()
+        if queued + len(data) > self.max_queue_bytes:
+            broadcast.stats.record_overflow(self.slow_client_policy)
+            if self.slow_client_policy == DROP:
+                return
+            self.writer.transport.abort()
+            return
+        self.writer.write(data)
+        metrics.count_sent(data)
+        broadcast.stats.record_queue(queued + len(data))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+# 單一 event loop 處理所有連線，不再每個玩家一條 thread
+class AsyncGameServer:
+    def __init__(self, host: str = 'localhost', port: int = 12345, hub: Optional[GameHub] = None, backlog: int = 1024,
+                 sweep_interval: float = 10.0, reuse_port: bool = False, sock: Optional[socket.socket] = None,
+                 max_queue_bytes: int = MAX_QUEUE_BYTES, slow_client_policy: str = DISCONNECT):
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.sweep_interval = sweep_interval
+        self.max_queue_bytes = max_queue_bytes
+        self.slow_client_policy = slow_client_policy
+        self.reuse_port = reuse_port
+        self.sock = sock  # 多 process 模式下由 launcher 先建立好的 listen socket
+        self.hub: GameHub = hub or GameHub()
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def serve(self) -> None:
+        if self.sock is not None:
+            self.server = await asyncio.start_server(self.handle_client, sock=self.sock, backlog=self.backlog)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, self.host, self.port, backlog=self.backlog,
+                                                     reuse_port=self.reuse_port or None)
+        log.event("server_started", engine="async", host=self.host, port=self.port)
+        sweeper = asyncio.create_task(self.sweep_rooms())
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            sweeper.cancel()
+
+    # 定期檢查回合時限、清掉閒置的房間
+    async def sweep_rooms(self) -> None:
+        last_sweep = time.monotonic()
+        while True:
+            await asyncio.sleep(ROUND_TICK)
+            self.hub.expire_rounds()
+            if time.monotonic() - last_sweep >= self.sweep_interval:
+                last_sweep = time.monotonic()
+                self.hub.sweep()
+                metrics.log_stats()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = StreamConnection(writer, self.max_queue_bytes, self.slow_client_policy)
+        log.sample("client_connected", peer=client.peer)
+        self.hub.connect(client)
+        decoder = FrameDecoder()
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                for msg_type, payload in decoder.feed(data):
+                    self.hub.handle_message(client, msg_type, payload)
+        except ProtocolError as e:
+            log.event("protocol_error", logging.WARNING, peer=client.peer, error=e)
+        except (ConnectionError, OSError) as e:
+            log.event("connection_error", peer=client.peer, error=e)
+        finally:
+            self.hub.disconnect(client)
+            client.close()
+
+    def start(self) -> None:
+        raise_fd_limit()
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+    def close(self) -> None:
+        if self.server:
+            self.server.close()
+
+
+# 上千個連線需要足夠的 file descriptor
+def raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = 65536 if hard == resource.RLIM_INFINITY else hard
+    if soft < target:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
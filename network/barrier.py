@@ -0,0 +1,115 @@
+import threading
+import time
+from typing import Hashable, Optional, Set, Tuple
+from network import metrics
+
+
+class BarrierStats:
+    def __init__(self):
+        self.lock: threading.Lock = threading.Lock()
+        self.rounds: int = 0
+        self.timed_out: int = 0
+        self.advance_seconds: float = 0.0
+        self.max_advance_seconds: float = 0.0
+
+    def record_advance(self, seconds: float, timed_out: bool) -> None:
+        with self.lock:
+            self.rounds += 1
+            self.timed_out += timed_out
+            self.advance_seconds += seconds
+            if seconds > self.max_advance_seconds:
+                self.max_advance_seconds = seconds
+        metrics.round_wait_seconds.observe(seconds, "timeout" if timed_out else "complete")
+
+    def summary(self) -> str:
+        mean_ms = self.advance_seconds / self.rounds * 1000 if self.rounds else 0.0
+        return (f"rounds: {self.rounds} advanced ({self.timed_out} by timeout), "
+                f"first arrival to advance mean {mean_ms:.2f}ms max {self.max_advance_seconds * 1000:.2f}ms")
+
+
+stats: BarrierStats = BarrierStats()
+
+
+# 一個房間的回合同步：所有成員都 arrive 才進下一回合
+# arrive/leave/join 都是 O(1)；回合進行中才加入的人下一回合才算，不會卡住這一回合
+class RoundBarrier:
+    def __init__(self, timeout: Optional[float] = None):
+        self.lock: threading.Lock = threading.Lock()
+        self.timeout: Optional[float] = timeout
+        self.members: Set[Hashable] = set()
+        self.late_joiners: Set[Hashable] = set()
+        self.arrived: Set[Hashable] = set()
+        self.round: int = 0
+        self.round_started: Optional[float] = None  # 這回合第一個人 arrive 的時間
+        self.deadline: Optional[float] = None
+
+    def join(self, member: Hashable) -> None:
+        with self.lock:
+            if self.arrived:
+                self.late_joiners.add(member)
+            else:
+                self.members.add(member)
+
+    # 回傳這次離開是否讓回合剛好完成
+    def leave(self, member: Hashable) -> bool:
+        with self.lock:
+            self.late_joiners.discard(member)
+            if member not in self.members:
+                return False
+            self.members.discard(member)
+            self.arrived.discard(member)
+            return self._try_advance_locked()
+
+    # 斷線的人在同一回合內接回來：直接回到這回合的成員，已經完成過的照樣算完成
+    def resume(self, member: Hashable, arrived: bool) -> bool:
+        with self.lock:
+            self.late_joiners.discard(member)
+            self.members.add(member)
+            if arrived:
+                if not self.arrived:
+                    self.round_started = time.monotonic()
+                self.arrived.add(member)
+            return self._try_advance_locked()
+
+    # 回傳 (已完成人數, 是否進入下一回合)，不是這回合成員的 arrive 不算
+    def arrive(self, member: Hashable) -> Tuple[int, bool]:
+        with self.lock:
+            if member not in self.members:
+                return len(self.arrived), False
+            if not self.arrived:
+                self.round_started = time.monotonic()
+                if self.timeout is not None:
+                    self.deadline = self.round_started + self.timeout
+            self.arrived.add(member)
+            count = len(self.arrived)
+            return count, self._try_advance_locked()
+
+    # 回合超時：沒完成的人直接略過，回傳是否因此進入下一回合
+    def expire(self, now: Optional[float] = None) -> bool:
+        with self.lock:
+            if self.deadline is None or not self.arrived:
+                return False
+            if (time.monotonic() if now is None else now) < self.deadline:
+                return False
+            self._advance_locked(timed_out=True)
+            return True
+
+    def waiting(self) -> int:
+        return len(self.members) - len(self.arrived)
+
+    def _try_advance_locked(self) -> bool:
+        if self.arrived and len(self.arrived) == len(self.members):
+            self._advance_locked(timed_out=False)
+            return True
+        return False
+
+    def _advance_locked(self, timed_out: bool) -> None:
+        if self.round_started is not None:
+            stats.record_advance(time.monotonic() - self.round_started, timed_out)
+        self.round += 1
+        self.arrived.clear()
+        self.round_started = None
+        self.deadline = None
+        if self.late_joiners:
+            self.members |= self.late_joiners
+            self.late_joiners.clear()
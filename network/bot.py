@@ -0,0 +1,218 @@
+import asyncio
+import random
+import time
+from typing import Callable, List, Optional, Tuple
+from game.large_board import create_game
+from game.logic import GameLogic
+from game.optimizer import BoardConfig, random_board
+from game.snapshot import board_hash, cell_contents
+from network.protocol import (PLAYER_STATE, ROUND_DRAW, FrameDecoder, MessageType, decode_count, encode,
+                              encode_board)
+from network.session import ClientSession
+
+ROUND_TIMEOUT: float = 30.0  # 等不到 ROUND_COMPLETE 就當作失敗
+
+
+# 一群 bot 的統計，不同 process 的結果可以 merge
+class BotStats:
+    def __init__(self):
+        self.connected: int = 0
+        self.connect_seconds: float = 0.0  # 建立所有連線花的時間
+        self.play_seconds: float = 0.0  # 開始玩到所有 bot 結束
+        self.sent: int = 0
+        self.received: int = 0
+        self.sent_bytes: int = 0
+        self.received_bytes: int = 0
+        self.round_latencies: List[float] = []  # 送出 ROUND_END 到收到 ROUND_COMPLETE
+        self.wins: int = 0
+        self.losses: int = 0
+        self.hits: int = 0  # server 抽的號碼剛好在自己棋盤上的次數
+        self.errors: int = 0
+
+    def merge(self, other: "BotStats") -> None:
+        self.connected += other.connected
+        self.connect_seconds = max(self.connect_seconds, other.connect_seconds)
+        self.play_seconds = max(self.play_seconds, other.play_seconds)
+        self.sent += other.sent
+        self.received += other.received
+        self.sent_bytes += other.sent_bytes
+        self.received_bytes += other.received_bytes
+        self.round_latencies += other.round_latencies
+        self.wins += other.wins
+        self.losses += other.losses
+        self.hits += other.hits
+        self.errors += other.errors
+
+    def percentile(self, fraction: float) -> float:
+        latencies = sorted(self.round_latencies)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+# 不需要 pygame 的線上玩家：跟 GameUI 一樣 login、填棋盤、每回合套用 server 抽的號碼後送 round_end，
+# 分出勝負時回報 win/lose 再開新的一局
+class BotClient:
+    def __init__(self, name: str, game: GameLogic, stats: BotStats, rng: Optional[random.Random] = None):
+        self.name: str = name
+        self.game: GameLogic = game
+        self.stats: BotStats = stats
+        self.rng: random.Random = rng or random.Random()
+        self.decoder: FrameDecoder = FrameDecoder()
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.room_id: Optional[int] = None
+        self.player_count: int = 0
+        self.session: ClientSession = ClientSession()
+        self.draw: Optional[Tuple[int, int]] = None  # 還沒套用的 (房間回合, 號碼)
+        self.drawn_round: int = -1
+
+    async def connect(self, host: str, port: int) -> None:
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.decoder = FrameDecoder()
+        self.send(MessageType.LOGIN, self.name.encode())
+        await self.writer.drain()
+        await self.wait_for(MessageType.ROOM_JOINED)
+        self.new_game()
+
+    # 斷線後重連：resume 為 True 時用 token 接回原本的座位與這一局，失敗或 False 就重新 login 開新局
+    # 回傳是否接回原本的座位
+    async def reconnect(self, host: str, port: int, resume: bool = True) -> bool:
+        self.close()
+        request = self.session.resume_request() if resume else None
+        if request is None:
+            await self.connect(host, port)
+            return False
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.decoder = FrameDecoder()
+        self.send(MessageType.RESUME, request)
+        await self.writer.drain()
+        if await self.wait_for(MessageType.RESUME, MessageType.RESUME_FAILED) == MessageType.RESUME:
+            return True
+        self.send(MessageType.LOGIN, self.name.encode())
+        await self.writer.drain()
+        await self.wait_for(MessageType.ROOM_JOINED)
+        self.new_game()
+        return False
+
+    # 跟按 Suggest 再按 Confirm 一樣：隨機的合法棋盤
+    def new_game(self) -> None:
+        game = self.game
+        game.reset()
+        config = BoardConfig(game.grid_num, game.min_number, game.max_number, game.rounds_limit)
+        for cell, value in enumerate(random_board(config, self.rng)):
+            x, y = divmod(cell, game.grid_num)
+            game.update_player_input(y, x, str(value))
+        game.start_draws()
+        self.send(MessageType.BOARD, encode_board(cell_contents(game)[0]))
+
+    def send(self, msg_type: MessageType, payload: bytes = b"") -> None:
+        data = encode(msg_type, payload)
+        self.writer.write(data)
+        self.stats.sent += 1
+        self.stats.sent_bytes += len(data)
+
+    # 等到收到其中一種訊息，回傳收到的是哪一種
+    async def wait_for(self, *msg_types: MessageType) -> MessageType:
+        while True:
+            data = await self.reader.read(65536)
+            if not data:
+                raise ConnectionError("server closed the connection")
+            self.stats.received_bytes += len(data)
+            found = None
+            for frame_type, payload in self.decoder.feed(data):
+                self.stats.received += 1
+                state = self.session.observe(frame_type, payload)
+                if frame_type == MessageType.ROOM_JOINED:
+                    self.room_id = decode_count(payload)
+                    self.draw, self.drawn_round = None, -1
+                elif frame_type == MessageType.DRAW:
+                    draw = ROUND_DRAW.unpack(payload)
+                    if draw[0] > self.drawn_round:
+                        self.draw = draw
+                elif frame_type == MessageType.PLAYER_COUNT:
+                    self.player_count = decode_count(payload)
+                elif state is not None:
+                    self.room_id, self.player_count = state.room_id, state.players
+                if found is None and frame_type in msg_types:
+                    found = frame_type
+            if found is not None:
+                return found
+
+    # 舊回合補送的號碼不算，等到新的為止
+    async def next_draw(self) -> None:
+        while self.draw is None:
+            await self.wait_for(MessageType.DRAW)
+
+    # 一回合：等 server 這回合的號碼、標記、判斷勝負，再等房間裡所有人都完成
+    async def play_round(self, think: float = 0.0) -> None:
+        game = self.game
+        if self.draw is None:
+            await asyncio.wait_for(self.next_draw(), ROUND_TIMEOUT)
+        self.drawn_round, number = self.draw
+        self.draw = None
+        self.stats.hits += game.apply_draw(str(number))
+        game.rounds += 1
+        outcome = game.check_game_finish()
+        if outcome == "win":
+            self.stats.wins += 1
+            self.send(MessageType.WIN, self.name.encode())
+        elif outcome == "lose":
+            self.stats.losses += 1
+            self.send(MessageType.LOSE, self.name.encode())
+        if outcome:
+            self.new_game()
+        if think:
+            await asyncio.sleep(self.rng.uniform(0, think))
+        start = time.perf_counter()
+        self.send(MessageType.ROUND_END, PLAYER_STATE.pack(game.rounds, board_hash(game)))
+        await self.writer.drain()
+        await asyncio.wait_for(self.wait_for(MessageType.ROUND_COMPLETE), ROUND_TIMEOUT)
+        self.stats.round_latencies.append(time.perf_counter() - start)
+
+    async def play(self, rounds: int, think: float = 0.0) -> None:
+        try:
+            for _ in range(rounds):
+                await self.play_round(think)
+        except (ConnectionError, OSError, asyncio.TimeoutError):
+            self.stats.errors += 1
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+# 一個 event loop 裡跑 count 個 bot：先全部連上(最多 concurrency 個同時連)，ready 之後一起開始玩
+async def run_bots(host: str, port: int, count: int, rounds: int, concurrency: int = 200, prefix: str = "bot",
+                   grid_num: int = 4, think: float = 0.0, seed: Optional[int] = None,
+                   ready: Optional[Callable[[], None]] = None) -> BotStats:
+    stats = BotStats()
+    rng = random.Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    bots = [BotClient(f"{prefix}{index}", create_game(grid_num, seed=rng.randrange(1 << 32)), stats,
+                      random.Random(rng.randrange(1 << 32))) for index in range(count)]
+
+    async def connect(bot: BotClient) -> bool:
+        async with semaphore:
+            try:
+                await bot.connect(host, port)
+            except (ConnectionError, OSError):
+                stats.errors += 1
+                return False
+            return True
+
+    start = time.perf_counter()
+    connected = await asyncio.gather(*(connect(bot) for bot in bots))
+    stats.connect_seconds = time.perf_counter() - start
+    bots = [bot for bot, ok in zip(bots, connected) if ok]
+    stats.connected = len(bots)
+    if ready is not None:
+        # 例如等其他 process 的 bot 也都連上，會卡住所以丟到 thread
+        await asyncio.get_running_loop().run_in_executor(None, ready)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bot.play(rounds, think) for bot in bots))
+    stats.play_seconds = time.perf_counter() - start
+    for bot in bots:
+        bot.close()
+    return stats
@@ -0,0 +1,184 @@
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Iterable, List, Optional, Union
+from network import metrics
+from network.connection import Connection
+
+# 送不完的資料超過上限時怎麼處理慢的玩家
+DISCONNECT: str = "disconnect"  # 直接斷線，不讓他拖慢整個房間
+DROP: str = "drop"              # 丟掉這則訊息
+POLICIES: List[str] = [DISCONNECT, DROP]
+
+MAX_QUEUE_BYTES: int = 256 * 1024
+SEND_BATCH: int = 64
+MSG_DONTWAIT: int = getattr(socket, "MSG_DONTWAIT", 0)
+
+
+class BroadcastStats:
+    def __init__(self):
+        self.lock: threading.Lock = threading.Lock()
+        self.fanouts: int = 0
+        self.recipients: int = 0
+        self.fanout_seconds: float = 0.0
+        self.max_fanout_seconds: float = 0.0
+        self.max_queue_bytes: int = 0
+        self.dropped: int = 0
+        self.disconnected: int = 0
+
+    def record_fanout(self, recipients: int, seconds: float) -> None:
+        with self.lock:
+            self.fanouts += 1
+            self.recipients += recipients
+            self.fanout_seconds += seconds
+            if seconds > self.max_fanout_seconds:
+                self.max_fanout_seconds = seconds
+        metrics.fanout_seconds.observe(seconds)
+
+    def record_queue(self, depth: int) -> None:
+        if depth > self.max_queue_bytes:
+            self.max_queue_bytes = depth
+
+    def record_overflow(self, policy: str) -> None:
+        with self.lock:
+            if policy == DROP:
+                self.dropped += 1
+            else:
+                self.disconnected += 1
+
+    def summary(self) -> str:
+        mean_us = self.fanout_seconds / self.fanouts * 1e6 if self.fanouts else 0.0
+        return (f"broadcast: {self.fanouts} fan-outs to {self.recipients} clients, "
+                f"mean {mean_us:.1f}us max {self.max_fanout_seconds * 1e6:.1f}us, "
+                f"max queue {self.max_queue_bytes} bytes, dropped {self.dropped}, disconnected {self.disconnected}")
+
+
+stats: BroadcastStats = BroadcastStats()
+
+
+# 封包只編碼一次，依序放進每個人的送出佇列
+def fanout(message: bytes, recipients: Iterable[Connection]) -> None:
+    start = time.perf_counter()
+    count = 0
+    for client in recipients:
+        client.send(message)
+        count += 1
+    stats.record_fanout(count, time.perf_counter() - start)
+
+
+# thread server 用：每條連線一個有上限的佇列，用 non-blocking sendmsg 一次送出多個封包，
+# 送不完的交給 SocketFlusher 等 socket 可寫時再送
+class SocketOutbox:
+    def __init__(self, sock: socket.socket, flusher: "SocketFlusher", on_overflow: Callable[[], None],
+                 max_bytes: int = MAX_QUEUE_BYTES, policy: str = DISCONNECT):
+        self.socket: socket.socket = sock
+        self.flusher: "SocketFlusher" = flusher
+        self.on_overflow: Callable[[], None] = on_overflow
+        self.max_bytes: int = max_bytes
+        self.policy: str = policy
+        self.frames: Deque[Union[bytes, memoryview]] = deque()
+        self.queued_bytes: int = 0
+        self.lock: threading.Lock = threading.Lock()
+        self.closed: bool = False
+
+    def put(self, data: bytes) -> None:
+        with self.lock:
+            if self.closed:
+                return
+            if self.queued_bytes + len(data) > self.max_bytes:
+                overflow = True
+            else:
+                overflow = False
+                self.frames.append(data)
+                self.queued_bytes += len(data)
+                stats.record_queue(self.queued_bytes)
+                self._send_locked()
+                waiting = bool(self.frames)
+        if overflow:
+            stats.record_overflow(self.policy)
+            if self.policy == DISCONNECT:
+                self.on_overflow()
+        elif waiting:
+            self.flusher.watch(self)
+
+    # socket 可寫時由 flusher 呼叫，回傳是否已經送完
+    def flush(self) -> bool:
+        with self.lock:
+            if self.closed:
+                return True
+            self._send_locked()
+            return not self.frames
+
+    def close(self) -> None:
+        with self.lock:
+            self.closed = True
+            self.frames.clear()
+            self.queued_bytes = 0
+
+    def _send_locked(self) -> None:
+        while self.frames:
+            batch = [self.frames[i] for i in range(min(SEND_BATCH, len(self.frames)))]
+            try:
+                sent = self.socket.sendmsg(batch, [], MSG_DONTWAIT)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                self.closed = True
+                self.frames.clear()
+                return
+            self.queued_bytes -= sent
+            while sent:
+                head = self.frames[0]
+                if len(head) <= sent:
+                    sent -= len(head)
+                    self.frames.popleft()
+                else:
+                    self.frames[0] = memoryview(head)[sent:]
+                    sent = 0
+
+
+# 一條 thread 用 selector 等所有還有資料沒送完的 socket
+class SocketFlusher:
+    def __init__(self):
+        self.selector: selectors.BaseSelector = selectors.DefaultSelector()
+        self.pending: Deque[SocketOutbox] = deque()
+        self.waker_r, self.waker_w = socket.socketpair()
+        self.waker_r.setblocking(False)
+        self.waker_w.setblocking(False)
+        self.selector.register(self.waker_r, selectors.EVENT_READ)
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def watch(self, outbox: SocketOutbox) -> None:
+        self.pending.append(outbox)
+        try:
+            self.waker_w.send(b"\0")
+        except BlockingIOError:
+            pass
+
+    def run(self) -> None:
+        while True:
+            for key, _ in self.selector.select():
+                if key.fileobj is self.waker_r:
+                    try:
+                        self.waker_r.recv(4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                if key.data.flush():
+                    self.selector.unregister(key.fileobj)
+            while self.pending:
+                outbox = self.pending.popleft()
+                try:
+                    self.selector.register(outbox.socket, selectors.EVENT_WRITE, outbox)
+                except KeyError:
+                    # 已經在等了，或是舊的連線關掉後 fd 被新連線重複使用，重新註冊
+                    self.selector.unregister(outbox.socket)
+                    self.selector.register(outbox.socket, selectors.EVENT_WRITE, outbox)
+                except (ValueError, OSError):
+                    pass  # socket 已經關閉
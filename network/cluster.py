@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import struct
+import sys
+import time
+from enum import IntEnum
+from multiprocessing.synchronize import Event
+from typing import Dict, List, Optional
+from db.event_log import EventLog
+from network import log, metrics
+from network.async_server import AsyncGameServer, raise_fd_limit
+from network.broadcast import DISCONNECT, MAX_QUEUE_BYTES, fanout
+from network.connection import Connection
+from network.hub import ROUND_TICK, GameHub
+from network.protocol import FrameDecoder, MessageType, ProtocolError, encode
+from network.room import RoomRegistry
+
+
+# 多 process 模式：N 個 worker 共用同一個 port 收連線，
+# 房間與回合狀態全部放在 broker process 的 GameHub，worker 只負責收發封包
+class BrokerMessage(IntEnum):
+    OPEN = 1     # worker -> broker: 新連線
+    CLOSE = 2    # worker -> broker: 連線中斷
+    CLIENT = 3   # worker -> broker: 玩家送來的封包
+    DELIVER = 4  # broker -> worker: 把同一個封包送給多個連線
+    KICK = 5     # broker -> worker: 關閉連線
+
+
+CONN_ID: struct.Struct = struct.Struct("!Q")
+CLIENT_HEADER: struct.Struct = struct.Struct("!QB")
+DELIVER_COUNT: struct.Struct = struct.Struct("!H")
+WORKER_ID_SHIFT: int = 40
+
+
+def default_broker_path(port: int) -> str:
+    return f"/tmp/bingo-broker-{port}.sock"
+
+
+# broker 裡代表某個 worker 上的一條連線
+class RemoteConnection(Connection):
+    def __init__(self, link: "WorkerLink", conn_id: int):
+        super().__init__(f"worker{conn_id >> WORKER_ID_SHIFT}/{conn_id & ((1 << WORKER_ID_SHIFT) - 1)}")
+        self.link: "WorkerLink" = link
+        self.conn_id: int = conn_id
+
+    def send(self, data: bytes) -> None:
+        metrics.count_sent(data)
+        self.link.deliver(data, self.conn_id)
+
+    def close(self) -> None:
+        self.link.write(encode(BrokerMessage.KICK, CONN_ID.pack(self.conn_id)))
+
+
+class WorkerLink:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer: asyncio.StreamWriter = writer
+        self.pending: List[list] = []  # [封包, [conn_id, ...]]
+        self.flush_scheduled: bool = False
+
+    # 廣播時同一個封包會連續送給很多人，合併成一個 DELIVER，這一輪 event loop 結束時再送出
+    def deliver(self, data: bytes, conn_id: int) -> None:
+        if self.pending and self.pending[-1][0] is data and len(self.pending[-1][1]) < 0xFFFF:
+            self.pending[-1][1].append(conn_id)
+        else:
+            self.pending.append([data, [conn_id]])
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self) -> None:
+        self.flush_scheduled = False
+        pending, self.pending = self.pending, []
+        for data, conn_ids in pending:
+            ids = struct.pack(f"!{len(conn_ids)}Q", *conn_ids)
+            self.write(encode(BrokerMessage.DELIVER, DELIVER_COUNT.pack(len(conn_ids)) + ids + data))
+
+    def write(self, data: bytes) -> None:
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+
+class RoomBroker:
+    def __init__(self, path: str, hub: Optional[GameHub] = None, sweep_interval: float = 10.0):
+        self.path: str = path
+        self.hub: GameHub = hub or GameHub()
+        self.sweep_interval: float = sweep_interval
+        self.connections: Dict[int, RemoteConnection] = {}
+
+    async def serve(self, ready: Optional[Event] = None) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self.handle_worker, self.path)
+        log.event("broker_started", path=self.path)
+        if ready is not None:
+            ready.set()
+        last_sweep = time.monotonic()
+        async with server:
+            while True:
+                await asyncio.sleep(ROUND_TICK)
+                self.hub.expire_rounds()
+                if time.monotonic() - last_sweep >= self.sweep_interval:
+                    last_sweep = time.monotonic()
+                    self.hub.sweep()
+                    metrics.log_stats()
+
+    async def handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        link = WorkerLink(writer)
+        decoder = FrameDecoder(types=BrokerMessage)
+        owned: Dict[int, RemoteConnection] = {}
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for msg_type, payload in decoder.feed(data):
+                    self.dispatch(link, owned, msg_type, payload)
+        except (ProtocolError, ConnectionError) as e:
+            log.event("worker_link_error", logging.WARNING, error=e)
+        finally:
+            # worker 掛掉時它的玩家全部視為離線
+            for client in list(owned.values()):
+                self.connections.pop(client.conn_id, None)
+                self.hub.disconnect(client)
+            writer.close()
+
+    def dispatch(self, link: WorkerLink, owned: Dict[int, RemoteConnection], msg_type: BrokerMessage,
+                 payload: bytes) -> None:
+        if msg_type == BrokerMessage.CLIENT:
+            conn_id, client_type = CLIENT_HEADER.unpack_from(payload)
+            client = self.connections.get(conn_id)
+            if client is not None:
+                self.hub.handle_message(client, MessageType(client_type), payload[CLIENT_HEADER.size:])
+        elif msg_type == BrokerMessage.OPEN:
+            conn_id = CONN_ID.unpack(payload)[0]
+            client = RemoteConnection(link, conn_id)
+            self.connections[conn_id] = client
+            owned[conn_id] = client
+            self.hub.connect(client)
+        elif msg_type == BrokerMessage.CLOSE:
+            conn_id = CONN_ID.unpack(payload)[0]
+            client = self.connections.pop(conn_id, None)
+            owned.pop(conn_id, None)
+            if client is not None:
+                self.hub.disconnect(client)
+
+
+# worker 端的 hub：跟 GameHub 介面一樣，但把事件轉給 broker
+class BrokerClient:
+    def __init__(self, worker_id: int, path: str):
+        self.worker_id: int = worker_id
+        self.path: str = path
+        self.next_id: int = 0
+        self.ids: Dict[Connection, int] = {}
+        self.clients: Dict[int, Connection] = {}
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect_broker(self) -> None:
+        reader, self.writer = await asyncio.open_unix_connection(self.path)
+        asyncio.create_task(self.receive(reader))
+
+    async def receive(self, reader: asyncio.StreamReader) -> None:
+        decoder = FrameDecoder(types=BrokerMessage)
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                log.event("broker_lost", logging.ERROR, worker=self.worker_id)
+                log.stop()
+                os._exit(1)
+            for msg_type, payload in decoder.feed(data):
+                if msg_type == BrokerMessage.DELIVER:
+                    count = DELIVER_COUNT.unpack_from(payload)[0]
+                    offset = DELIVER_COUNT.size + count * CONN_ID.size
+                    conn_ids = struct.unpack_from(f"!{count}Q", payload, DELIVER_COUNT.size)
+                    clients = (self.clients.get(conn_id) for conn_id in conn_ids)
+                    fanout(payload[offset:], (client for client in clients if client is not None))
+                elif msg_type == BrokerMessage.KICK:
+                    client = self.clients.get(CONN_ID.unpack(payload)[0])
+                    if client is not None:
+                        client.close()
+
+    def connect(self, client: Connection) -> None:
+        conn_id = (self.worker_id << WORKER_ID_SHIFT) | self.next_id
+        self.next_id += 1
+        self.ids[client] = conn_id
+        self.clients[conn_id] = client
+        self.writer.write(encode(BrokerMessage.OPEN, CONN_ID.pack(conn_id)))
+
+    def disconnect(self, client: Connection) -> None:
+        conn_id = self.ids.pop(client, None)
+        if conn_id is None:
+            return
+        self.clients.pop(conn_id, None)
+        self.writer.write(encode(BrokerMessage.CLOSE, CONN_ID.pack(conn_id)))
+
+    def handle_message(self, client: Connection, msg_type: MessageType, payload: bytes) -> None:
+        conn_id = self.ids.get(client)
+        if conn_id is not None:
+            self.writer.write(encode(BrokerMessage.CLIENT, CLIENT_HEADER.pack(conn_id, msg_type) + payload))
+
+    # 房間與回合時限由 broker 處理
+    def expire_rounds(self) -> None:
+        pass
+
+    def sweep(self) -> None:
+        pass
+
+
+def run_broker(path: str, room_size: int, idle_timeout: float, round_timeout: Optional[float],
+               ready: Event, event_log_path: Optional[str] = None, metrics_port: Optional[int] = None) -> None:
+    # 房間狀態只在 broker，event log 與 metrics 也只由 broker 負責
+    event_log = EventLog(event_log_path) if event_log_path else None
+    broker = RoomBroker(path, GameHub(RoomRegistry(room_size, idle_timeout, round_timeout), event_log))
+    if metrics_port is not None:
+        broker.hub.export_metrics()
+        metrics.MetricsServer("localhost", metrics_port).start()
+    try:
+        asyncio.run(broker.serve(ready))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_worker(worker_id: int, host: str, port: int, path: str, sock: Optional[socket.socket],
+               max_queue_bytes: int, slow_client_policy: str) -> None:
+    raise_fd_limit()
+
+    async def main() -> None:
+        hub = BrokerClient(worker_id, path)
+        await hub.connect_broker()
+        server = AsyncGameServer(host, port, hub, reuse_port=sock is None, sock=sock,
+                                 max_queue_bytes=max_queue_bytes, slow_client_policy=slow_client_policy)
+        await server.serve()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+# 沒有 SO_REUSEPORT 的平台改成先建立 listen socket，fork 後大家一起 accept
+def shared_listen_socket(host: str, port: int, backlog: int = 1024) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+class ClusterLauncher:
+    def __init__(self, host: str = 'localhost', port: int = 12345, workers: int = 0, room_size: int = 4,
+                 idle_timeout: float = 300.0, broker_path: Optional[str] = None, round_timeout: Optional[float] = None,
+                 max_queue_bytes: int = MAX_QUEUE_BYTES, slow_client_policy: str = DISCONNECT,
+                 event_log_path: Optional[str] = None, metrics_port: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.room_size = room_size
+        self.idle_timeout = idle_timeout
+        self.round_timeout = round_timeout
+        self.broker_path = broker_path or default_broker_path(port)
+        self.max_queue_bytes = max_queue_bytes
+        self.slow_client_policy = slow_client_policy
+        self.event_log_path = event_log_path
+        self.metrics_port = metrics_port
+        self.processes: List[multiprocessing.Process] = []
+
+    def start(self) -> None:
+        context = multiprocessing.get_context("fork")
+        ready = context.Event()
+        broker = context.Process(target=run_broker, name="bingo-broker",
+                                 args=(self.broker_path, self.room_size, self.idle_timeout, self.round_timeout, ready,
+                                       self.event_log_path, self.metrics_port))
+        broker.start()
+        self.processes.append(broker)
+        if not ready.wait(10):
+            self.stop()
+            raise RuntimeError("room broker did not start")
+
+        sock = None if hasattr(socket, "SO_REUSEPORT") else shared_listen_socket(self.host, self.port)
+        for worker_id in range(self.workers):
+            worker = context.Process(target=run_worker, name=f"bingo-worker-{worker_id}",
+                                     args=(worker_id, self.host, self.port, self.broker_path, sock,
+                                           self.max_queue_bytes, self.slow_client_policy))
+            worker.start()
+            self.processes.append(worker)
+        log.event("server_started", engine="cluster", workers=self.workers, host=self.host, port=self.port)
+
+        # 被 kill 時也要把子 process 收掉
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            while all(process.is_alive() for process in self.processes):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    # 先收 worker 再收 broker，正常結束時 worker 不會以為 broker 掛了
+    def stop(self) -> None:
+        for process in reversed(self.processes):
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for process in self.processes:
+            process.join()
+        if os.path.exists(self.broker_path):
+            os.unlink(self.broker_path)
@@ -0,0 +1,10 @@
+# 一條玩家連線，thread/asyncio server 各自實作 send/close
+class Connection:
+    def __init__(self, peer: str):
+        self.peer: str = peer
+
+    def send(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
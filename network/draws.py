@@ -0,0 +1,102 @@
+import math
+import random
+from array import array
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+# server 留的棋盤副本：數字 -> 格子、每格有沒有標記、每條線標記了幾格，驗證勝利是 O(1)
+# 每回合只套用一次 server 抽的號碼，跟 client 按 Get 的次數對得上
+class BoardCopy:
+    def __init__(self, values: array):
+        grid_num = math.isqrt(len(values))
+        if grid_num * grid_num != len(values):
+            raise ValueError(f"board of {len(values)} cells is not square")
+        self.grid_num: int = grid_num
+        self.cell_of: Dict[int, int] = {value: index for index, value in enumerate(values) if value}
+        self.marks: bytearray = bytearray(len(values))
+        # 跟 LargeBoardLogic 一樣：前 grid_num 個是橫列，接著直行，最後兩條對角線
+        self.line_counts: array = array("H", [0]) * (2 * grid_num + 2)
+        self.won: bool = False
+        self.applied_round: int = -1
+
+    # 回傳這個號碼有沒有在棋盤上
+    def apply(self, round_number: int, number: int) -> bool:
+        if round_number == self.applied_round:
+            return False
+        self.applied_round = round_number
+        index = self.cell_of.get(number)
+        if index is None or self.marks[index]:
+            return index is not None
+        self.marks[index] = 1
+        grid_num = self.grid_num
+        row, col = divmod(index, grid_num)
+        lines = [row, grid_num + col]
+        if row == col:
+            lines.append(2 * grid_num)
+        if row == grid_num - 1 - col:
+            lines.append(2 * grid_num + 1)
+        for line in lines:
+            self.line_counts[line] += 1
+            if self.line_counts[line] == grid_num:
+                self.won = True
+        return True
+
+
+# 一個房間的抽號：號碼從所有登記過的棋盤數字裡不重複地抽，抽完再從頭來
+# 用房間自己的 seed，同樣的輸入順序重播時抽到的號碼一模一樣
+class DrawScheduler:
+    def __init__(self, seed: int):
+        self.seed: int = seed
+        self.rng: random.Random = random.Random(seed)
+        self.boards: Dict[Hashable, BoardCopy] = {}
+        self.pool: List[int] = []  # 還沒抽的號碼
+        self.position: Dict[int, int] = {}  # 號碼 -> 在 pool 的位置
+        self.drawn: Dict[int, None] = {}  # 抽過的號碼，用 dict 保持順序
+        self.current: Optional[Tuple[int, int]] = None  # (房間回合, 號碼)
+
+    def reseed(self, seed: int) -> None:
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    # 同一個玩家開新局時直接換掉舊的棋盤；這回合的號碼已經用在舊棋盤上的話，新棋盤就不再套用
+    def set_board(self, owner: Hashable, board: BoardCopy) -> None:
+        previous = self.boards.get(owner)
+        if previous is not None:
+            board.applied_round = previous.applied_round
+        self.boards[owner] = board
+        for number in board.cell_of:
+            self.add(number)
+
+    def add(self, number: int) -> None:
+        if number not in self.position and number not in self.drawn:
+            self.position[number] = len(self.pool)
+            self.pool.append(number)
+
+    # 跟 GameLogic 一樣隨機挑一個跟最後一個交換再 pop；沒有任何棋盤時回傳 None
+    def draw(self, round_number: int) -> Optional[int]:
+        if not self.pool:
+            self.drawn.clear()
+            for board in self.boards.values():
+                for number in board.cell_of:
+                    self.add(number)
+            if not self.pool:
+                return None
+        pool = self.pool
+        index = self.rng.randrange(len(pool))
+        number, last = pool[index], pool[-1]
+        pool[index] = last
+        self.position[last] = index
+        pool.pop()
+        del self.position[number]
+        self.drawn[number] = None
+        self.current = (round_number, number)
+        return number
+
+    # 把這回合的號碼套用到玩家的棋盤副本上，回傳他的棋盤是不是已經連線
+    def settle(self, owner: Hashable, round_number: int) -> bool:
+        board = self.boards.get(owner)
+        if board is None:
+            return False
+        if self.current is not None and self.current[0] == round_number:
+            board.apply(round_number, self.current[1])
+        return board.won
@@ -0,0 +1,307 @@
+import heapq
+import logging
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from db.event_log import ROOM_OPEN, ROUND, SEED, EventLog, EventType
+from network import broadcast, log, metrics
+from network.connection import Connection
+from network.draws import BoardCopy
+from network.protocol import (HEADER, PLAYER_STATE, RESUME_REQUEST, RESUME_STATE, ROUND_DRAW, MessageType,
+                              ProtocolError, decode_board, encode, encode_count)
+from network.room import Room, RoomRegistry
+
+ROUND_TICK: float = 0.25  # 多久檢查一次回合時限
+RESUME_GRACE: float = 60.0  # 斷線後座位保留多久
+RESULT_HISTORY: int = 32  # 每個房間記住最近幾則輸贏，重新連線時補送錯過的
+
+
+# 一個玩家在房間裡的狀態，斷線後留著讓他用 token 接回原本的座位
+class PlayerSession:
+    def __init__(self, token: bytes, name: bytes, room: Room, client: Connection):
+        self.token: bytes = token
+        self.name: bytes = name
+        self.room: Room = room
+        self.client: Optional[Connection] = client  # 斷線時是 None
+        self.peer: str = client.peer  # 最後一次連線的 peer，重播時用來對應
+        self.rounds: int = 0  # client 在 ROUND_END 附上的回合數與棋盤 hash
+        self.board_hash: int = 0
+        self.arrived_round: Optional[int] = None  # 最後一次 ROUND_END 算進去的房間回合
+        self.seated_round: Optional[int] = None  # 斷線時是哪一回合的成員
+        self.detached_at: Optional[float] = None
+
+
+# 遊戲規則(login、round_end、win/lose、player_count)，與底層連線方式無關
+# 每個玩家 login 後被分配到一個房間，廣播只送給同房間的人
+# thread server 會從很多條 thread 同時呼叫，所以所有入口都先拿 lock
+class GameHub:
+    def __init__(self, rooms: Optional[RoomRegistry] = None, event_log: Optional[EventLog] = None):
+        self.rooms: RoomRegistry = rooms or RoomRegistry()
+        self.lock: threading.RLock = threading.RLock()
+        self.deadlines: List[Tuple[float, int, int]] = []  # (截止時間, room_id, 回合)
+        # 每個房間的輸入依序寫進 event log，network.replay 可以重建整個房間
+        self.event_log: Optional[EventLog] = event_log
+        self.streams: Dict[int, int] = {}  # room_id -> event log 的 stream
+        self.sessions: Dict[bytes, PlayerSession] = {}  # token -> session
+        self.session_of: Dict[Connection, PlayerSession] = {}
+        self.results: Dict[int, Deque[Tuple[int, bytes]]] = {}  # room_id -> (房間回合, WIN/LOSE frame)
+        self.rejected_claims: int = 0  # 棋盤副本上沒有連線的 WIN，不會轉給其他人
+        self.connected: Set[Connection] = set()
+
+    def connect(self, client: Connection) -> None:
+        with self.lock:
+            self.connected.add(client)
+
+    # 這些數字 scrape 時才從 hub 讀，不用在每個入口另外計數
+    def export_metrics(self, registry: metrics.Registry = metrics.registry) -> None:
+        metrics.connected_clients.function = lambda: len(self.connected)
+        registry.gauge("bingo_rooms", "Open rooms", lambda: len(self.rooms.rooms))
+        registry.gauge("bingo_sessions", "Player sessions, including detached ones", lambda: len(self.sessions))
+        registry.gauge("bingo_detached_sessions", "Seats held for a resume",
+                       lambda: sum(session.client is None for session in list(self.sessions.values())))
+        registry.gauge("bingo_rejected_claims", "WIN claims that did not match the server draws",
+                       lambda: self.rejected_claims)
+        registry.gauge("bingo_slow_client_drops", "Frames dropped for clients over the queue limit",
+                       lambda: broadcast.stats.dropped)
+        registry.gauge("bingo_slow_client_disconnects", "Clients disconnected for exceeding the queue limit",
+                       lambda: broadcast.stats.disconnected)
+
+    def disconnect(self, client: Connection) -> None:
+        with self.lock:
+            self.connected.discard(client)
+            session = self.session_of.pop(client, None)
+            room = self.rooms.get(client)
+            if session is not None and room is None:
+                self.sessions.pop(session.token, None)
+            elif session is not None:
+                # 座位先保留下來，房間不會因為最後一個人斷線就被移除
+                session.client = None
+                session.detached_at = time.monotonic()
+                session.seated_round = room.barrier.round if client in room.barrier.members else None
+                room.reserved += 1
+            room, advanced = self.rooms.leave(client)
+            if room is None:
+                return
+            self.record(room, EventType.LEAVE, client.peer.encode())
+            if room.room_id not in self.rooms.rooms:
+                self.close_room(room)
+            log.sample("client_left", peer=client.peer, room=room.room_id)
+            room.broadcast(encode_count(MessageType.PLAYER_COUNT, len(room.members)))
+            # 其他人都在等這個人，他一走回合就完成了
+            if advanced:
+                self.advance(room)
+
+    def handle_message(self, client: Connection, msg_type: MessageType, payload: bytes) -> None:
+        metrics.messages_received.inc(1, msg_type.name)
+        metrics.bytes_received.inc(HEADER.size + len(payload))
+        # payload 可能是 token，不寫進 log
+        log.sample("message_received", type=msg_type.name, peer=client.peer, bytes=len(payload))
+        with self.lock:
+            # 玩家加入
+            if msg_type == MessageType.LOGIN:
+                self.join(client, payload)
+                return
+            if msg_type == MessageType.RESUME:
+                self.resume(client, payload)
+                return
+            room = self.rooms.get(client)
+            if room is None:
+                return
+            room.touch()
+            if msg_type == MessageType.WIN or msg_type == MessageType.LOSE:
+                self.record(room, EventType[msg_type.name], client.peer.encode() + b"\0" + payload)
+                # 勝利要對得上 server 抽過的號碼，client 自己說了不算；輸了也先結算這回合，之後換的新棋盤不會再套用
+                won = room.draws.settle(self.session_of.get(client) or client, room.barrier.round)
+                if msg_type == MessageType.WIN and not won:
+                    self.rejected_claims += 1
+                    log.event("win_rejected", logging.WARNING, peer=client.peer, room=room.room_id)
+                    return
+                log.event("game_over", room=room.room_id, peer=client.peer, result=msg_type.name)
+                frame = encode(msg_type, payload)
+                self.results.setdefault(room.room_id, deque(maxlen=RESULT_HISTORY)).append((room.barrier.round, frame))
+                room.broadcast(frame, client)
+            elif msg_type == MessageType.ROUND_END:
+                self.record(room, EventType.ROUND_END, client.peer.encode() + (b"\0" + payload if payload else b""))
+                self.round_end(room, client, payload)
+            elif msg_type == MessageType.BOARD:
+                self.record(room, EventType.BOARD, client.peer.encode() + b"\0" + payload)
+                self.set_board(room, client, payload)
+
+    def record(self, room: Room, event_type: EventType, payload: bytes = b"") -> None:
+        if self.event_log is None:
+            return
+        stream = self.streams.get(room.room_id)
+        if stream is None:
+            stream = self.streams[room.room_id] = self.event_log.new_stream()
+            self.event_log.append(EventType.ROOM_OPEN, stream, ROOM_OPEN.pack(room.capacity, room.room_id))
+            self.event_log.append(EventType.ROOM_SEED, stream, SEED.pack(room.draws.seed))
+        self.event_log.append(event_type, stream, payload)
+
+    def round_end(self, room: Room, client: Connection, payload: bytes = b"") -> None:
+        # 房間沒滿也可以開始，第一個人結束回合後就不再讓新玩家加入
+        if not room.started:
+            self.start(room)
+        barrier = room.barrier
+        session = self.session_of.get(client)
+        if session is not None:
+            if len(payload) == PLAYER_STATE.size:
+                session.rounds, session.board_hash = PLAYER_STATE.unpack(payload)
+            if client in barrier.members:
+                session.arrived_round = barrier.round
+        # 按 Get 就是用了這回合的號碼，棋盤副本跟著標記
+        if client in barrier.members:
+            room.draws.settle(session or client, barrier.round)
+        first_arrival = not barrier.arrived
+        count, advanced = barrier.arrive(client)
+        room.broadcast(encode_count(MessageType.ROUND_END, count))
+        if advanced:
+            self.advance(room)
+        elif first_arrival and barrier.deadline is not None:
+            heapq.heappush(self.deadlines, (barrier.deadline, room.room_id, barrier.round))
+
+    # 回合完成後馬上抽下一回合的號碼：編碼一次，房間裡每個人各寫一次
+    def advance(self, room: Room) -> None:
+        room.broadcast(encode(MessageType.ROUND_COMPLETE))
+        self.draw(room)
+
+    def draw(self, room: Room) -> None:
+        round_number = room.barrier.round
+        number = room.draws.draw(round_number)
+        if number is not None:
+            room.broadcast(encode(MessageType.DRAW, ROUND_DRAW.pack(round_number, number)))
+
+    # 這回合已經抽過的號碼，剛加入或重新連線的人補送一次
+    def current_draw(self, room: Room) -> Optional[bytes]:
+        current = room.draws.current
+        if current is None or current[0] != room.barrier.round:
+            return None
+        return encode(MessageType.DRAW, ROUND_DRAW.pack(*current))
+
+    # Confirm 後的棋盤留一份副本；房間還沒有這回合的號碼(第一個登記的棋盤)就馬上抽
+    def set_board(self, room: Room, client: Connection, payload: bytes) -> None:
+        try:
+            board = BoardCopy(decode_board(payload))
+        except (ProtocolError, ValueError) as e:
+            log.event("invalid_board", logging.WARNING, peer=client.peer, error=e)
+            return
+        room.draws.set_board(self.session_of.get(client) or client, board)
+        if self.current_draw(room) is None:
+            self.draw(room)
+
+    def join(self, client: Connection, name: bytes) -> Room:
+        newly_joined = self.rooms.get(client) is None
+        room = self.rooms.join(client)
+        if newly_joined:
+            self.record(room, EventType.JOIN, client.peer.encode() + b"\0" + name)
+        client.send(encode_count(MessageType.ROOM_JOINED, room.room_id))
+        if newly_joined:
+            session = PlayerSession(secrets.token_bytes(16), name, room, client)
+            self.sessions[session.token] = session
+            self.session_of[client] = session
+            client.send(encode(MessageType.SESSION, session.token))
+            draw = self.current_draw(room)
+            if draw is not None:
+                client.send(draw)
+        room.broadcast(encode(MessageType.LOGIN, name), client)
+        room.broadcast(encode_count(MessageType.PLAYER_COUNT, len(room.members)))
+        # 最後一個空位被補上，房間自動開始
+        if newly_joined and room.started:
+            room.broadcast(encode(MessageType.ROOM_START))
+        return room
+
+    # 斷線重連：token 還有效就回到原本的座位，只送一個 RESUME_STATE 加上 acked 回合之後錯過的輸贏
+    # 其他狀態(房間回合、已完成人數)都在 RESUME_STATE 裡，不用像重新 LOGIN 一樣整個房間重來
+    def resume(self, client: Connection, payload: bytes) -> Optional[Room]:
+        session = None
+        if len(payload) > RESUME_REQUEST.size and self.rooms.get(client) is None:
+            session = self.sessions.get(payload[RESUME_REQUEST.size:])
+        if session is not None and session.client is not None:
+            # 舊連線還沒發現自己斷了(例如 NAT 換了 port)，新連線直接接手
+            previous = session.client
+            self.disconnect(previous)
+            previous.close()
+        room = session.room if session else None
+        if session is None or session.detached_at is None or self.rooms.rooms.get(room.room_id) is not room:
+            client.send(encode(MessageType.RESUME_FAILED))
+            return None
+        (acked,) = RESUME_REQUEST.unpack_from(payload)
+        barrier = room.barrier
+        seated = session.seated_round == barrier.round
+        arrived = seated and session.arrived_round == barrier.round
+        self.record(room, EventType.RESUME, client.peer.encode() + b"\0" + session.peer.encode())
+        session.detached_at = None
+        session.client = client
+        session.peer = client.peer
+        self.session_of[client] = session
+        advanced = self.rooms.resume(client, room, seated, arrived)
+        log.event("client_resumed", peer=client.peer, room=room.room_id, round=barrier.round)
+        client.send(encode(MessageType.RESUME, RESUME_STATE.pack(
+            room.room_id, barrier.round, len(barrier.arrived), len(room.members), arrived,
+            session.board_hash, session.rounds)))
+        for round_number, frame in self.results.get(room.room_id, ()):
+            if round_number >= acked:
+                client.send(frame)
+        draw = self.current_draw(room)
+        if draw is not None:
+            client.send(draw)
+        room.broadcast(encode_count(MessageType.PLAYER_COUNT, len(room.members)))
+        if advanced:
+            self.advance(room)
+        return room
+
+    # 房間已經從 registry 移除，清掉 hub 這邊跟它有關的狀態
+    def close_room(self, room: Room) -> None:
+        self.streams.pop(room.room_id, None)
+        self.results.pop(room.room_id, None)
+
+    def start(self, room: Room) -> None:
+        self.rooms.start(room)
+        room.broadcast(encode(MessageType.ROOM_START))
+
+    # 定期呼叫：超過回合時限的房間直接進下一回合，沒完成的人略過
+    def expire_rounds(self) -> None:
+        now = time.monotonic()
+        with self.lock:
+            while self.deadlines and self.deadlines[0][0] <= now:
+                _, room_id, round_number = heapq.heappop(self.deadlines)
+                room = self.rooms.rooms.get(room_id)
+                if room is None or room.barrier.round != round_number:
+                    continue
+                self.expire_room(room, now)
+
+    # 回傳這個房間的回合是否因為超時而結束
+    def expire_room(self, room: Room, now: float) -> bool:
+        round_number = room.barrier.round
+        if not room.barrier.expire(now):
+            return False
+        self.record(room, EventType.ROUND_TIMEOUT, ROUND.pack(round_number))
+        log.event("round_timeout", room=room.room_id, round=round_number)
+        self.advance(room)
+        return True
+
+    # 定期呼叫：關掉太久沒動靜的房間，放掉斷線太久的座位
+    def sweep(self) -> List[Room]:
+        with self.lock:
+            self.expire_sessions()
+            idle = self.rooms.cleanup_idle()
+            for room in idle:
+                self.record(room, EventType.ROOM_IDLE)
+                self.close_room(room)
+                log.event("room_idle", room=room.room_id, members=len(room.members))
+                for member in room.members:
+                    member.close()
+        return idle
+
+    def expire_sessions(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        expired = [session for session in self.sessions.values()
+                   if session.detached_at is not None and now - session.detached_at > RESUME_GRACE]
+        for session in expired:
+            del self.sessions[session.token]
+            room = session.room
+            room.reserved -= 1
+            if not room.members and not room.reserved and self.rooms.rooms.get(room.room_id) is room:
+                self.rooms.remove(room)
+                self.close_room(room)
@@ -0,0 +1,102 @@
+import atexit
+import contextlib
+import itertools
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from typing import Dict, Iterator, Optional, TextIO
+
+logger: logging.Logger = logging.getLogger("bingo")
+SAMPLE_EVERY: int = 100  # 每則訊息都會經過的地方只記 1/N 筆
+
+sample_every: int = SAMPLE_EVERY
+sample_counters: Dict[str, Iterator[int]] = {}
+listener: Optional[logging.handlers.QueueListener] = None
+output: Optional[logging.Handler] = None
+
+
+def quote(value: object) -> str:
+    text = str(value)
+    if text and not any(c in text for c in ' ="\n'):
+        return text
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+
+# 一行一筆 key=value(logfmt)，grep 或丟給 Loki 之類的工具都好處理
+class LogfmtFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        seconds = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+        parts = [f"ts={seconds}.{int(record.msecs):03d}", f"level={record.levelname.lower()}",
+                 f"event={quote(record.getMessage())}"]
+        parts += [f"{key}={quote(value)}" for key, value in getattr(record, "fields", {}).items()]
+        return " ".join(parts)
+
+
+# 呼叫端只把 record 丟進 queue，格式化與寫檔都在 listener 的 thread，不會卡住 event loop 或房間的 lock
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def event(name: str, level: int = logging.INFO, **fields: object) -> None:
+    if logger.isEnabledFor(level):
+        logger.log(level, name, extra={"fields": fields})
+
+
+# 每個 name 各自計數，第 1、N+1、2N+1... 筆才寫，並標上取樣比例
+def sample(name: str, **fields: object) -> None:
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    counter = sample_counters.get(name)
+    if counter is None:
+        counter = sample_counters.setdefault(name, itertools.count())
+    if next(counter) % sample_every == 0:
+        fields["sampled"] = f"1/{sample_every}"
+        logger.info(name, extra={"fields": fields})
+
+
+# 重播或 benchmark 直接跑 GameHub 時，hub 的 log(例如被拒絕的勝利)先不要印出來
+@contextlib.contextmanager
+def quiet(level: int = logging.ERROR) -> Iterator[None]:
+    previous = logger.level
+    logger.setLevel(level)
+    try:
+        yield
+    finally:
+        logger.setLevel(previous)
+
+
+# server 啟動時呼叫一次；沒呼叫的話(例如 benchmark 直接用 GameHub)只有 warning 以上會印出來
+def setup(level: str = "info", every: int = SAMPLE_EVERY, stream: Optional[TextIO] = None) -> None:
+    global sample_every, output
+    stop()
+    sample_every = max(1, every)
+    first = output is None
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(LogfmtFormatter())
+    logger.setLevel(level.upper())
+    logger.propagate = False
+    start_listener()
+    if first:
+        # fork 出來的 cluster worker 沒有 listener 的 thread，各自重新開一個
+        os.register_at_fork(after_in_child=start_listener)
+        # 結束前把 queue 裡剩下的寫完
+        atexit.register(stop)
+
+
+def start_listener() -> None:
+    global listener
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, output)
+    logger.handlers[:] = [RecordQueueHandler(records)]
+    listener.start()
+
+
+def stop() -> None:
+    global listener
+    if listener is not None:
+        listener.stop()
+        listener = None
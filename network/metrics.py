@@ -0,0 +1,292 @@
+import http.server
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from network import log
+from network.protocol import MessageType
+
+# HDR 式的直方圖：每個 2 的次方再切 16 格，分位數的相對誤差不超過 1/16，記一筆只要算一次 bit_length
+SUB_BUCKET_BITS: int = 4
+SUB_BUCKETS: int = 1 << SUB_BUCKET_BITS
+LINEAR_LIMIT: int = 2 * SUB_BUCKETS  # 比這小的值一個值一格
+MAX_BUCKETS: int = 64 * SUB_BUCKETS
+QUANTILES: Tuple[float, ...] = (0.5, 0.9, 0.99, 0.999)
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    kind: str = "untyped"
+
+    def __init__(self, name: str, help_text: str, label: Optional[str] = None):
+        self.name: str = name
+        self.help: str = help_text
+        self.label: Optional[str] = label  # 最多一個 label，例如訊息種類
+        self.lock: threading.Lock = threading.Lock()
+
+    def series(self, label_value: Optional[str], extra: str = "") -> str:
+        labels = [f'{self.label}="{escape(label_value)}"'] if self.label and label_value is not None else []
+        if extra:
+            labels.append(extra)
+        return "{" + ",".join(labels) + "}" if labels else ""
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label: Optional[str] = None):
+        super().__init__(name, help_text, label)
+        self.values: Dict[Optional[str], float] = {}
+
+    def inc(self, amount: float = 1, label_value: Optional[str] = None) -> None:
+        with self.lock:
+            self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def value(self, label_value: Optional[str] = None) -> float:
+        return self.values.get(label_value, 0)
+
+    def total(self) -> float:
+        with self.lock:
+            return sum(self.values.values())
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = sorted(self.values.items(), key=lambda item: item[0] or "")
+        return [f"{self.name}{self.series(label_value)} {value:g}" for label_value, value in values]
+
+
+# function 不是 None 時每次匯出才呼叫它取值，例如房間數直接問 RoomRegistry
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, function: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text)
+        self.function: Optional[Callable[[], float]] = function
+        self.current: float = 0
+
+    def set(self, value: float) -> None:
+        self.current = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self.lock:
+            self.current += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    def value(self) -> float:
+        return self.function() if self.function else self.current
+
+    def render(self) -> List[str]:
+        return [f"{self.name} {self.value():g}"]
+
+
+# 記的是微秒的整數，匯出成 Prometheus summary(分位數 + _sum + _count)，單位是秒
+class HistogramData:
+    def __init__(self):
+        self.counts: List[int] = [0] * MAX_BUCKETS
+        self.count: int = 0
+        self.sum: int = 0
+        self.max: int = 0
+
+    def record(self, value: int) -> None:
+        if value < LINEAR_LIMIT:
+            index = value
+        else:
+            shift = value.bit_length() - SUB_BUCKET_BITS - 1
+            index = min(shift * SUB_BUCKETS + (value >> shift), MAX_BUCKETS - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    # 那一格的上界，回報的分位數不會比實際小
+    @staticmethod
+    def upper_bound(index: int) -> int:
+        if index < LINEAR_LIMIT:
+            return index
+        shift, top = divmod(index, SUB_BUCKETS)
+        shift -= 1
+        return ((top + SUB_BUCKETS + 1) << shift) - 1
+
+    def quantile(self, fraction: float) -> int:
+        if not self.count:
+            return 0
+        target = max(1, int(self.count * fraction + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+
+class Histogram(Metric):
+    kind = "summary"
+
+    def __init__(self, name: str, help_text: str, label: Optional[str] = None):
+        super().__init__(name, help_text, label)
+        self.data: Dict[Optional[str], HistogramData] = {}
+
+    def observe(self, seconds: float, label_value: Optional[str] = None) -> None:
+        micros = int(seconds * 1e6)
+        with self.lock:
+            data = self.data.get(label_value)
+            if data is None:
+                data = self.data[label_value] = HistogramData()
+            data.record(micros if micros > 0 else 0)
+
+    # 同一段程式量時間：with histogram.time(): ...
+    def time(self, label_value: Optional[str] = None) -> "Timer":
+        return Timer(self, label_value)
+
+    def count(self, label_value: Optional[str] = None) -> int:
+        data = self.data.get(label_value)
+        return data.count if data else 0
+
+    def total(self) -> int:
+        with self.lock:
+            return sum(data.count for data in self.data.values())
+
+    def quantile(self, fraction: float, label_value: Optional[str] = None) -> float:
+        data = self.data.get(label_value)
+        return data.quantile(fraction) / 1e6 if data else 0.0
+
+    def render(self) -> List[str]:
+        lines = []
+        with self.lock:
+            for label_value, data in sorted(self.data.items(), key=lambda item: item[0] or ""):
+                for fraction in QUANTILES:
+                    series = self.series(label_value, f'quantile="{fraction:g}"')
+                    lines.append(f"{self.name}{series} {data.quantile(fraction) / 1e6:.6f}")
+                lines.append(f"{self.name}_sum{self.series(label_value)} {data.sum / 1e6:.6f}")
+                lines.append(f"{self.name}_count{self.series(label_value)} {data.count}")
+        return lines
+
+
+class Timer:
+    def __init__(self, histogram: Histogram, label_value: Optional[str]):
+        self.histogram: Histogram = histogram
+        self.label_value: Optional[str] = label_value
+        self.start: float = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, self.label_value)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def add(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, label: Optional[str] = None) -> Counter:
+        return self.metrics.get(name) or self.add(Counter(name, help_text, label))
+
+    def gauge(self, name: str, help_text: str, function: Optional[Callable[[], float]] = None) -> Gauge:
+        gauge = self.metrics.get(name) or self.add(Gauge(name, help_text))
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+    def histogram(self, name: str, help_text: str, label: Optional[str] = None) -> Histogram:
+        return self.metrics.get(name) or self.add(Histogram(name, help_text, label))
+
+    # Prometheus text exposition format 0.0.4
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry: Registry = Registry()
+
+# server 的標準指標；thread、async 與 cluster broker 都記在這裡
+connected_clients: Gauge = registry.gauge("bingo_connected_clients", "Clients currently connected")
+messages_received: Counter = registry.counter("bingo_messages_received_total", "Frames received by type", "type")
+messages_sent: Counter = registry.counter("bingo_messages_sent_total", "Frames sent by type", "type")
+bytes_received: Counter = registry.counter("bingo_bytes_received_total", "Bytes read from client sockets")
+bytes_sent: Counter = registry.counter("bingo_bytes_sent_total", "Bytes queued to client sockets")
+fanout_seconds: Histogram = registry.histogram("bingo_broadcast_fanout_seconds",
+                                               "Time to hand one broadcast to every recipient")
+round_wait_seconds: Histogram = registry.histogram("bingo_round_wait_seconds",
+                                                   "First round_end to round advance", "outcome")
+
+# 訊息種類的名稱先查好，送出時只要讀 header 的第 5 個 byte
+TYPE_NAMES: Dict[int, str] = {msg_type.value: msg_type.name for msg_type in MessageType}
+
+
+def count_sent(data: bytes) -> None:
+    messages_sent.inc(1, TYPE_NAMES.get(data[4], "unknown") if len(data) > 4 else "unknown")
+    bytes_sent.inc(len(data))
+
+
+# 定期寫進 log 的一行摘要
+def snapshot() -> Dict[str, object]:
+    return {
+        "clients": int(connected_clients.value()),
+        "received": int(messages_received.total()),
+        "sent": int(messages_sent.total()),
+        "bytes_in": int(bytes_received.total()),
+        "bytes_out": int(bytes_sent.total()),
+        "fanouts": fanout_seconds.count(),
+        "fanout_p99_us": round(fanout_seconds.quantile(0.99) * 1e6),
+        "rounds": round_wait_seconds.total(),
+        "round_wait_p99_ms": round(round_wait_seconds.quantile(0.99, "complete") * 1e3, 1),
+        "timeouts": round_wait_seconds.count("timeout"),
+    }
+
+
+# sweep 時順便寫一行目前的指標，沒開 metrics port 也看得到
+def log_stats() -> None:
+    log.event("stats", **snapshot())
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    registry: Registry = registry
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # 每次 scrape 都印一行太吵
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+# 背景 thread 提供 http://host:port/metrics，預設只聽本機
+class MetricsServer:
+    def __init__(self, host: str = "localhost", port: int = 9464):
+        self.server: http.server.ThreadingHTTPServer = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+        self.server.daemon_threads = True
+        self.thread: threading.Thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+
+    def start(self) -> "MetricsServer":
+        self.thread.start()
+        return self
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,116 @@
+import struct
+import sys
+from array import array
+from enum import IntEnum
+from functools import lru_cache
+from typing import Dict, List, Tuple, Type
+
+
+# client 與 server 共用的封包格式：4 bytes payload 長度 + 1 byte 訊息種類 + payload
+class MessageType(IntEnum):
+    LOGIN = 1           # payload: 玩家名稱
+    PLAYER_COUNT = 2    # payload: 玩家數量
+    ROUND_END = 3       # client -> server: 無 payload 或 PLAYER_STATE, server -> client: 已完成回合的人數
+    ROUND_COMPLETE = 4  # 所有人完成本回合
+    WIN = 5
+    LOSE = 6
+    ROOM_JOINED = 7     # payload: 房間編號
+    ROOM_START = 8      # 房間已滿或已開始第一回合，不再接受新玩家
+    SESSION = 9         # server -> client: login 後發的 token，斷線後用來接回原本的座位
+    RESUME = 10         # client -> server: RESUME_REQUEST + token, server -> client: RESUME_STATE，接著補送錯過的輸贏
+    RESUME_FAILED = 11  # token 過期或房間已經不在，client 要重新 LOGIN
+    BOARD = 12          # client -> server: Confirm 後的棋盤，每格一個 uint32(row * grid_num + col 的順序)
+    DRAW = 13           # server -> client: ROUND_DRAW，房間這回合抽到的號碼，所有人都一樣
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+HEADER: struct.Struct = struct.Struct("!IB")
+COUNT: struct.Struct = struct.Struct("!I")
+PLAYER_STATE: struct.Struct = struct.Struct("!II")  # 自己的回合數, 棋盤 hash
+RESUME_REQUEST: struct.Struct = struct.Struct("!I")  # 最後收到 ROUND_COMPLETE 時房間的回合數
+# room_id, 房間回合, 本回合已完成人數, 房間人數, 自己是否已完成本回合, 棋盤 hash, 自己的回合數
+RESUME_STATE: struct.Struct = struct.Struct("!IIIIBII")
+ROUND_DRAW: struct.Struct = struct.Struct("!II")  # 房間回合, 抽到的數字
+MAX_PAYLOAD: int = 1 << 20
+
+Frame = Tuple[IntEnum, bytes]
+
+
+def encode(msg_type: IntEnum, payload: bytes = b"") -> bytes:
+    return HEADER.pack(len(payload), msg_type) + payload
+
+
+def encode_count(msg_type: IntEnum, count: int) -> bytes:
+    return HEADER.pack(COUNT.size, msg_type) + COUNT.pack(count)
+
+
+def decode_count(payload: bytes) -> int:
+    return COUNT.unpack(payload)[0]
+
+
+# 棋盤跟其他欄位一樣用 network byte order
+def encode_board(values: array) -> bytes:
+    if sys.byteorder == "little":
+        values = array("I", values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def decode_board(payload: bytes) -> array:
+    if not payload or len(payload) % 4:
+        raise ProtocolError(f"board payload of {len(payload)} bytes")
+    values = array("I")
+    values.frombytes(payload)
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values
+
+
+@lru_cache(maxsize=None)
+def _type_table(types: Type[IntEnum]) -> Dict[int, IntEnum]:
+    return {msg_type.value: msg_type for msg_type in types}
+
+
+# 串流解碼：一次 recv 可能有多個封包或只有半個，剩下的留到下次
+class FrameDecoder:
+    def __init__(self, max_payload: int = MAX_PAYLOAD, types: Type[IntEnum] = MessageType):
+        self.max_payload: int = max_payload
+        self.types: Dict[int, IntEnum] = _type_table(types)
+        self.buffer: bytearray = bytearray()
+
+    def feed(self, data: bytes) -> List[Frame]:
+        if self.buffer:
+            self.buffer += data
+            with memoryview(self.buffer) as view:
+                frames, consumed = self._parse(view)
+            del self.buffer[:consumed]
+        else:
+            # 常見情況：沒有殘留資料，直接在收到的 bytes 上切出 payload，不先複製進 buffer
+            frames, consumed = self._parse(data)
+            if consumed < len(data):
+                self.buffer += data[consumed:]
+        return frames
+
+    def _parse(self, data) -> Tuple[List[Frame], int]:
+        frames: List[Frame] = []
+        offset = 0
+        end = len(data)
+        header_size = HEADER.size
+        unpack_from = HEADER.unpack_from
+        types = self.types
+        while end - offset >= header_size:
+            length, raw_type = unpack_from(data, offset)
+            if length > self.max_payload:
+                raise ProtocolError(f"payload too large: {length}")
+            start = offset + header_size
+            if end - start < length:
+                break
+            msg_type = types.get(raw_type)
+            if msg_type is None:
+                raise ProtocolError(f"unknown message type: {raw_type}")
+            frames.append((msg_type, bytes(data[start:start + length])))
+            offset = start + length
+        return frames, offset
@@ -0,0 +1,110 @@
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+from db.event_log import ROOM_OPEN, ROUND, SEED, Event, EventType
+from network import log
+from network.connection import Connection
+from network.hub import GameHub
+from network.protocol import RESUME_REQUEST, MessageType
+from network.room import Room, RoomRegistry
+
+
+# 不連網路的假連線，只記送了多少訊息
+class ReplayConnection(Connection):
+    def __init__(self, peer: str):
+        super().__init__(peer)
+        self.messages: int = 0
+        self.sent_bytes: int = 0
+        self.closed: bool = False
+
+    def send(self, data: bytes) -> None:
+        self.messages += 1
+        self.sent_bytes += len(data)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class RoomReplay:
+    def __init__(self, stream: int, room_id: int, capacity: int):
+        self.stream: int = stream
+        self.room_id: int = room_id  # 當時 server 上的編號
+        self.capacity: int = capacity
+        self.room: Optional[Room] = None
+        self.names: Dict[str, str] = {}  # peer -> 玩家名稱
+        self.results: List[Tuple[str, str]] = []  # (玩家名稱, "win" / "lose")
+        self.connections: Dict[str, ReplayConnection] = {}
+        self.events: int = 0
+        self.mismatches: List[str] = []
+        self.started: float = 0.0
+        self.ended: float = 0.0
+
+    def rounds(self) -> int:
+        return self.room.barrier.round if self.room else 0
+
+    def messages(self) -> int:
+        return sum(connection.messages for connection in self.connections.values())
+
+
+# 把同一個房間的輸入照順序餵給新的 GameHub，走的是跟 server 一模一樣的程式
+# 超時直接照紀錄結束回合，不用真的等；重播時 hub 的 log 先關掉
+def replay_room(events: Iterable[Event]) -> RoomReplay:
+    replay: Optional[RoomReplay] = None
+    hub: Optional[GameHub] = None
+    seed: Optional[int] = None
+    with log.quiet():
+        for event in events:
+            if event.type == EventType.ROOM_OPEN:
+                capacity, room_id = ROOM_OPEN.unpack(event.payload)
+                replay = RoomReplay(event.stream, room_id, capacity)
+                replay.started = event.time
+                hub = GameHub(RoomRegistry(capacity, idle_timeout=math.inf, round_timeout=0.0))
+            if replay is None:
+                raise ValueError("room events do not begin with ROOM_OPEN")
+            replay.events += 1
+            replay.ended = event.time
+            if event.type == EventType.ROUND_TIMEOUT:
+                (round_number,) = ROUND.unpack(event.payload)
+                room = replay.room
+                if room is None or room.barrier.round != round_number or not hub.expire_room(room, math.inf):
+                    replay.mismatches.append(f"round {round_number} timed out on the server but not in the replay")
+                continue
+            if event.type == EventType.ROOM_SEED:
+                # 房間在第一個人加入時才建立，先記著
+                (seed,) = SEED.unpack(event.payload)
+                continue
+            if event.type == EventType.ROOM_IDLE:
+                for connection in replay.connections.values():
+                    connection.close()
+                continue
+            if event.type == EventType.ROOM_OPEN:
+                continue
+            peer, _, rest = event.payload.partition(b"\0")
+            connection = replay.connections.setdefault(peer.decode(), ReplayConnection(peer.decode()))
+            if event.type == EventType.JOIN:
+                replay.names[connection.peer] = rest.decode(errors="replace")
+                hub.handle_message(connection, MessageType.LOGIN, rest)
+                if replay.room is None:
+                    replay.room = hub.rooms.get(connection)
+                    if replay.room is not None and seed is not None:
+                        replay.room.draws.reseed(seed)
+            elif event.type == EventType.ROUND_END:
+                hub.handle_message(connection, MessageType.ROUND_END, rest)
+            elif event.type == EventType.RESUME:
+                # token 是亂數，重播時改用斷線前的 peer 找回同一個 session
+                previous = rest.decode()
+                session = next((candidate for candidate in hub.sessions.values() if candidate.peer == previous), None)
+                token = session.token if session else b"\0"
+                replay.names[connection.peer] = replay.names.pop(previous, previous)
+                hub.handle_message(connection, MessageType.RESUME, RESUME_REQUEST.pack(0) + token)
+            elif event.type == EventType.BOARD:
+                hub.handle_message(connection, MessageType.BOARD, rest)
+            elif event.type in (EventType.WIN, EventType.LOSE):
+                rejected = hub.rejected_claims
+                hub.handle_message(connection, MessageType[event.type.name], rest)
+                outcome = "rejected win" if hub.rejected_claims > rejected else event.type.name.lower()
+                replay.results.append((replay.names.get(connection.peer, connection.peer), outcome))
+            elif event.type == EventType.LEAVE:
+                hub.disconnect(connection)
+    if replay is None:
+        raise ValueError("no room events")
+    return replay
@@ -0,0 +1,120 @@
+import secrets
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from network.barrier import RoundBarrier
+from network.broadcast import fanout
+from network.connection import Connection
+from network.draws import DrawScheduler
+
+
+# 一場獨立的賓果遊戲：成員與回合狀態只屬於這個房間
+class Room:
+    def __init__(self, room_id: int, capacity: int, round_timeout: Optional[float] = None, seed: int = 0):
+        self.room_id: int = room_id
+        self.capacity: int = capacity
+        self.members: Set[Connection] = set()
+        self.barrier: RoundBarrier = RoundBarrier(round_timeout)
+        self.started: bool = False
+        self.last_active: float = time.monotonic()
+        self.reserved: int = 0  # 斷線但還能用 token 接回來的座位
+        self.draws: DrawScheduler = DrawScheduler(seed)  # 每回合由 server 抽號，整個房間看到同一個號碼
+
+    def add(self, member: Connection) -> None:
+        self.members.add(member)
+        self.barrier.join(member)
+
+    # 回傳這個人離開後回合是否剛好完成
+    def discard(self, member: Connection) -> bool:
+        self.members.discard(member)
+        return self.barrier.leave(member)
+
+    # seated 表示斷線前就是這回合的成員，回傳接回來後回合是否剛好完成
+    def resume(self, member: Connection, seated: bool, arrived: bool) -> bool:
+        self.members.add(member)
+        if seated:
+            return self.barrier.resume(member, arrived)
+        self.barrier.join(member)
+        return False
+
+    def is_full(self) -> bool:
+        return len(self.members) + self.reserved >= self.capacity
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+    def broadcast(self, message: bytes, sender: Optional[Connection] = None) -> None:
+        if sender is None:
+            fanout(message, self.members)
+        else:
+            fanout(message, (member for member in self.members if member is not sender))
+
+
+class RoomRegistry:
+    def __init__(self, capacity: int = 4, idle_timeout: float = 300.0, round_timeout: Optional[float] = None):
+        self.capacity: int = capacity
+        self.idle_timeout: float = idle_timeout
+        self.round_timeout: Optional[float] = round_timeout
+        self.rooms: Dict[int, Room] = {}
+        self.open_rooms: Dict[int, Room] = {}  # 還沒開始、可以加入的房間，依建立順序
+        self.room_of: Dict[Connection, Room] = {}
+        self.next_room_id: int = 1
+
+    def get(self, client: Connection) -> Optional[Room]:
+        return self.room_of.get(client)
+
+    def join(self, client: Connection, room_id: Optional[int] = None) -> Room:
+        current = self.room_of.get(client)
+        if current is not None:
+            return current
+        room = self.open_rooms.get(room_id) if room_id is not None else None
+        if room is None:
+            room = next(iter(self.open_rooms.values()), None) or self.create()
+        room.add(client)
+        room.touch()
+        self.room_of[client] = room
+        if room.is_full():
+            self.start(room)
+        return room
+
+    def create(self) -> Room:
+        room = Room(self.next_room_id, self.capacity, self.round_timeout, secrets.randbits(32))
+        self.next_room_id += 1
+        self.rooms[room.room_id] = room
+        self.open_rooms[room.room_id] = room
+        return room
+
+    # 用 token 接回原本的房間，不管房間是否已經開始
+    def resume(self, client: Connection, room: Room, seated: bool, arrived: bool) -> bool:
+        room.reserved -= 1
+        self.room_of[client] = room
+        room.touch()
+        return room.resume(client, seated, arrived)
+
+    # 開始後不再接受新玩家
+    def start(self, room: Room) -> None:
+        room.started = True
+        self.open_rooms.pop(room.room_id, None)
+
+    # 回傳 (離開的房間, 回合是否因此完成)
+    def leave(self, client: Connection) -> Tuple[Optional[Room], bool]:
+        room = self.room_of.pop(client, None)
+        if room is None:
+            return None, False
+        advanced = room.discard(client)
+        if not room.members and not room.reserved:
+            self.remove(room)
+        return room, advanced
+
+    def remove(self, room: Room) -> None:
+        self.rooms.pop(room.room_id, None)
+        self.open_rooms.pop(room.room_id, None)
+        for member in room.members:
+            self.room_of.pop(member, None)
+
+    # 回傳太久沒有動靜而被移除的房間，由呼叫端負責關閉裡面的連線
+    def cleanup_idle(self, now: Optional[float] = None) -> List[Room]:
+        now = time.monotonic() if now is None else now
+        idle = [room for room in self.rooms.values() if now - room.last_active > self.idle_timeout]
+        for room in idle:
+            self.remove(room)
+        return idle
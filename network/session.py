@@ -0,0 +1,50 @@
+from typing import Optional, Tuple
+from network.protocol import RESUME_REQUEST, RESUME_STATE, MessageType, decode_count
+
+RECONNECT_DELAYS: Tuple[float, ...] = (0.2, 0.5, 1.0, 2.0, 4.0)  # 斷線後每次重連前等幾秒，都失敗就放棄
+
+
+# server 在 RESUME 回覆的狀態
+class ResumeState:
+    def __init__(self, payload: bytes):
+        room_id, round_number, ended, players, arrived, board_hash, rounds = RESUME_STATE.unpack(payload)
+        self.room_id: int = room_id
+        self.round: int = round_number  # 房間目前的回合
+        self.ended: int = ended  # 這回合已完成的人數
+        self.players: int = players
+        self.arrived: bool = bool(arrived)  # 斷線前送的 ROUND_END 有沒有算進這回合
+        self.board_hash: int = board_hash  # 最後一次 ROUND_END 附上的棋盤 hash 與回合數
+        self.rounds: int = rounds
+
+
+# client 這邊記住重新連線需要的東西：server 發的 token 與最後確認完成的房間回合
+# 收訊息的地方每個 frame 都先交給 observe，斷線後用 resume_request 接回原本的座位
+class ClientSession:
+    def __init__(self):
+        self.token: Optional[bytes] = None
+        self.room_id: Optional[int] = None
+        self.acked_round: int = 0  # 收過幾次 ROUND_COMPLETE，也就是房間的回合數
+
+    def observe(self, msg_type: MessageType, payload: bytes) -> Optional[ResumeState]:
+        if msg_type == MessageType.SESSION:
+            self.token = payload
+        elif msg_type == MessageType.ROOM_JOINED:
+            self.room_id = decode_count(payload)
+            self.acked_round = 0
+        elif msg_type == MessageType.ROUND_COMPLETE:
+            self.acked_round += 1
+        elif msg_type == MessageType.RESUME:
+            state = ResumeState(payload)
+            self.room_id = state.room_id
+            self.acked_round = state.round
+            return state
+        elif msg_type == MessageType.RESUME_FAILED:
+            self.token = None
+            self.room_id = None
+        return None
+
+    # 沒有 token(還沒 login 或座位已經過期)時回傳 None，要改送 LOGIN
+    def resume_request(self) -> Optional[bytes]:
+        if self.token is None:
+            return None
+        return RESUME_REQUEST.pack(self.acked_round) + self.token
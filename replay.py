@@ -0,0 +1,68 @@
+import argparse
+import time
+from typing import Dict, List, Union
+from db.event_log import Event, EventType, read_events
+from game.replay import GameReplay, replay_game
+from network.replay import RoomReplay, replay_room
+
+
+def group_streams(events: List[Event]) -> Dict[int, List[Event]]:
+    streams: Dict[int, List[Event]] = {}
+    for event in events:
+        streams.setdefault(event.stream, []).append(event)
+    return streams
+
+
+def replay_stream(events: List[Event]) -> Union[GameReplay, RoomReplay]:
+    if events[0].type == EventType.ROOM_OPEN:
+        return replay_room(events)
+    return replay_game(events)
+
+
+def describe(replay: Union[GameReplay, RoomReplay]) -> str:
+    span = replay.ended - replay.started
+    if isinstance(replay, RoomReplay):
+        results = ", ".join(f"{name} {outcome}" for name, outcome in replay.results) or "no result"
+        text = (f"room {replay.room_id}: {len(replay.names)} players, {replay.rounds()} rounds, {results}, "
+                f"{replay.messages()} messages, {replay.events} events over {span:.1f}s")
+    else:
+        game = replay.game
+        text = (f"game {game.grid_num}x{game.grid_num} seed {game.seed}: {replay.outcome or 'unfinished'} "
+                f"at round {game.rounds}, {replay.events} events over {span:.1f}s")
+    for mismatch in replay.mismatches:
+        text += f"\n    MISMATCH {mismatch}"
+    return text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay games and rooms from a bingo event log")
+    parser.add_argument("log")
+    parser.add_argument("--stream", type=int, nargs="*", help="only replay these streams")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    events = read_events(args.log)
+    streams = group_streams(events)
+    read_seconds = time.perf_counter() - start
+    selected = args.stream or list(streams)
+
+    start = time.perf_counter()
+    replays: Dict[int, Union[GameReplay, RoomReplay]] = {}
+    for stream in selected:
+        try:
+            replays[stream] = replay_stream(streams[stream])
+        except (KeyError, ValueError) as e:
+            print(f"[{stream}] cannot replay: {e}")
+    seconds = time.perf_counter() - start
+    for stream, replay in replays.items():
+        print(f"[{stream}] {describe(replay)}")
+
+    replayed = sum(replay.events for replay in replays.values())
+    recorded = sum(replay.ended - replay.started for replay in replays.values())
+    print(f"read {len(events)} events in {read_seconds * 1e3:.1f}ms, replayed {replayed} events from "
+          f"{len(replays)} streams in {seconds * 1e3:.1f}ms ({replayed / seconds if seconds else 0:,.0f} events/s"
+          f"{f', {recorded / seconds:,.0f}x real time' if seconds and recorded else ''})")
+
+
+if __name__ == "__main__":
+    main()
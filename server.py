@@ -1,67 +1,148 @@
+import argparse
+import logging
 import socket
 import threading
-from db.database import UserSystem
+import time
+from typing import Optional
+from db.event_log import EventLog
+from network import log, metrics
+from network.broadcast import DISCONNECT, MAX_QUEUE_BYTES, POLICIES, SocketFlusher, SocketOutbox
+from network.connection import Connection
+from network.hub import ROUND_TICK, GameHub
+from network.protocol import FrameDecoder, ProtocolError
+from network.room import RoomRegistry
+
+
+class SocketConnection(Connection):
+    def __init__(self, client: socket.socket, flusher: SocketFlusher, max_queue_bytes: int = MAX_QUEUE_BYTES,
+                 slow_client_policy: str = DISCONNECT):
+        super().__init__(str(client.getpeername()))
+        self.socket: socket.socket = client
+        self.outbox: SocketOutbox = SocketOutbox(client, flusher, self.close, max_queue_bytes, slow_client_policy)
+
+    # 不會卡住：放進送出佇列後盡量直接送，剩下的由 flusher 負責
+    def send(self, data: bytes) -> None:
+        metrics.count_sent(data)
+        self.outbox.put(data)
+
+    def close(self) -> None:
+        self.outbox.close()
+        try:
+            # 讓還卡在 recv 的 thread 醒來
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+
 
 class GameServer:
-    def __init__(self, host: str = 'localhost', port: int = 12345):
+    def __init__(self, host: str = 'localhost', port: int = 12345, hub: Optional[GameHub] = None,
+                 sweep_interval: float = 10.0, max_queue_bytes: int = MAX_QUEUE_BYTES,
+                 slow_client_policy: str = DISCONNECT):
         self.host = host
         self.port = port
         self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server.bind((self.host, self.port))
-        self.clients = []
-        self.user_system = UserSystem()
-
-        self.ended_round_players = set()
-        self.ended_round_players_num = 0
+        self.hub = hub or GameHub()
+        self.sweep_interval = sweep_interval
+        self.max_queue_bytes = max_queue_bytes
+        self.slow_client_policy = slow_client_policy
+        self.flusher = SocketFlusher()
 
     def start(self) -> None:
         self.server.listen()
-        print(f'Server started, listening on {self.host}:{self.port}')
+        log.event("server_started", engine="thread", host=self.host, port=self.port)
+        self.flusher.start()
+        threading.Thread(target=self.sweep_rooms, daemon=True).start()
         while True:
-            client, addr = self.server.accept()
-            print(f'Accepted connection from {addr}')
-            self.clients.append(client)
-            thread = threading.Thread(target=self.handle_client, args=(client,))
+            client, _ = self.server.accept()
+            connection = SocketConnection(client, self.flusher, self.max_queue_bytes, self.slow_client_policy)
+            log.sample("client_connected", peer=connection.peer)
+            self.hub.connect(connection)
+            thread = threading.Thread(target=self.handle_client, args=(connection,))
             thread.start()
 
-    def broadcast(self, message: bytes, sender: socket.socket, toSender: bool = False) -> None:
-        for client in self.clients:
-            if client != sender:
-                client.send(message)
-            if toSender:
-                sender.send(message)
-
-    def handle_client(self, client: socket.socket) -> None:
+    def handle_client(self, client: SocketConnection) -> None:
+        decoder = FrameDecoder()
         while True:
             try:
-                message = client.recv(1024)
-                if not message:
-                    print(f'Client {client.getsockname()} has closed the connection')
-                    self.broadcast(f"player_count {len(self.clients) - 1} ".encode(), None)
+                data = client.socket.recv(4096)
+                if not data:
                     break
-                print(f'Received message: {message.decode()} from {client.getsockname()}')
-                # 玩家加入
-                if message.endswith(b"login"):
-                    self.broadcast(message, client)
-                    self.broadcast(f"player_count {len(self.clients)}".encode(), client, toSender=True)
-                if message == b"win" or message == b"lose":
-                    print("game over")
-                    self.broadcast(message, client)
-                elif message == b"round_end":
-                    self.ended_round_players.add(client)
-                    self.broadcast(f"round_end {len(self.ended_round_players)} \n".encode(), client, toSender=True)
-                    if len(self.ended_round_players) == len(self.clients):
-                        self.broadcast(b"All complete, start next round \n", None)
-                        self.ended_round_players.clear()
+                for msg_type, payload in decoder.feed(data):
+                    self.hub.handle_message(client, msg_type, payload)
+            except ProtocolError as e:
+                log.event("protocol_error", logging.WARNING, peer=client.peer, error=e)
+                break
             except Exception as e:
-                print(f'Error occurred: {e}')
+                log.event("connection_error", peer=client.peer, error=e)
                 break
-        self.clients.remove(client)
+        self.hub.disconnect(client)
         client.close()
 
+    # 定期檢查回合時限、清掉閒置的房間
+    def sweep_rooms(self) -> None:
+        last_sweep = time.monotonic()
+        while True:
+            time.sleep(ROUND_TICK)
+            self.hub.expire_rounds()
+            if time.monotonic() - last_sweep >= self.sweep_interval:
+                last_sweep = time.monotonic()
+                self.hub.sweep()
+                metrics.log_stats()
+
     def close(self) -> None:
         self.server.close()
 
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bingo game server")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=12345)
+    parser.add_argument("--engine", choices=["thread", "async"], default="thread",
+                        help="thread: one thread per client, async: single asyncio event loop")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="async engine only: number of worker processes sharing the port (0 = one per core)")
+    parser.add_argument("--room-size", type=int, default=4, help="players per room, a full room starts automatically")
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="seconds before an idle room is closed")
+    parser.add_argument("--round-timeout", type=float, default=None,
+                        help="seconds a round may wait for stragglers before it advances without them")
+    parser.add_argument("--max-queue-kb", type=int, default=MAX_QUEUE_BYTES // 1024,
+                        help="unsent data allowed per client before the slow-client policy applies")
+    parser.add_argument("--slow-client", choices=POLICIES, default=DISCONNECT,
+                        help="disconnect slow clients or drop messages they cannot keep up with")
+    parser.add_argument("--event-log", default=None,
+                        help="append every room's joins, rounds and results to this file (replay with replay.py)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus metrics on http://localhost:PORT/metrics (cluster: from the broker)")
+    parser.add_argument("--log-level", choices=["debug", "info", "warning", "error"], default="info")
+    parser.add_argument("--log-sample", type=int, default=log.SAMPLE_EVERY,
+                        help="log one in N per-message events (1 = every message)")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    server = GameServer()
+    args = parse_args()
+    log.setup(args.log_level, args.log_sample)
+    cluster = args.engine == "async" and args.workers != 1
+    # cluster 模式的房間在 broker process，由 broker 自己開 event log
+    event_log = EventLog(args.event_log) if args.event_log and not cluster else None
+    hub = GameHub(RoomRegistry(args.room_size, args.idle_timeout, args.round_timeout), event_log)
+    max_queue_bytes = args.max_queue_kb * 1024
+    if cluster:
+        from network.cluster import ClusterLauncher
+        server = ClusterLauncher(args.host, args.port, args.workers, args.room_size, args.idle_timeout,
+                                 round_timeout=args.round_timeout, max_queue_bytes=max_queue_bytes,
+                                 slow_client_policy=args.slow_client, event_log_path=args.event_log,
+                                 metrics_port=args.metrics_port)
+    elif args.engine == "async":
+        from network.async_server import AsyncGameServer
+        server = AsyncGameServer(args.host, args.port, hub, max_queue_bytes=max_queue_bytes,
+                                 slow_client_policy=args.slow_client)
+    else:
+        server = GameServer(args.host, args.port, hub, max_queue_bytes=max_queue_bytes,
+                            slow_client_policy=args.slow_client)
+    if args.metrics_port is not None and not cluster:
+        hub.export_metrics()
+        metrics.MetricsServer("localhost", args.metrics_port).start()
     server.start()
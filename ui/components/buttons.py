@@ -1,7 +1,8 @@
 import pygame
 from pygame.surface import Surface
 from pygame.font import Font
-from typing import Optional, Callable, Tuple
+from typing import List, Optional, Callable, Tuple
+from ui.components.text_cache import TextCache
 
 BLACK: Tuple[int, int, int] = (0, 0, 0)
 WHITE: Tuple[int, int, int] = (255, 255, 255)
@@ -17,14 +18,29 @@ class Button:
         self.text: str = text
         self.font: Optional[Font] = font
         self.callback: Optional[Callable[[], None]] = callback
-    
-    def draw(self, surface: Surface) -> None:
+        self.texts: Optional[TextCache] = TextCache(font, 4) if font else None
+        self.dirty: bool = True
+
+    # 外觀沒變就不畫，回傳畫過的範圍
+    def draw(self, surface: Surface) -> List[pygame.Rect]:
+        if not self.dirty:
+            return []
+        text = self.texts.render(self.text, WHITE)
+        text_rect = text.get_rect(topleft=self.rect.move(10, 10).topleft)
+        dirty = self.rect.union(text_rect)
+        surface.fill(BLACK, dirty)
         pygame.draw.rect(surface, self.color, self.rect, 2)
-        text = self.font.render(self.text, True, WHITE)
-        surface.blit(text, self.rect.move(10, 10))
-    
+        surface.blit(text, text_rect)
+        self.dirty = False
+        return [dirty]
+
+    def invalidate(self) -> None:
+        self.dirty = True
+
     def set_color(self, color: Tuple[int, int, int]) -> None:
-        self.color = color
+        if color != self.color:
+            self.color = color
+            self.dirty = True
 
     def handle_click(self, event: pygame.event.EventType) -> None:
         x, y = event.pos
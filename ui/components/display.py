@@ -2,58 +2,106 @@ import pygame
 from game.logic import GameLogic
 from pygame.surface import Surface
 from pygame.font import Font
-from typing import Tuple
+from typing import List, Optional, Set, Tuple
+from ui.components.text_cache import TextCache
 
+BLACK: Tuple[int, int, int] = (0, 0, 0)
 WHITE: Tuple[int, int, int] = (255, 255, 255)
 BLUE: Tuple[int, int, int] = (0, 0, 255)
 
 
+# 只重畫有變動的格子，draw 回傳畫過的範圍給 pygame.display.update
 class Grid:
-    def __init__(self, game: GameLogic, screen: Surface, grid_size: Tuple[int, int], font: Font):
+    def __init__(self, game: GameLogic, screen: Surface, grid_size: Tuple[int, int], font: Font, cache_size: Optional[int] = None):
         self.game: GameLogic = game
         self.screen: Surface = screen
         self.grid_size: Tuple[int, int] = grid_size
         self.font: Font = font
-        
-    def draw(self) -> None:
+        # 每格的數字都不同，快取至少要放得下整個棋盤
+        self.texts: TextCache = TextCache(font, game.grid_num * game.grid_num + 64 if cache_size is None else cache_size)
+        self.dirty: Set[Tuple[int, int]] = set()
+        self.invalidate_all()
+
+    def invalidate(self, x: int, y: int) -> None:
+        self.dirty.add((x, y))
+
+    def invalidate_all(self) -> None:
+        self.dirty.update((i, j) for i in range(self.game.grid_num) for j in range(self.game.grid_num))
+
+    # 格子編號跟 game.cell_index 一樣是 row * grid_num + col
+    def invalidate_cell(self, index: int) -> None:
+        if index >= 0:
+            y, x = divmod(index, self.game.grid_num)
+            self.invalidate(x, y)
+
+    def draw(self) -> List[pygame.Rect]:
+        if not self.dirty:
+            return []
+        rects = [self.draw_cell(i, j) for i, j in self.dirty]
+        # 整個棋盤都重畫時只回報一個範圍，不用傳上萬個 rect
+        if len(self.dirty) == self.game.grid_num * self.game.grid_num:
+            rects = [pygame.Rect(0, 0, self.grid_size[0] * self.game.grid_num, self.grid_size[1] * self.game.grid_num)]
+        self.dirty.clear()
+        return rects
+
+    def draw_cell(self, i: int, j: int) -> pygame.Rect:
         rect_size = (self.grid_size[0], self.grid_size[1])
-        for i in range(self.game.grid_num):
-            for j in range(self.game.grid_num):
-                color = BLUE if self.game.selected[j][i] else WHITE
-                width = 0 if self.game.selected[j][i] else 1
-
-                rect = pygame.Rect(i * rect_size[0], j * rect_size[1], rect_size[0], rect_size[1])
-                
-                pygame.draw.rect(self.screen, color, rect, width)
+        rect = pygame.Rect(i * rect_size[0], j * rect_size[1], rect_size[0], rect_size[1])
+        # 數字超出格子的部分剪掉，重畫一格才不會蓋到或留下隔壁的字
+        self.screen.set_clip(rect)
+        self.screen.fill(BLACK, rect)
+        color = BLUE if self.game.selected[j][i] else WHITE
+        width = 0 if self.game.selected[j][i] else 1
+        pygame.draw.rect(self.screen, color, rect, width)
+
+        if (i, j) in self.game.player_inputs:
+            pygame.draw.rect(self.screen, WHITE, rect, 1)
+            value = self.game.player_inputs[(i, j)]
+            if value:
+                self.screen.blit(self.texts.render(value, WHITE), rect.move(rect_size[0] // 2, rect_size[1] // 2))
+        self.screen.set_clip(None)
+        return rect
+
+
+# 文字沒變就不畫；變了就把舊的字擦掉再畫新的
+class TextLabel:
+    def __init__(self, screen: Surface, font: Font):
+        self.screen: Surface = screen
+        self.texts: TextCache = TextCache(font)
+        self.text: Optional[str] = None
+        self.rect: Optional[pygame.Rect] = None
 
-                if (i, j) in self.game.player_inputs:
-                    rect = pygame.Rect(
-                        i * rect_size[0], j * rect_size[1], rect_size[0], rect_size[1])
-                    pygame.draw.rect(self.screen, WHITE, rect, 1)
-                    text = self.font.render(
-                        self.game.player_inputs[(i, j)], True, WHITE)
-                else:
-                    text = self.font.render("", True, WHITE)
+    def invalidate(self) -> None:
+        self.text = None
 
-                self.screen.blit(text, rect.move(
-                    rect_size[0] // 2, rect_size[1] // 2))
+    def draw(self, text: str, position: Tuple[int, int]) -> List[pygame.Rect]:
+        if text == self.text:
+            return []
+        surface = self.texts.render(text, WHITE)
+        rect = surface.get_rect(topleft=position)
+        dirty = rect.union(self.rect) if self.rect else rect
+        self.screen.fill(BLACK, dirty)
+        self.screen.blit(surface, rect)
+        self.text, self.rect = text, rect
+        return [dirty]
 
 
 # online mode
 
 
 class PlayerCountDisplay:
-    def __init__(self, screen: Surface, font: Font, player_count_queue, ended_round_players):
+    def __init__(self, screen: Surface, font: Font):
         self.screen: Surface = screen
         self.font: Font = font
-        self.player_count_queue = player_count_queue
-        self.ended_round_players = ended_round_players
         self.player_count: int = 0  # 初始化玩家數量為0
         self.ended_round_players_num: int = 0
+        self.label: TextLabel = TextLabel(screen, font)
 
-    def draw(self, position: Tuple[int, int]) -> None:
-        count_text = self.font.render(f"{self.ended_round_players_num}/{self.player_count}", True, WHITE)
-        self.screen.blit(count_text, position)
+    def draw(self, position: Tuple[int, int]) -> List[pygame.Rect]:
+        return self.label.draw(f"{self.ended_round_players_num}/{self.player_count}", position)
+
+    def invalidate(self) -> None:
+        self.label.invalidate()
 
     def set_player_count(self, count: int) -> None:
         self.player_count = count
@@ -76,8 +124,10 @@ class RoundsDisplay:
         self.screen: Surface = screen
         self.font: Font = font
         self.game: GameLogic = game
+        self.label: TextLabel = TextLabel(screen, font)
+
+    def draw(self, position: Tuple[int, int]) -> List[pygame.Rect]:
+        return self.label.draw(f"Round: {self.game.rounds} / {self.game.rounds_limit}", position)
 
-    def draw(self, position: Tuple[int, int]) -> None:
-        rounds_text = self.font.render(
-            f"Round: {self.game.rounds} / 8", True, WHITE)
-        self.screen.blit(rounds_text, position)
+    def invalidate(self) -> None:
+        self.label.invalidate()
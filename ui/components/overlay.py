@@ -0,0 +1,128 @@
+import pygame
+from collections import deque
+from pygame.surface import Surface
+from pygame.font import Font
+from typing import Callable, Deque, List, Optional, Tuple
+from ui.components.text_cache import TextCache
+
+WHITE: Tuple[int, int, int] = (255, 255, 255)
+GRAY: Tuple[int, int, int] = (160, 160, 160)
+BACKGROUND: Tuple[int, int, int] = (40, 40, 40)
+TOAST_SECONDS: float = 2.5
+
+# toast 到期時由 pygame.time.set_timer 送來，serial 對不上的是已經關掉的 toast
+OVERLAY_EXPIRE: int = pygame.event.custom_type()
+
+
+class Notification:
+    def __init__(self, title: str, message: str, modal: bool = False, duration: float = TOAST_SECONDS,
+                 on_close: Optional[Callable[[], None]] = None):
+        self.title: str = title
+        self.message: str = message
+        self.modal: bool = modal  # modal 要點一下或按任意鍵才會關，toast 時間到自己消失
+        self.duration: float = duration
+        self.on_close: Optional[Callable[[], None]] = on_close
+
+
+# 畫在遊戲畫面上的通知，一次顯示一則，其他的排隊；不會卡住主迴圈，網路事件照常處理
+class NotificationOverlay:
+    def __init__(self, screen: Surface, title_font: Font, font: Font, area: pygame.Rect):
+        self.screen: Surface = screen
+        self.titles: TextCache = TextCache(title_font, 32)
+        self.texts: TextCache = TextCache(font, 64)
+        self.area: pygame.Rect = area  # 通知置中在這個範圍裡
+        self.queue: Deque[Notification] = deque()
+        self.current: Optional[Notification] = None
+        self.surface: Optional[Surface] = None
+        self.rect: Optional[pygame.Rect] = None
+        self.cleared: Optional[pygame.Rect] = None  # 剛關掉的通知蓋住的範圍，底下要重畫
+        self.serial: int = 0
+
+    def push(self, title: str, message: str, modal: bool = False, duration: float = TOAST_SECONDS,
+             on_close: Optional[Callable[[], None]] = None) -> None:
+        # 連按好幾次同一個提示只顯示一次
+        pending = [self.current] + list(self.queue) if self.current else list(self.queue)
+        if on_close is None and any(n.title == title and n.message == message for n in pending):
+            return
+        notification = Notification(title, message, modal, duration, on_close)
+        if modal:
+            # 輸贏要馬上擋住棋盤：排在所有 toast 前面，正在顯示的 toast 直接收掉
+            self.queue.insert(next((i for i, n in enumerate(self.queue) if not n.modal), len(self.queue)), notification)
+            if self.current and not self.current.modal:
+                self.close()
+                return
+        else:
+            self.queue.append(notification)
+        if self.current is None:
+            self.show_next()
+
+    def show_next(self) -> None:
+        self.current = self.queue.popleft() if self.queue else None
+        self.surface = None
+        self.serial += 1
+        if self.current and not self.current.modal:
+            pygame.time.set_timer(pygame.event.Event(OVERLAY_EXPIRE, serial=self.serial),
+                                  int(self.current.duration * 1000), loops=1)
+
+    def close(self) -> None:
+        closed = self.current
+        if closed is None:
+            return
+        if self.rect:
+            self.cleared = self.rect.union(self.cleared) if self.cleared else self.rect
+        self.rect = None
+        self.show_next()
+        if closed.on_close:
+            closed.on_close()
+
+    # 關閉遊戲前把等著關的通知都關掉，讓 on_close 的後續動作(例如重新開局)照常執行
+    def close_all(self) -> None:
+        while self.current:
+            self.close()
+
+    def is_modal(self) -> bool:
+        return bool(self.current and self.current.modal)
+
+    # 處理到的事件回傳 True；modal 顯示時吃掉點擊與按鍵，不會傳到棋盤
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        if event.type == OVERLAY_EXPIRE:
+            if event.serial == self.serial and self.current and not self.current.modal:
+                self.close()
+            return True
+        if self.is_modal() and event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN):
+            self.close()
+            return True
+        return False
+
+    def render(self, notification: Notification) -> Surface:
+        lines = [self.titles.render(notification.title, WHITE)]
+        lines += [self.texts.render(line, WHITE) for line in notification.message.split("\n")]
+        if notification.modal:
+            lines.append(self.texts.render("click to continue", GRAY))
+        padding = 16
+        width = max(line.get_width() for line in lines) + padding * 2
+        height = sum(line.get_height() for line in lines) + padding * 2 + 4 * (len(lines) - 1)
+        surface = Surface((width, height))
+        surface.fill(BACKGROUND)
+        pygame.draw.rect(surface, WHITE, surface.get_rect(), 2)
+        y = padding
+        for line in lines:
+            surface.blit(line, ((width - line.get_width()) // 2, y))
+            y += line.get_height() + 4
+        return surface
+
+    # drawn 是這個 frame 其他元件畫過的範圍，蓋到通知的話要再畫一次
+    def draw(self, drawn: List[pygame.Rect], force: bool = False) -> List[pygame.Rect]:
+        if self.current is None:
+            return []
+        if self.surface is None:
+            self.surface = self.render(self.current)
+            # modal 置中，toast 放在上方不擋住太多棋盤
+            if self.current.modal:
+                self.rect = self.surface.get_rect(center=self.area.center)
+            else:
+                self.rect = self.surface.get_rect(midtop=(self.area.centerx, self.area.top + 20))
+        elif not force and self.rect.collidelist(drawn) == -1:
+            return []
+        self.screen.blit(self.surface, self.rect)
+        return [self.rect]
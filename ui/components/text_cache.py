@@ -0,0 +1,30 @@
+from collections import OrderedDict
+from pygame.surface import Surface
+from pygame.font import Font
+from typing import Tuple
+
+
+# font.render 的結果照 (文字, 顏色) 存起來；畫面上的字大多不會變，不用每個 frame 重新 render
+# 超過 max_size 就丟掉最久沒用的，max_size 為 0 時不快取
+class TextCache:
+    def __init__(self, font: Font, max_size: int = 256):
+        self.font: Font = font
+        self.max_size: int = max_size
+        self.surfaces: "OrderedDict[Tuple[str, Tuple[int, int, int]], Surface]" = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def render(self, text: str, color: Tuple[int, int, int]) -> Surface:
+        key = (text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self.font.render(text, True, color)
+        if self.max_size:
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        return surface
@@ -1,12 +1,20 @@
 import pygame
 from game.logic import GameLogic
-import utility.message_box
+from game.optimizer import game_config, suggest_board
+from game.snapshot import board_hash, cell_contents, encode_delta, encode_snapshot, needs_compaction, restore_state
 from db.database import UserSystem
+from db.event_log import EventLog
+from game.replay import GameRecorder
 import socket
 import threading
+import time
 from ui.components.buttons import Button
 from ui.components.display import *
-import queue
+from ui.components.overlay import OVERLAY_EXPIRE, NotificationOverlay
+from network.protocol import PLAYER_STATE, FrameDecoder, MessageType, encode, encode_board
+from network.session import RECONNECT_DELAYS, ClientSession
+from ui.network_events import (CONNECTION_LOST, DISCONNECTED, DRAWN, GAME_OVER, NETWORK_EVENTS, PLAYER_COUNT, RESUMED,
+                               ROOM_JOINED, ROUND_PROGRESS, to_event)
 from typing import Dict, Tuple, List, Optional
 
 BLACK: Tuple[int, int, int] = (0, 0, 0)
@@ -17,7 +25,8 @@ BLUE: Tuple[int, int, int] = (0, 0, 255)
 
 
 class GameUI:
-    def __init__(self, user_system: UserSystem, game: GameLogic, player_name: str = "", game_state: dict = None, online_mode: bool = False):
+    def __init__(self, user_system: UserSystem, game: GameLogic, player_name: str = "", game_state: dict = None, online_mode: bool = False,
+                 board_pixels: int = 600, event_log: Optional[EventLog] = None):
         right_padding: int = 500
 
         self.user_system: UserSystem = user_system
@@ -27,32 +36,55 @@ class GameUI:
         self.online_mode: bool = online_mode
 
         pygame.init()
+        # 用不到的事件(例如滑鼠移動)不要叫醒迴圈；要在連上 server 之前設定，封鎖時會清掉已排隊的事件
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN, pygame.VIDEOEXPOSE,
+                                  pygame.WINDOWEXPOSED, OVERLAY_EXPIRE] + NETWORK_EVENTS)
 
         self.server_thread: threading.Thread = None
-        self.player_count_queue: queue.Queue = queue.Queue()
 
         if game_state:
-            self.game.grid = game_state["grid"]
-            self.game.selected = game_state["selected"]
-            self.game.used_nums = game_state["used_nums"]
-            self.game.player_inputs = game_state["player_inputs"]
-            self.game.rounds = game_state["rounds"]
+            try:
+                restore_state(self.game, game_state)
+            except ValueError as e:
+                print(f"Discarding saved game: {e}")
+                self.game.reset()
+                game_state = None
+        # 每局的 seed、輸入與抽號都記下來，之後可以用 replay.py 重播
+        self.recorder: Optional[GameRecorder] = GameRecorder(event_log) if event_log else None
+        if self.recorder:
+            self.recorder.start(self.game)
+            if game_state:
+                self.recorder.restore(encode_snapshot(self.game))
 
         self.player_count: int = 0  # 玩家数量
-        self.ended_round_players: set = set()  # 當前回合已完成的玩家
         self.waiting_for_round: bool = False  # 是否等待回合结束
-
-        self.total_grid_size: Tuple[int, int] = (600, 600)  # size of the grid
+        self.room_id: Optional[int] = None  # server 分配的房間
+        # 斷線時用 server 發的 token 接回原本的座位；waiting_round 是送出 ROUND_END 時房間的回合
+        self.session: ClientSession = ClientSession()
+        self.waiting_round: int = 0
+        self.server_address: Tuple[str, int] = ("localhost", 12345)
+        # 線上模式的號碼由 server 每回合抽一次，按 Get 才套用到自己的棋盤
+        self.server_draw: Optional[Tuple[int, int]] = None  # (房間回合, 號碼)
+        self.drawn_round: int = -1  # 最後套用的是哪一回合的號碼
+
+        self.total_grid_size: Tuple[int, int] = (board_pixels, board_pixels)  # size of the grid
         self.grid_size: Tuple[int, int] = (self.total_grid_size[0] // self.game.grid_num, self.total_grid_size[1] // self.game.grid_num)
         self.colored: List[List[bool]] = [[False]*self.game.grid_num for _ in range(self.game.grid_num)]
         self.window_size: Tuple[int, int] = (self.total_grid_size[0] + right_padding, self.total_grid_size[1])
         self.screen: pygame.Surface = pygame.display.set_mode(self.window_size)
         self.font: pygame.font.Font = pygame.font.Font(None, 36)
+        # 格子變小時數字也跟著縮小
+        self.cell_font: pygame.font.Font = pygame.font.Font(None, max(8, min(36, self.grid_size[1] * 2 // 3)))
 
-        self.grid: Grid = Grid(self.game, self.screen, self.grid_size, self.font)
-        self.player_count_display: PlayerCountDisplay = PlayerCountDisplay(self.screen, self.font, self.player_count_queue, self.ended_round_players)
+        self.grid: Grid = Grid(self.game, self.screen, self.grid_size, self.cell_font)
+        self.player_count_display: PlayerCountDisplay = PlayerCountDisplay(self.screen, self.font)
         self.rounds_display: RoundsDisplay = RoundsDisplay(self.game, self.screen, self.font)
         self.current_cell: Optional[Tuple[int, int]] = None
+        # 提示與輸贏訊息畫在遊戲畫面上，不再開 Tk 視窗卡住主迴圈
+        self.overlay: NotificationOverlay = NotificationOverlay(self.screen, self.font, pygame.font.Font(None, 28),
+                                                                self.screen.get_rect())
+        self.full_redraw: bool = True  # 下一個 frame 整個畫面重畫
 
         # mode
         self.is_typing_mode: bool = True
@@ -67,102 +99,237 @@ class GameUI:
             (self.total_grid_size[0] + right_padding // 4, self.total_grid_size[1] - 110, 110, 50))
         self.record_button_rect: pygame.Rect = pygame.Rect(
             (self.total_grid_size[0] + right_padding*2 // 4, self.total_grid_size[1] - 50, 110, 50))
+        self.suggest_button_rect: pygame.Rect = pygame.Rect(
+            (self.total_grid_size[0] + right_padding*2 // 4, self.total_grid_size[1] - 110, 110, 50))
         self.buttons: Dict[str, Button] = {
             "confirm": Button(self.confirm_button_rect, text="Confirm", font=self.font, callback=self.handle_confirm),
             "getRandomNum": Button(self.getRandomNum_button_rect, text="Get", font=self.font, callback=self.handle_get_random_num),
-            "record": Button(self.record_button_rect, text="Record", font=self.font, callback=self.handle_record)
+            "record": Button(self.record_button_rect, text="Record", font=self.font, callback=self.handle_record),
+            "suggest": Button(self.suggest_button_rect, text="Suggest", font=self.font, callback=self.handle_suggest)
         }
 
         # 線上模式
         if self.online_mode:
+            # 收訊息的 thread 重連時會換掉 socket，跟主迴圈送訊息互斥
+            self.socket_lock: threading.Lock = threading.Lock()
             self.server_socket: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_socket.connect(("localhost", 12345))
-            self.server_thread = threading.Thread(target=self.receive_messages, args=(self.player_count_queue,))
+            self.server_socket.connect(self.server_address)
+            self.server_thread = threading.Thread(target=self.receive_messages)
             self.server_thread.start()
-            self.send_message(f"{self.player_name} login")
+            self.send_message(MessageType.LOGIN, self.player_name.encode())
 
     def start(self) -> None:
         pygame.display.set_caption('Bingo Game')
-        clock: pygame.time.Clock = pygame.time.Clock()
 
         while self.running:
-            self.screen.fill(BLACK)
-            self.grid.draw()
-            self.rounds_display.draw((self.total_grid_size[0] + 10, 50))
-            for button in self.buttons.values():
-                button.draw(self.screen)
-            if self.online_mode:
-                self.player_count_display.draw((self.total_grid_size[0] + 10, 10))  # 顯示玩家數量
-            pygame.display.flip()
-            for event in pygame.event.get():
+            self.render()
+            # 沒有動畫，畫面只在有事件時才會變；toast 到期也是 set_timer 送來的事件
+            events = [pygame.event.wait()] + pygame.event.get()
+            for event in events:
+                if event.type in NETWORK_EVENTS:
+                    self.handle_network_event(event)
+                    continue
+                if self.overlay.handle_event(event):
+                    continue
+                # 視窗被其他視窗(例如訊息框)蓋過，整個重畫
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.full_redraw = True
                 # 關閉遊戲
                 if event.type == pygame.QUIT:
-                    if self.player_name:
-                        self.user_system.save_game_state(self.player_name, self.game.__dict__)
+                    self.overlay.close_all()
+                    self.save_game()
                     self.running = False
                     break
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     self.handle_click(event)
-                    break
+                    continue
                 if self.is_typing_mode and event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_BACKSPACE:
                         input_value = self.game.player_inputs[self.current_cell][:-1]
-                        self.game.update_player_input(*self.current_cell, input_value)
-                    if len(self.game.player_inputs.get(self.current_cell, '')) < 2:
+                        self.set_input(*self.current_cell, input_value)
+                    if len(self.game.player_inputs.get(self.current_cell, '')) < self.game.max_input_length():
                         input_value = self.game.player_inputs.get(self.current_cell, '') + event.unicode
-                        self.game.update_player_input(*self.current_cell, input_value)
-
-            clock.tick(30)
+                        self.set_input(*self.current_cell, input_value)
 
         self.quit_game()
         pygame.quit()
 
-    # 收server訊息
-    def receive_messages(self, player_count_queue: queue.Queue) -> None:
+    # 只畫有變動的格子、按鈕與文字，再用 display.update 送出那些範圍
+    def render(self) -> None:
+        # 通知關掉之後底下被蓋住的部分要重畫
+        if self.overlay.cleared:
+            self.full_redraw = True
+            self.overlay.cleared = None
+        full_redraw = self.full_redraw
+        if full_redraw:
+            self.screen.fill(BLACK)
+            self.grid.invalidate_all()
+            self.rounds_display.invalidate()
+            self.player_count_display.invalidate()
+            for button in self.buttons.values():
+                button.invalidate()
+            self.full_redraw = False
+        rects: List[pygame.Rect] = self.grid.draw()
+        rects += self.rounds_display.draw((self.total_grid_size[0] + 10, 50))
+        for button in self.buttons.values():
+            rects += button.draw(self.screen)
+        if self.online_mode:
+            rects += self.player_count_display.draw((self.total_grid_size[0] + 10, 10))  # 顯示玩家數量
+        rects += self.overlay.draw(rects, full_redraw)
+        if full_redraw:
+            pygame.display.flip()
+        elif rects:
+            pygame.display.update(rects)
+
+    # 收server訊息；這個 thread 不碰畫面，轉成 pygame 事件交給主迴圈
+    # 連線斷掉時在這裡重連，主迴圈照常跑
+    def receive_messages(self) -> None:
+        decoder: FrameDecoder = FrameDecoder()
         while self.running:
             try:
-                message: str = self.server_socket.recv(1024).decode()
-                if message.startswith("player_count"):
-                    print(f'received message: {message}')
-                    _, count = message.split()
-                    player_count: int = int(count)
-                    player_count_queue.put(player_count)
-                    self.player_count_display.set_player_count(player_count)
-                elif message.startswith("round_end"):
-                    print(f'received message: {message}')
-                    fields: List[str] = message.split()
-                    ended_round_players_num: int = int(fields[1])
-                    self.player_count_display.set_ended_round_players_num(ended_round_players_num)
-                    if ended_round_players_num == self.player_count_display.get_player_count():
-                        self.waiting_for_round = False
-                        self.player_count_display.set_ended_round_players_num(0)
-                else:
-                    print("Received message:", message)
-            except Exception as e:
+                data: bytes = self.server_socket.recv(4096)
+            except OSError as e:
                 print(f'Error occurred: {e}')
-                break
-    
+                data = b""
+            if not data:
+                if not self.running or not self.reconnect():
+                    break
+                decoder = FrameDecoder()
+                continue
+            for msg_type, payload in decoder.feed(data):
+                self.session.observe(msg_type, payload)
+                # 座位已經過期，改用名字重新加入新的房間
+                if msg_type == MessageType.RESUME_FAILED:
+                    self.send_message(MessageType.LOGIN, self.player_name.encode())
+                event = to_event(msg_type, payload)
+                if event is None:
+                    print("Received message:", msg_type.name, payload)
+                else:
+                    pygame.event.post(event)
+
+    # 有 token 就送 RESUME 只拿回斷線期間錯過的部分，沒有才重新 LOGIN
+    # 全部失敗時通知主迴圈，不再假裝連線還在
+    def reconnect(self) -> bool:
+        pygame.event.post(pygame.event.Event(CONNECTION_LOST))
+        # 舊的 socket 先關掉，不然每次重連都會漏一個 file descriptor
+        self.close_socket()
+        for delay in RECONNECT_DELAYS:
+            time.sleep(delay)
+            if not self.running:
+                return False
+            try:
+                server_socket = socket.create_connection(self.server_address)
+            except OSError as e:
+                print(f'Reconnect failed: {e}')
+                continue
+            with self.socket_lock:
+                # 等待時視窗已經關了
+                if not self.running:
+                    server_socket.close()
+                    return False
+                self.server_socket = server_socket
+            request = self.session.resume_request()
+            if request is None:
+                self.send_message(MessageType.LOGIN, self.player_name.encode())
+            else:
+                self.send_message(MessageType.RESUME, request)
+            return True
+        pygame.event.post(pygame.event.Event(DISCONNECTED))
+        return False
+
+    def close_socket(self) -> None:
+        with self.socket_lock:
+            try:
+                # 讓還卡在 recv 的 thread 醒來
+                if self.server_socket.fileno() != -1:
+                    self.server_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.server_socket.close()
+
+    def handle_network_event(self, event: pygame.event.Event) -> None:
+        if event.type == PLAYER_COUNT:
+            print(f'received message: player_count {event.count}')
+            self.player_count_display.set_player_count(event.count)
+        elif event.type == ROUND_PROGRESS:
+            if not event.complete:
+                print(f'received message: round_end {event.ended}')
+                self.player_count_display.set_ended_round_players_num(event.ended)
+            if event.complete or event.ended == self.player_count_display.get_player_count():
+                self.waiting_for_round = False
+                self.player_count_display.set_ended_round_players_num(0)
+        elif event.type == ROOM_JOINED:
+            self.room_id = event.room_id
+            self.server_draw = None
+            self.drawn_round = -1
+            print(f'joined room {self.room_id}')
+        elif event.type == GAME_OVER:
+            print(f'{event.player or "another player"} finished: {event.outcome}')
+            self.overlay.push("Game over", f"{event.player or 'Another player'} {'won' if event.outcome == 'win' else 'lost'}")
+        elif event.type == DRAWN:
+            if event.round > self.drawn_round:
+                self.server_draw = (event.round, event.number)
+        elif event.type == CONNECTION_LOST:
+            self.overlay.push("Connection lost", "Reconnecting...")
+        elif event.type == RESUMED:
+            self.handle_resumed(event)
+        elif event.type == DISCONNECTED:
+            # 線上的一局沒辦法繼續，關掉訊息就跟按下關閉視窗一樣存檔離開
+            self.overlay.push("Disconnected", "Could not reconnect to the server.\nThe game will close.",
+                              modal=True, on_close=lambda: pygame.event.post(pygame.event.Event(pygame.QUIT)))
+
+    def handle_resumed(self, event: pygame.event.Event) -> None:
+        if not event.ok:
+            # 換了新房間，之前的回合不用再等
+            self.waiting_for_round = False
+            self.player_count_display.set_ended_round_players_num(0)
+            if self.confirm_button_pressed:
+                self.send_board()
+            self.overlay.push("Reconnected", "Your seat expired, joined a new room.")
+            return
+        self.room_id = event.room_id
+        self.player_count_display.set_player_count(event.players)
+        self.player_count_display.set_ended_round_players_num(event.ended)
+        print(f'resumed room {self.room_id} at round {event.round}')
+        if event.rounds == self.game.rounds and event.board_hash != board_hash(self.game):
+            print('server has a different board for this game')
+        if self.waiting_for_round:
+            if event.round > self.waiting_round:
+                # 斷線期間回合已經結束
+                self.waiting_for_round = False
+                self.player_count_display.set_ended_round_players_num(0)
+            elif not event.arrived:
+                # ROUND_END 在斷線時掉了，再送一次
+                self.send_round_end()
+        self.overlay.push("Reconnected", f"Back in room {self.room_id}.")
+
+    # server 留一份棋盤副本，用來驗證勝利
+    def send_board(self) -> None:
+        self.send_message(MessageType.BOARD, encode_board(cell_contents(self.game)[0]))
+
+    # 附上自己的回合數與棋盤 hash，server 記在 session 裡，重新連線時一起回傳
+    def send_round_end(self) -> None:
+        self.waiting_round = self.session.acked_round
+        self.send_message(MessageType.ROUND_END, PLAYER_STATE.pack(self.game.rounds, board_hash(self.game)))
+
     # 發給server訊息
-    def send_message(self, message: str) -> None:
+    def send_message(self, msg_type: MessageType, payload: bytes = b"") -> None:
         if not self.running:
             return
-        try:
-            self.server_socket.send(message.encode())
-        except Exception as e:
-            print(f'Error occurred: {e}')
+        with self.socket_lock:
+            # 重連中或已經放棄重連，socket 是關的
+            if self.server_socket.fileno() == -1:
+                return
+            try:
+                self.server_socket.sendall(encode(msg_type, payload))
+            except Exception as e:
+                print(f'Error occurred: {e}')
 
     def quit_game(self) -> None:
         self.running = False
 
         if self.online_mode:
-            if self.server_socket:
-                try:
-                    # Add a condition to ensure the socket is valid
-                    if self.server_socket.fileno() != -1:
-                        self.server_socket.shutdown(socket.SHUT_RDWR)
-                        self.server_socket.close()
-                except socket.error as e:
-                    print(f'Error occurred: {e}')
+            self.close_socket()
 
         # Join the server thread
         if self.server_thread and self.server_thread.is_alive():
@@ -172,10 +339,36 @@ class GameUI:
         sys.exit()
 
     def restart_game(self) -> None:
-        self.game.__init__()
+        self.game.reset()
+        self.grid.invalidate_all()
         self.is_typing_mode = True
         self.confirm_button_pressed = False
         self.buttons["confirm"].set_color(WHITE)
+        if self.recorder:
+            self.recorder.start(self.game)
+        self.save_game()
+
+    def set_input(self, x: int, y: int, value: str) -> None:
+        self.game.update_player_input(x, y, value)
+        self.grid.invalidate(x, y)
+        if self.recorder:
+            self.recorder.input(x, y, value)
+
+    # 只有離線登入會從存檔接著玩，線上模式不存
+    def saves_progress(self) -> bool:
+        return bool(self.player_name) and not self.online_mode
+
+    # 存完整的 snapshot；之後每回合只附加 delta
+    def save_game(self) -> None:
+        if self.saves_progress():
+            self.user_system.save_game_state(self.player_name, encode_snapshot(self.game))
+
+    def record_draw(self, num: str) -> None:
+        if not self.saves_progress():
+            return
+        delta = encode_delta(self.game.rounds, self.game.cell_index(num))
+        if needs_compaction(self.user_system.append_game_delta(self.player_name, delta)):
+            self.save_game()
 
     def handle_click(self, event: pygame.event.Event) -> None:
         x, y = event.pos
@@ -186,79 +379,106 @@ class GameUI:
             self.buttons["getRandomNum"].handle_click(event)
         if self.record_button_rect.collidepoint(x, y):
             self.buttons["record"].handle_click(event)
+        if self.suggest_button_rect.collidepoint(x, y) and self.is_typing_mode:
+            self.buttons["suggest"].handle_click(event)
 
         # 點擊格子
         if x < self.total_grid_size[0]:
             i = x // self.grid_size[0]
             j = y // self.grid_size[1]
 
-            if self.is_typing_mode:
+            if self.is_typing_mode and i < self.game.grid_num and j < self.game.grid_num:
                 self.current_cell = (i, j)
-                self.game.update_player_input(i, j, "")
+                self.set_input(i, j, "")
 
     def handle_confirm(self) -> None:
         # 檢查有沒有全填滿
-        self.game.used_nums = [j for i in self.game.grid for j in i]
-        print(f"self.grid: {self.game.grid}")
-        print(f"self.game.used_nums: {self.game.used_nums}")
         if not self.game.is_all_filled():
-            utility.message_box.show_message("Hints", "Please fill in all numbers!")
+            self.overlay.push("Hints", "Please fill in all numbers!")
             return
 
-        for (i, j) in self.game.player_inputs:
-            if self.game.is_invalid_input(i, j, self.game.grid[i][j]):
-                utility.message_box.show_message(
-                    "Error", "Invalid input at position " + str((i + 1, j + 1)) + "! Please enter again."
-                )
-                return
-        else:
-            self.is_typing_mode = False
-            self.buttons["confirm"].set_color(BLUE)
-            self.confirm_button_pressed = True
-
-        return
+        invalid = self.game.validate_board()
+        if invalid:
+            positions = ", ".join(str((i + 1, j + 1)) for i, j in sorted(invalid))
+            self.overlay.push("Error", f"Invalid input at position {positions}! Please enter again.", duration=4.0)
+            return
+        self.game.start_draws()
+        if self.recorder:
+            self.recorder.confirm()
+        print(f"self.game.used_nums: {len(self.game.used_nums)} numbers")
+        self.is_typing_mode = False
+        self.buttons["confirm"].set_color(BLUE)
+        self.confirm_button_pressed = True
+        if self.online_mode:
+            self.send_board()
+        # 棋盤定下來了，先存一份完整的，之後抽號只要記 delta
+        self.save_game()
 
     def handle_get_random_num(self) -> None:
         if not self.confirm_button_pressed:
-            utility.message_box.show_message("Hints", "Please confirm your input.")
+            self.overlay.push("Hints", "Please confirm your input.")
             return
         if self.online_mode:
             if self.waiting_for_round:  # 等待回合结束，不能繼續get
-                utility.message_box.show_message(
-                    "Wait", "Please wait for other players to finish the round.")
+                self.overlay.push("Wait", "Please wait for other players to finish the round.")
                 return
-        num = self.game.get_random_num_in_used_nums()
-        for i in range(self.game.grid_num):
-            for j in range(self.game.grid_num):
-                if self.game.grid[i][j] == num:
-                    self.game.selected[i][j] = True
-                    break
-        self.grid.draw()
-        pygame.display.flip()
+            if self.server_draw is None:
+                self.overlay.push("Wait", "Waiting for the server to draw this round's number.")
+                return
+            # 整個房間同一個號碼，不一定在自己的棋盤上
+            self.drawn_round, number = self.server_draw
+            self.server_draw = None
+            num = str(number)
+            hit = self.game.apply_draw(num)
+            if self.recorder:
+                self.recorder.server_draw(num)
+        else:
+            num = self.game.get_random_num_in_used_nums()
+            if self.recorder:
+                self.recorder.draw(self.game.cell_index(num), num)
+            hit = self.game.mark_drawn(num)
         self.game.rounds += 1
+        # 沒中只會發生在線上模式(server 的號碼不一定在自己的棋盤上)，線上模式不存檔
+        if hit:
+            self.grid.invalidate_cell(self.game.cell_index(num))
+            self.record_draw(num)
 
         if self.game.check_game_finish() == "win":
+            if self.recorder:
+                self.recorder.result("win", self.game.rounds)
             self.record["win"] += 1
+            if self.online_mode:
+                self.send_message(MessageType.WIN, self.player_name.encode())
             if self.player_name != "":
                 self.user_system.update_leaderboard(self.player_name, self.record["win"], self.record["lose"])
-            utility.message_box.show_message(
-                "Win!", f"You win!\nWin: {self.record['win']} - Lose: {self.record['lose']}")
-            self.restart_game()
+            # 關掉訊息之前棋盤先留著給玩家看，關掉才重新開局
+            self.overlay.push("Win!", f"You win!\nWin: {self.record['win']} - Lose: {self.record['lose']}",
+                              modal=True, on_close=self.restart_game)
         elif self.game.check_game_finish() == "lose":
+            if self.recorder:
+                self.recorder.result("lose", self.game.rounds)
             self.record["lose"] += 1
+            if self.online_mode:
+                self.send_message(MessageType.LOSE, self.player_name.encode())
             if self.player_name != "":
                 self.user_system.update_leaderboard(self.player_name, self.record["win"], self.record["lose"])
-            utility.message_box.show_message(
-                "Lose!", f"You lose!\nWin: {self.record['win']} - Lose: {self.record['lose']}")
-            self.restart_game()
+            self.overlay.push("Lose!", f"You lose!\nWin: {self.record['win']} - Lose: {self.record['lose']}",
+                              modal=True, on_close=self.restart_game)
 
         if self.online_mode:
             self.waiting_for_round = True
-            self.send_message("round_end")
+            self.send_round_end()
         print(f"Get: {num}")
         print(f"rounds: {self.game.rounds}")
         return
 
+    # 用 optimizer 快取裡這個設定的棋盤(沒有就隨機)填滿格子，玩家還是可以再自己改
+    # 抽號是均勻的，每種合法棋盤的勝率都一樣，所以這只是省掉自己填的時間，不會比較容易贏
+    def handle_suggest(self) -> None:
+        board = suggest_board(game_config(self.game))
+        for x in range(self.game.grid_num):
+            for y in range(self.game.grid_num):
+                self.set_input(x, y, board[y][x])
+
     def handle_record(self) -> None:
-        utility.message_box.show_message(
-            "Record", f"Win: {self.record['win']} - Lose: {self.record['lose']}")
+        self.overlay.push("Record", f"Win: {self.record['win']} - Lose: {self.record['lose']}")
@@ -0,0 +1,38 @@
+import pygame
+from network.protocol import ROUND_DRAW, MessageType, decode_count
+from network.session import ResumeState
+from typing import List, Optional
+
+# server 訊息轉成的 pygame 事件，由收訊息的 thread post，主迴圈被喚醒後處理
+PLAYER_COUNT: int = pygame.event.custom_type()  # count: 房間裡的玩家數
+ROUND_PROGRESS: int = pygame.event.custom_type()  # ended: 已完成本回合的人數, complete: 回合是否結束
+ROOM_JOINED: int = pygame.event.custom_type()  # room_id
+GAME_OVER: int = pygame.event.custom_type()  # outcome: "win" / "lose", player: 分出勝負的玩家
+CONNECTION_LOST: int = pygame.event.custom_type()  # 連線斷了，背景正在重連
+# ok: 是否接回原本的座位；接回時附上 ResumeState 的欄位，失敗就已經改送 LOGIN 加入新房間
+RESUMED: int = pygame.event.custom_type()
+DRAWN: int = pygame.event.custom_type()  # round: 房間回合, number: server 這回合抽到的號碼
+DISCONNECTED: int = pygame.event.custom_type()  # 重連全部失敗，不會再收到 server 的訊息
+NETWORK_EVENTS: List[int] = [PLAYER_COUNT, ROUND_PROGRESS, ROOM_JOINED, GAME_OVER, CONNECTION_LOST, RESUMED, DRAWN,
+                             DISCONNECTED]
+
+
+def to_event(msg_type: MessageType, payload: bytes) -> Optional[pygame.event.Event]:
+    if msg_type == MessageType.PLAYER_COUNT:
+        return pygame.event.Event(PLAYER_COUNT, count=decode_count(payload))
+    if msg_type == MessageType.ROUND_END:
+        return pygame.event.Event(ROUND_PROGRESS, ended=decode_count(payload), complete=False)
+    if msg_type == MessageType.ROUND_COMPLETE:
+        return pygame.event.Event(ROUND_PROGRESS, ended=0, complete=True)
+    if msg_type == MessageType.ROOM_JOINED:
+        return pygame.event.Event(ROOM_JOINED, room_id=decode_count(payload))
+    if msg_type in (MessageType.WIN, MessageType.LOSE):
+        return pygame.event.Event(GAME_OVER, outcome=msg_type.name.lower(), player=payload.decode(errors="replace"))
+    if msg_type == MessageType.DRAW:
+        round_number, number = ROUND_DRAW.unpack(payload)
+        return pygame.event.Event(DRAWN, round=round_number, number=number)
+    if msg_type == MessageType.RESUME:
+        return pygame.event.Event(RESUMED, ok=True, **vars(ResumeState(payload)))
+    if msg_type == MessageType.RESUME_FAILED:
+        return pygame.event.Event(RESUMED, ok=False)
+    return None
@@ -1,8 +1,8 @@
 from tkinter import *
 from utility.message_box import messagebox
 from db.database import UserSystem
+from db.event_log import EventLog
 from game.logic import GameLogic
-from ui.game_ui import GameUI
 from typing import Optional, Callable
 # 滑鼠事件
 class ButtonAnimation:
@@ -19,8 +19,11 @@ class ButtonAnimation:
 
 # offline/online
 class StartWindow(ButtonAnimation):
-    def __init__(self, user_system: UserSystem):
+    def __init__(self, user_system: UserSystem, game_factory: Callable[[], GameLogic] = GameLogic,
+                 event_log: Optional[EventLog] = None):
         self.user_system = user_system
+        self.game_factory = game_factory
+        self.event_log = event_log
 
         self.window = Tk()
         self.window.title("Select Mode")
@@ -54,7 +57,7 @@ class StartWindow(ButtonAnimation):
     def show_options_window(self, mode: str) -> Callable[[], None]:
         def show_options() -> None:
             self.window.destroy()
-            options_window = OptionsWindow(self.user_system, mode)
+            options_window = OptionsWindow(self.user_system, mode, self.game_factory, self.event_log)
             options_window.run()
 
         return show_options
@@ -64,12 +67,15 @@ class StartWindow(ButtonAnimation):
 
 
 class OptionsWindow(ButtonAnimation):
-    def __init__(self, user_system: UserSystem, mode: str):
+    def __init__(self, user_system: UserSystem, mode: str, game_factory: Callable[[], GameLogic] = GameLogic,
+                 event_log: Optional[EventLog] = None):
         self.window = Tk()
         self.window.title(f"{mode.capitalize()} Options")
         self.window.geometry("250x200")
 
         self.mode = mode
+        self.game_factory = game_factory
+        self.event_log = event_log
 
         self.username_label = Label(self.window, text="Username")
         self.username_label.pack()
@@ -107,9 +113,11 @@ class OptionsWindow(ButtonAnimation):
         if self.user_system.login(username, password):
             self.user = username
             self.window.destroy()
-            game = GameLogic()
+            from ui.game_ui import GameUI
+            game = self.game_factory()
             game_state = self.user_system.load_game_state(self.user) if self.mode == "offline" else None
-            ui = GameUI(self.user_system, game, self.user, game_state, online_mode=self.mode == "online")
+            ui = GameUI(self.user_system, game, self.user, game_state, online_mode=self.mode == "online",
+                        event_log=self.event_log)
             ui.start()
         else:
             messagebox.showinfo("Error", "Invalid username or password")
@@ -127,9 +135,11 @@ class OptionsWindow(ButtonAnimation):
         leaderBoard.run()
 
     def game_start(self) -> None:
+        # pygame 要載入將近半秒，等真的要開始玩才 import，選單可以先出來
+        from ui.game_ui import GameUI
         self.window.destroy()
-        game = GameLogic()
-        ui = GameUI(self.user_system, game, online_mode=self.mode == "online")
+        game = self.game_factory()
+        ui = GameUI(self.user_system, game, online_mode=self.mode == "online", event_log=self.event_log)
         ui.start()
 
     def run(self) -> None:
@@ -137,22 +147,50 @@ class OptionsWindow(ButtonAnimation):
 
 
 class LeaderBoard(ButtonAnimation):
+    PAGE_SIZE: int = 10
+
     def __init__(self, user_system: UserSystem):
         self.user_system = user_system
         self.window = Toplevel()
         self.window.title("Leaderboard")
-
-        leaderboard = self.user_system.get_leaderboard()
+        self.page: int = 0
 
         # 創建排行榜標籤
         label = Label(self.window, text="Leaderboard", font=("Helvetica", 16, "bold"))
         label.pack(pady=10)
 
+        self.rows_frame = Frame(self.window)
+        self.rows_frame.pack()
+
+        # 上一頁/下一頁
+        buttons_frame = Frame(self.window)
+        buttons_frame.pack(pady=5)
+        self.prev_button = Button(buttons_frame, text="Prev", command=lambda: self.show_page(self.page - 1))
+        self.prev_button.pack(side=LEFT, padx=5)
+        self.set_button_animation(self.prev_button)
+        self.next_button = Button(buttons_frame, text="Next", command=lambda: self.show_page(self.page + 1))
+        self.next_button.pack(side=LEFT, padx=5)
+        self.set_button_animation(self.next_button)
+
+        self.show_page(0)
+
+    def show_page(self, page: int) -> None:
+        # 多拿一筆判斷還有沒有下一頁
+        leaderboard = self.user_system.get_leaderboard(self.PAGE_SIZE + 1, page * self.PAGE_SIZE)
+        if page > 0 and not leaderboard:
+            return
+        self.page = page
+        for widget in self.rows_frame.winfo_children():
+            widget.destroy()
+
         # 顯示每個玩家的戰績
-        for index, player in enumerate(leaderboard, 1):
+        for index, player in enumerate(leaderboard[:self.PAGE_SIZE], page * self.PAGE_SIZE + 1):
             text = f"{index}. {player['username']}: Wins - {player['wins']}, Losses - {player['losses']}"
-            player_label = Label(self.window, text=text)
+            player_label = Label(self.rows_frame, text=text)
             player_label.pack()
 
+        self.prev_button.config(state=NORMAL if page > 0 else DISABLED)
+        self.next_button.config(state=NORMAL if len(leaderboard) > self.PAGE_SIZE else DISABLED)
+
     def run(self) -> None:
         self.window.mainloop()